@@ -23,7 +23,7 @@ def main(argv=None):
 
     if args.action == 'add':
         if getattr(args, 'config', False):
-            actions.initialize(args)
+            return actions.initialize(args)
         else:
             actions.add_repo(args)
 
@@ -34,8 +34,35 @@ def main(argv=None):
         actions.display_tracked_repositories(args)
 
     elif args.action == 'scan':
+        if args.all:
+            return actions.scan_tracked_repositories(args)
+
         return actions.scan_repo(args)
 
+    elif args.action == 'migrate':
+        actions.migrate_storage_layout(args)
+
+    elif args.action == 'pool':
+        actions.manage_object_pools(args)
+
+    elif args.action == 'maintain':
+        actions.maintain_repositories(args)
+
+    elif args.action == 'serve':
+        return actions.serve(args)
+
+    elif args.action == 'simulate':
+        actions.simulate_schedules(args)
+
+    elif args.action == 'audit':
+        return actions.audit_repo(args)
+
+    elif args.action == 'rescan':
+        if args.all:
+            return actions.rescan_tracked_repositories(args)
+
+        return actions.rescan_repo(args)
+
     return 0
 
 
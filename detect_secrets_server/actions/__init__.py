@@ -1,5 +1,14 @@
+from .audit import audit_repo        # noqa: F401
 from .initialize import add_repo    # noqa: F401
 from .initialize import initialize  # noqa: F401
 from .install import install_mapper  # noqa: F401
 from .list import display_tracked_repositories  # noqa: F401
+from .maintain import maintain_repositories  # noqa: F401
+from .migrate import migrate_storage_layout  # noqa: F401
+from .pool import manage_object_pools  # noqa: F401
+from .rescan import rescan_repo       # noqa: F401
+from .rescan import rescan_tracked_repositories  # noqa: F401
 from .scan import scan_repo         # noqa: F401
+from .scan import scan_tracked_repositories  # noqa: F401
+from .serve import serve            # noqa: F401
+from .simulate import simulate_schedules  # noqa: F401
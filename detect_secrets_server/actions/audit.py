@@ -0,0 +1,41 @@
+import json
+import sys
+
+from detect_secrets.core.log import log
+
+from .scan import _get_user_from_email
+from .scan import _load_tracked_repo
+
+try:
+    FileNotFoundError
+except NameError:  # pragma: no cover
+    FileNotFoundError = IOError
+
+
+def audit_repo(args):
+    """Displays every secret ever committed to a tracked repository, as
+    newline delimited JSON, as soon as each is found.
+
+    Returns 0 on success.
+    """
+    try:
+        repo = _load_tracked_repo(args)
+    except FileNotFoundError:
+        log.error('Unable to find repo: %s', args.repo)
+        return 1
+
+    count = 0
+    for secret in repo.audit(
+        exclude_files_regex=args.exclude_files,
+        exclude_lines_regex=args.exclude_lines,
+        jobs=args.jobs,
+    ):
+        secret['repo'] = repo.name
+        secret['author'] = _get_user_from_email(secret['author'])
+
+        print(json.dumps(secret, sort_keys=True))
+        sys.stdout.flush()
+        count += 1
+
+    log.info('Found %d secrets in the history of %s', count, repo.name)
+    return 0
@@ -1,5 +1,21 @@
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+
+from detect_secrets.core.log import log
+
 from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
 from detect_secrets_server.repos.factory import tracked_repo_factory
+from detect_secrets_server.storage.seed import CloneSeed
+from detect_secrets_server.util.journal import ProgressJournal
+
+try:
+    FileNotFoundError
+except NameError:  # pragma: no cover
+    FileNotFoundError = IOError
 
 
 def add_repo(args):
@@ -18,9 +34,16 @@ def add_repo(args):
 
         is_local=args.local,
         s3_config=args.s3_config if args.storage == 's3' else None,
+
+        object_pool=args.object_pool,
+        refs=args.refs,
     )
 
-    _clone_and_save_repo(repo)
+    _clone_and_save_repo(
+        repo,
+        _get_clone_seed(args),
+        timeout=args.clone_timeout,
+    )
 
 
 def initialize(args):
@@ -28,6 +51,12 @@ def initialize(args):
     and returns the commands to add to your crontab.
 
     Sets up local file storage for tracking repositories.
+
+    Repositories are cloned concurrently (with up to args.jobs at a time), and
+    progress is recorded in a journal under args.root_dir, so that an
+    interrupted run can be resumed without cloning everything again.
+
+    Returns 0 on success.
     """
     tracked_repos = [
         _create_single_tracked_repo(
@@ -42,12 +71,88 @@ def initialize(args):
             s3_config=args.s3_config if repo['storage'] == 's3' else None,
 
             rootdir=args.root_dir,
+            object_pool=repo['object_pool'],
+            refs=repo['refs'],
         )
         for repo in args.repo
     ]
 
-    for repo in tracked_repos:
-        _clone_and_save_repo(repo)
+    if not tracked_repos:
+        return 0
+
+    journal = ProgressJournal(_get_journal_location(args))
+    pending = [
+        repo
+        for repo in tracked_repos
+        if repo.repo not in journal
+    ]
+    if len(pending) < len(tracked_repos):
+        log.info(
+            'Resuming from %s: skipping %d repositories already added.',
+            journal.filename,
+            len(tracked_repos) - len(pending),
+        )
+
+    seed = _get_clone_seed(args)
+
+    def _add(repo):
+        _clone_and_save_repo(repo, seed, timeout=args.clone_timeout)
+        journal.record(repo.repo)
+
+    failures = {}
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(_add, repo): repo
+            for repo in pending
+        }
+        for future in as_completed(futures):
+            repo = futures[future]
+            try:
+                future.result()
+            except (Exception, SystemExit) as e:
+                # One bad repository shouldn't prevent the others from being added.
+                failures[repo.repo] = _describe_failure(e)
+                log.error('Unable to add %s: %s', repo.repo, failures[repo.repo])
+
+    if failures:
+        log.error(
+            'Failed to add %d of %d repositories (re-run to retry them):\n%s',
+            len(failures),
+            len(tracked_repos),
+            '\n'.join(
+                '    {}: {}'.format(repo, reason)
+                for repo, reason in sorted(failures.items())
+            ),
+        )
+        return 1
+
+    journal.remove()
+    return 0
+
+
+def _get_journal_location(args):
+    """Journals are specific to the config they were created for, so that
+    changes to the config are never skipped.
+    """
+    digest = hashlib.sha1(
+        json.dumps(args.repo, sort_keys=True, default=str).encode('utf-8'),
+    ).hexdigest()
+
+    return os.path.join(args.root_dir, 'add-{}.journal'.format(digest))
+
+
+def _describe_failure(error):
+    if isinstance(error, subprocess.CalledProcessError) and error.output:
+        output = error.output
+        if isinstance(output, bytes):
+            output = output.decode('utf-8', errors='ignore')
+
+        return output.strip().splitlines()[-1]
+
+    if isinstance(error, SystemExit):
+        return 'exited with status {}'.format(error.code)
+
+    return str(error)
 
 
 def _create_single_tracked_repo(
@@ -60,6 +165,8 @@ def _create_single_tracked_repo(
     exclude_regex,
     is_local,
     s3_config,
+    object_pool=None,
+    refs=None,
 ):
     """
     These are REQUIRED arguments:
@@ -94,6 +201,13 @@ def _create_single_tracked_repo(
 
         :type s3_config: dict
         :param s3_config: files generated to save state will be synced with Amazon S3.
+
+        :type object_pool: str
+        :param object_pool: name of a shared object store, for repositories
+            that share history (e.g. forks).
+
+        :type refs: list(str)
+        :param refs: patterns of other refs to scan, besides the main branch.
     """
     repo_class = tracked_repo_factory(
         is_local,
@@ -111,21 +225,55 @@ def _create_single_tracked_repo(
         exclude_regex=exclude_regex,
 
         s3_config=s3_config,
+        object_pool=object_pool,
+        refs=refs,
     )
 
 
-def _clone_and_save_repo(repo):
+def _get_clone_seed(args):
+    if not getattr(args, 'seed_dir', None):
+        return None
+
+    return CloneSeed(args.seed_dir)
+
+
+def _clone_and_save_repo(repo, seed=None, timeout=None):
     """
     :type repo: BaseTrackedRepo
     :param repo: repo to clone (if appropriate) and save
+
+    :type seed: CloneSeed|None
+    :param seed: local source of objects for new clones.
+
+    :type timeout: int|None
+    :param timeout: seconds, after which cloning is aborted.
     """
     # Clone repo, if needed.
-    repo.storage.clone()
+    repo.storage.clone(seed=seed, timeout=timeout)
 
     # Make the last_commit_hash of repo point to HEAD
     if not repo.last_commit_hash:
+        _carry_over_scanned_plugins(repo)
         repo.update()
         return repo.save(OverrideLevel.ALWAYS)
 
     # Save the last_commit_hash, if we have nothing on file already
     return repo.save(OverrideLevel.NEVER)
+
+
+def _carry_over_scanned_plugins(repo):
+    """If the repository is already tracked, its files were scanned with its
+    previous plugin configuration. Remembering this allows
+    `rescan --changed-plugins` to only run plugins that changed since.
+
+    :type repo: BaseTrackedRepo
+    """
+    try:
+        data = repo.storage.get(repo.storage.hash_filename(repo.name))
+    except FileNotFoundError:
+        return
+    except ValueError:
+        log.warning('Unable to read previous metadata for %s', repo.name)
+        return
+
+    repo.scanned_plugins = data.get('scanned_plugins', data['plugins'])
@@ -1,8 +1,10 @@
+import shlex
 import tempfile
 
 from crontab import CronTab
 
 from .list import list_tracked_repositories
+from detect_secrets_server.util.cron import spread_crontab
 
 
 def install_mapper(args):
@@ -27,19 +29,10 @@ def _install_cron(args):
                 old_content.append(line.strip())
 
     # Create jobs from tracked repositories
-    jobs = []
-    for repo, is_local in list_tracked_repositories(args):
-        command = '{}    detect-secrets-server scan {}'.format(
-            repo['crontab'],
-            repo['repo']
-        )
-        if is_local:
-            command += ' --local'
-        if args.root_dir:
-            command += ' --root-dir {}'.format(args.root_dir)
-        if args.output_hook_command:
-            command += ' {}'.format(args.output_hook_command)
-        jobs.append(command.strip())
+    if args.grouped:
+        jobs = _get_grouped_jobs(args)
+    else:
+        jobs = _get_jobs(args)
 
     # Construct new crontab
     content = '\n'.join(jobs)
@@ -54,3 +47,78 @@ def _install_cron(args):
         user=True,
     )
     cron.write_to_user(user=True)
+
+
+def _get_jobs(args):
+    """One job per tracked repository."""
+    jobs = []
+    for repo, is_local in list_tracked_repositories(args):
+        crontab = repo['crontab']
+        if args.spread_schedule:
+            crontab = spread_crontab(crontab, repo['repo'])
+
+        command = '{}    detect-secrets-server scan {}'.format(
+            crontab,
+            repo['repo']
+        )
+        if is_local:
+            command += ' --local'
+
+        command += _get_common_flags(args)
+        jobs.append(command.strip())
+
+    return jobs
+
+
+def _get_grouped_jobs(args):
+    """One job per distinct crontab (separately for local repositories), which
+    scans all repositories sharing it within a single process.
+    """
+    groups = []
+    for repo, is_local in list_tracked_repositories(args):
+        group = (repo['crontab'], bool(is_local))
+        if group not in groups:
+            groups.append(group)
+
+    jobs = []
+    for crontab, is_local in groups:
+        command = '{}    detect-secrets-server scan --all --schedule {}'.format(
+            crontab,
+            shlex.quote(crontab),
+        )
+        if args.shard_config:
+            command += ' --shard-config {} --shard-node {}'.format(
+                shlex.quote(args.shard_config),
+                shlex.quote(args.shard_node),
+            )
+        if is_local:
+            command += ' --local'
+
+        command += _get_common_flags(args)
+        jobs.append(command.strip())
+
+    return jobs
+
+
+def _get_common_flags(args):
+    """
+    :rtype: str
+    :returns: flags needed for scans to find the same tracked repositories,
+        and alert in the same way.
+    """
+    output = ''
+    if args.storage != 'file':
+        output += ' --storage {}'.format(args.storage)
+    if getattr(args, 's3_config', None):
+        output += ' --s3-credentials-file {} --s3-bucket {}'.format(
+            shlex.quote(args.s3_config['creds_filename']),
+            shlex.quote(args.s3_config['bucket']),
+        )
+        if args.s3_config['prefix']:
+            output += ' --s3-prefix {}'.format(shlex.quote(args.s3_config['prefix']))
+    if args.root_dir:
+        output += ' --root-dir {}'.format(shlex.quote(args.root_dir))
+    if args.output_hook_command:
+        output += ' {}'.format(args.output_hook_command)
+
+    return output
@@ -1,14 +1,123 @@
+import json
+import math
+from datetime import datetime
+
+from detect_secrets.core.log import log
+
+from detect_secrets_server.repos.factory import tracked_repo_factory
 from detect_secrets_server.storage.file import FileStorageWithLocalGit
 from detect_secrets_server.storage.s3 import S3Storage
+from detect_secrets_server.util.cron import CronSchedule
+from detect_secrets_server.util.cron import get_runs_per_hour
+from detect_secrets_server.util.cron import spread_crontab
+from detect_secrets_server.util.ring import get_rebalance_report
+
+
+HISTOGRAM_WIDTH = 50
 
 
 def display_tracked_repositories(args):
+    if args.schedule_histogram:
+        return display_schedule_histogram(args)
+
+    if args.rebalance:
+        return display_rebalance_report(args)
+
     for repo, is_local in list_tracked_repositories(args):
         if is_local is None or args.local == is_local:
             print(repo['repo'])
 
 
+def display_schedule_histogram(args, day=None):
+    """Shows how many scans start within each hour of the day, to identify
+    times where all scans run at once.
+
+    :type day: datetime.datetime|None
+    :param day: defaults to today.
+    """
+    schedules = []
+    for repo, _ in list_tracked_repositories(args):
+        crontab = repo['crontab']
+        if args.spread_schedule:
+            crontab = spread_crontab(crontab, repo['repo'])
+
+        try:
+            schedules.append(CronSchedule(crontab))
+        except ValueError:
+            log.error('Invalid crontab for %s, skipping.', repo['repo'])
+
+    if not day:
+        day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    runs_per_hour = get_runs_per_hour(schedules, day)
+    scale = max(1, int(math.ceil(max(runs_per_hour) / float(HISTOGRAM_WIDTH))))
+    for hour, runs in enumerate(runs_per_hour):
+        print(
+            '{:02d}:00  {:>6}  {}'.format(
+                hour,
+                runs,
+                '#' * int(math.ceil(runs / float(scale))),
+            ).rstrip(),
+        )
+
+
+def display_rebalance_report(args):
+    """Shows which repositories would move between nodes (along with their
+    clones), if the shard config were replaced with args.rebalance.
+    """
+    storage = _get_storage(args)
+    keys = {
+        repo['repo']: get_shard_key(storage, repo, is_local)
+        for repo, is_local in storage.get_tracked_repositories()
+    }
+
+    print(
+        json.dumps(
+            get_rebalance_report(keys, args.shard_ring, args.rebalance),
+            indent=2,
+            sort_keys=True,
+        ),
+    )
+
+
 def list_tracked_repositories(args):
+    """If sharding is configured, only this node's share of repositories
+    are listed.
+
+    :rtype: iterator(dict, bool)
+    """
+    storage = _get_storage(args)
+    ring = getattr(args, 'shard_ring', None)
+
+    for repo, is_local in storage.get_tracked_repositories():
+        if ring and ring.get_node(
+            get_shard_key(storage, repo, is_local),
+        ) != args.shard_node:
+            continue
+
+        yield repo, is_local
+
+
+def get_shard_key(storage, repo, is_local):
+    """Repositories are assigned to nodes by the same key as their tracked
+    files (and clones), so that nodes can be populated by copying those.
+
+    :type storage: BaseStorage
+    :type repo: dict
+    :param repo: tracked repository metadata.
+
+    :type is_local: bool|None
+
+    :rtype: str
+    """
+    name = repo['repo']
+    if not is_local:
+        name = storage.get_repo_name(name)
+
+    return storage.hash_filename(name)
+
+
+def _get_storage(args):
     mapping = {
         's3': lambda args: S3Storage(args.root_dir, args.s3_config),
 
@@ -16,4 +125,23 @@ def list_tracked_repositories(args):
         'file': lambda args: FileStorageWithLocalGit(args.root_dir),
     }
 
-    return mapping[args.storage](args).get_tracked_repositories()
+    return mapping[args.storage](args)
+
+
+def load_cloned_repositories(args):
+    """Local repositories are managed by the user, so we leave them alone.
+
+    :rtype: iterator(BaseTrackedRepo)
+    """
+    s3_config = getattr(args, 's3_config', None)
+    repo_class = tracked_repo_factory(False, bool(s3_config))
+
+    for tracked_repo, is_local in list_tracked_repositories(args):
+        if is_local:
+            continue
+
+        yield repo_class.load_from_file(
+            tracked_repo['repo'],
+            args.root_dir,
+            s3_config=s3_config,
+        )
@@ -0,0 +1,26 @@
+import json
+
+from .list import load_cloned_repositories
+
+
+def maintain_repositories(args):
+    """Performs maintenance on clones that need it, and displays the
+    before/after report for each.
+    """
+    reports = []
+    for repo in load_cloned_repositories(args):
+        report = repo.storage.maintain(
+            force=args.force,
+            max_packs=args.max_packs,
+            max_loose_size=args.max_loose_size,
+        )
+        if report:
+            reports.append(report)
+
+    print(
+        json.dumps(
+            reports,
+            indent=2,
+            sort_keys=True,
+        ),
+    )
@@ -0,0 +1,17 @@
+from detect_secrets.core.log import log
+
+from detect_secrets_server.storage.file import FileStorageWithLocalGit
+
+
+def migrate_storage_layout(args):
+    """Moves cloned repositories and tracked metadata files stored in the
+    legacy flat layout under --root-dir into their sharded locations, in-place.
+
+    This is safe to run multiple times; entries already sharded are left alone.
+    """
+    # Using the local version, since the local version includes the non-local one.
+    moved = FileStorageWithLocalGit(args.root_dir).migrate()
+    for path in moved:
+        print(path)
+
+    log.info('Migrated %d entries under %s', len(moved), args.root_dir)
@@ -0,0 +1,56 @@
+import json
+from collections import defaultdict
+
+from detect_secrets.core.log import log
+
+from .list import load_cloned_repositories
+from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
+from detect_secrets_server.storage.pool import get_pool_name_for_root_commits
+
+
+def manage_object_pools(args):
+    """Displays the disk saved by each object pool, optionally detecting
+    new groups of related repositories first.
+    """
+    repos = list(load_cloned_repositories(args))
+    if args.detect:
+        _detect_object_pools(repos)
+
+    groups = defaultdict(list)
+    for repo in repos:
+        if repo.object_pool:
+            groups[repo.object_pool].append(repo.storage)
+
+    print(
+        json.dumps(
+            [
+                members[0].object_pool.get_report(members)
+                for _, members in sorted(groups.items())
+            ],
+            indent=2,
+            sort_keys=True,
+        ),
+    )
+
+
+def _detect_object_pools(repos):
+    groups = defaultdict(list)
+    for repo in repos:
+        if repo.object_pool:
+            continue
+
+        name = get_pool_name_for_root_commits(repo.storage.get_root_commits())
+        if name:
+            groups[name].append(repo)
+
+    for name, members in groups.items():
+        # There's nothing to share, for a group of one.
+        if len(members) < 2:
+            continue
+
+        for repo in members:
+            log.info('Moving %s onto object pool %s', repo.name, name)
+
+            repo.storage.join_object_pool(name)
+            repo.object_pool = name
+            repo.save(OverrideLevel.ALWAYS)
@@ -0,0 +1,75 @@
+import copy
+
+from detect_secrets.core.log import log
+
+from .list import list_tracked_repositories
+from .scan import _alert_on_secrets_found
+from .scan import _load_tracked_repo
+from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
+
+try:
+    FileNotFoundError
+except NameError:  # pragma: no cover
+    FileNotFoundError = IOError
+
+
+def rescan_repo(args):
+    """Scans every file of a tracked repository, at its last scanned commit,
+    and records that they were scanned with its current plugin configuration.
+
+    Returns 0 on success.
+    """
+    try:
+        repo = _load_tracked_repo(args)
+    except FileNotFoundError:
+        log.error('Unable to find repo: %s', args.repo)
+        return 1
+
+    if args.changed_plugins and not repo.get_changed_plugins():
+        log.info('No plugins changed for %s', repo.name)
+        return 0
+
+    secrets = repo.rescan(
+        exclude_files_regex=args.exclude_files,
+        exclude_lines_regex=args.exclude_lines,
+        changed_plugins=args.changed_plugins,
+    )
+
+    if len(secrets.data) > 0:
+        _alert_on_secrets_found(repo, secrets.json(), args.output_hook)
+
+    if args.always_update_state or (
+        (len(secrets.data) == 0)
+        and
+        (not args.dry_run)
+    ):
+        log.info('Rescanned %s with its current plugins', repo.name)
+
+        repo.scanned_plugins = repo.plugin_config
+        repo.save(OverrideLevel.ALWAYS)
+
+    return 0
+
+
+def rescan_tracked_repositories(args):
+    """Rescans all tracked repositories matching args.local, one after
+    another, e.g. to roll out a new plugin configuration.
+
+    Returns 0 if all rescans succeed.
+    """
+    status = 0
+    for metadata, is_local in list_tracked_repositories(args):
+        if bool(is_local) != args.local:
+            continue
+
+        repo_args = copy.copy(args)
+        repo_args.repo = metadata['repo']
+        try:
+            if rescan_repo(repo_args) != 0:
+                status = 1
+        except (Exception, SystemExit):
+            # One failing repository shouldn't prevent the rest from being rescanned.
+            log.exception('Unable to rescan %s', metadata['repo'])
+            status = 1
+
+    return status
@@ -1,8 +1,18 @@
+import copy
+import functools
+import subprocess
+import time
+from contextlib import contextmanager
+
 from detect_secrets.core.log import log
 
 from detect_secrets_server.actions.initialize import _clone_and_save_repo
+from detect_secrets_server.actions.list import list_tracked_repositories
+from detect_secrets_server.core.classify import SKIP
+from detect_secrets_server.core.memo import LineMemo
 from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
 from detect_secrets_server.repos.factory import tracked_repo_factory
+from detect_secrets_server.util.cron import spread_crontab
 
 try:
     FileNotFoundError
@@ -11,29 +21,121 @@ except NameError:  # pragma: no cover
 
 
 def scan_repo(args):
-    """Returns 0 on success"""
+    """Returns 0 on success (and, with --fail-fast, if no secrets are found)"""
     try:
-        repo = tracked_repo_factory(
-            args.local,
-            bool(getattr(args, 's3_config', None)),
-        ).load_from_file(
-            args.repo,
-            args.root_dir,
-            s3_config=getattr(args, 's3_config', None),
-        )
+        repo = _load_tracked_repo(args)
     except FileNotFoundError:
         log.error('Unable to find repo: %s', args.repo)
         return 1
 
+    lease = None
+    if args.lease_ttl:
+        lease = repo.acquire_lease(args.lease_ttl)
+        if not lease:
+            log.info('Skipping %s, since it is being scanned elsewhere.', repo.name)
+            return 0
+
+    try:
+        if lease:
+            # The previous lease holder may have updated its state, since
+            # we loaded it.
+            repo = _load_tracked_repo(args)
+
+        with _open_line_memo(args) as line_memo:
+            return _scan_tracked_repo(repo, args, line_memo)
+    finally:
+        if lease:
+            lease.release()
+
+
+def _load_tracked_repo(args):
+    """
+    :rtype: BaseTrackedRepo
+    :raises: FileNotFoundError
+    """
+    return tracked_repo_factory(
+        args.local,
+        bool(getattr(args, 's3_config', None)),
+    ).load_from_file(
+        args.repo,
+        args.root_dir,
+        s3_config=getattr(args, 's3_config', None),
+    )
+
+
+@contextmanager
+def _open_line_memo(args):
+    """
+    :rtype: LineMemo|None
+    :returns: the memo shared by scan_tracked_repositories (or serve), if
+        any. Otherwise, it's loaded from args.line_memo_file, and saved to
+        it afterwards.
+    """
+    line_memo = getattr(args, 'line_memo', None)
+    if line_memo is not None or args.no_line_memo:
+        yield line_memo
+        return
+
+    line_memo = LineMemo(args.line_memo_size, args.line_memo_file)
+    line_memo.load()
+    try:
+        yield line_memo
+    finally:
+        line_memo.save()
+
+
+def _scan_tracked_repo(repo, args, line_memo=None):
+    """Returns 0 on success (and, with --fail-fast, if no secrets are found)"""
     # if last_commit_hash is empty, re-clone and see if there's an initial commit hash
     if repo.last_commit_hash is None:
         _clone_and_save_repo(repo)
 
+    from_sha = repo.last_commit_hash
+    if line_memo is not None:
+        line_memo_stats = (line_memo.hits, line_memo.misses)
+
+    start = time.time()
     secrets = repo.scan(
         exclude_files_regex=args.exclude_files,
         exclude_lines_regex=args.exclude_lines,
         scan_head=args.scan_head,
+        recover_rewrites=args.recover_rewrites,
+        per_commit=args.per_commit,
+        checkpoint=(
+            None if args.dry_run
+            else functools.partial(_save_checkpoint, repo)
+        ),
+        fail_fast=args.fail_fast,
+        line_memo=line_memo,
+        generated_files=(
+            None if args.generated_files == 'scan'
+            else args.generated_files
+        ),
+        max_line_length=args.max_line_length,
+        line_length_cap=args.line_length_cap,
+        file_time_budget=args.file_time_budget,
     )
+    scan_seconds = time.time() - start
+
+    if repo.file_classifier:
+        _log_classified_files(repo, args.generated_files)
+
+    if repo.scan_guard:
+        _log_scan_guard(repo)
+
+    if line_memo is not None:
+        _log_line_memo_hit_rate(repo, line_memo, *line_memo_stats)
+
+    if args.fail_fast and secrets.data:
+        # Callers only need to know whether there are any secrets, as soon
+        # as possible, so we don't look up who committed them.
+        _alert_on_secrets_found(
+            repo,
+            secrets.json(),
+            args.output_hook,
+            set_authors=False,
+        )
+        return 1
 
     if (len(secrets.data) > 0) or args.always_run_output_hook:
         _alert_on_secrets_found(repo, secrets.json(), args.output_hook)
@@ -45,11 +147,150 @@ def scan_repo(args):
         and
         (not args.scan_head)
     ):
+        if args.record_activity:
+            repo.record_activity(from_sha, scan_seconds)
+
         _update_tracked_repo(repo)
 
+    if args.maintain:
+        report = repo.storage.maintain()
+        if report:
+            log.info('Maintenance report for %s: %s', repo.name, report)
+
+    if args.clone_disk_budget is not None:
+        repo.storage.enforce_clone_disk_budget(args.clone_disk_budget)
+
     return 0
 
 
+def _log_classified_files(repo, generated_files):
+    """Classified files aren't fully scanned, so each of them is logged.
+
+    :type repo: detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo
+
+    :type generated_files: str
+    :param generated_files: what was done with classified files.
+    """
+    classified = repo.file_classifier.classified
+    if not classified:
+        return
+
+    message = (
+        'Skipped %s in %s, since it is %s' if generated_files == SKIP
+        else 'Scanned %s in %s with cheap plugins only, since it is %s'
+    )
+    for filename, classification in sorted(classified.items()):
+        log.info(message, filename, repo.name, classification)
+
+    counts = {}
+    for classification in classified.values():
+        counts[classification] = counts.get(classification, 0) + 1
+
+    seconds_saved = repo.file_classifier.seconds_saved
+    log.info(
+        'Classified %s files in %s, saving %s',
+        ', '.join(
+            '{} {}'.format(count, classification)
+            for classification, count in sorted(counts.items())
+        ),
+        repo.name,
+        'unknown time' if seconds_saved is None
+        else 'about {:.2f}s'.format(seconds_saved),
+    )
+
+
+def _log_scan_guard(repo):
+    """
+    :type repo: detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo
+    """
+    guard = repo.scan_guard
+    truncated = {}
+    for filename, line_number in guard.truncated_lines:
+        truncated.setdefault(filename, []).append(str(line_number))
+
+    # Anything past the cap isn't scanned, so this shouldn't go unnoticed.
+    for filename, line_numbers in sorted(truncated.items()):
+        log.warning(
+            'Truncated lines longer than %d characters in %s in %s: %s',
+            guard.line_length_cap,
+            filename,
+            repo.name,
+            ', '.join(line_numbers),
+        )
+
+    for overrun in guard.overruns:
+        log.warning(
+            'Skipped the rest of %s in %s, after it exceeded its %ss budget '
+            'on line %d: %s was running %s',
+            overrun.filename,
+            repo.name,
+            guard.file_time_budget,
+            overrun.line_number,
+            overrun.plugin,
+            'an unknown regex' if overrun.regex is None
+            else 'regex {!r}'.format(overrun.regex),
+        )
+
+
+def _log_line_memo_hit_rate(repo, line_memo, hits, misses):
+    """
+    :type repo: detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo
+    :type line_memo: LineMemo
+
+    :type hits: int
+    :type misses: int
+    :param misses: of line_memo, before repo was scanned.
+    """
+    hits = line_memo.hits - hits
+    lines = hits + line_memo.misses - misses
+    if lines:
+        log.info(
+            'Line memo hit rate for %s: %.1f%% of %d lines',
+            repo.name,
+            100.0 * hits / lines,
+            lines,
+        )
+
+
+def scan_tracked_repositories(args):
+    """Scans all tracked repositories matching args.local (and args.schedule,
+    if provided) one after another, so that `install cron --grouped` only
+    starts a single process for each crontab.
+
+    Returns 0 if all scans succeed.
+    """
+    if args.schedule:
+        schedule = ' '.join(args.schedule.split())
+
+    status = 0
+    # Vendored code is often shared between repositories.
+    with _open_line_memo(args) as line_memo:
+        for metadata, is_local in list_tracked_repositories(args):
+            if bool(is_local) != args.local:
+                continue
+
+            if args.schedule:
+                crontab = metadata['crontab']
+                if args.spread_schedule:
+                    crontab = spread_crontab(crontab, metadata['repo'])
+
+                if ' '.join(crontab.split()) != schedule:
+                    continue
+
+            repo_args = copy.copy(args)
+            repo_args.repo = metadata['repo']
+            repo_args.line_memo = line_memo
+            try:
+                if scan_repo(repo_args) != 0:
+                    status = 1
+            except (Exception, SystemExit):
+                # One failing repository shouldn't prevent the rest from being scanned.
+                log.exception('Unable to scan %s', metadata['repo'])
+                status = 1
+
+    return status
+
+
 def _update_tracked_repo(repo):
     """Save and update records, since the latest scan indicates that the
     most recent commit is clean.
@@ -60,7 +301,15 @@ def _update_tracked_repo(repo):
     repo.save(OverrideLevel.ALWAYS)
 
 
-def _alert_on_secrets_found(repo, secrets, output_hook):
+def _save_checkpoint(repo, sha):
+    """Saves progress through a per-commit scan, since sha (and every commit
+    before it) is clean.
+    """
+    repo.last_commit_hash = sha
+    repo.save(OverrideLevel.ALWAYS)
+
+
+def _alert_on_secrets_found(repo, secrets, output_hook, set_authors=True):
     """
     :type repo: detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo
 
@@ -69,30 +318,53 @@ def _alert_on_secrets_found(repo, secrets, output_hook):
         detect_secrets.core.secrets_collection.SecretsCollection.json()
 
     :type output_hook: detect_secrets_server.hooks.base.BaseHook
+
+    :type set_authors: bool
+    :param set_authors: if False, secrets are sent without their authors
+        (or commits), which requires a git blame for each.
     """
     log.error('Secrets found in %s', repo.name)
 
-    _set_authors_for_found_secrets(repo, secrets)
+    if set_authors:
+        _set_authors_for_found_secrets(repo, secrets)
 
     output_hook.alert(repo.name, secrets)
 
 
 def _set_authors_for_found_secrets(repo, secrets):
-    """Use git blame to try and identify the user who committed the
-    potential secret. This allows us to follow up with a specific user if
-    a secret is found.
+    """Identifies the user who committed each potential secret, so that we
+    can follow up with them. Per-commit scans already know where secrets
+    were introduced: otherwise, we fall back to git blame.
 
     Modifies secrets in-place.
     """
     for filename in secrets:
         for potential_secret_dict in secrets[filename]:
-            blame_info = repo.storage.get_blame(
+            origin = repo.secret_origins.get((
                 filename,
-                potential_secret_dict['line_number'],
-            )
-            potential_secret_dict['author'] = (
-                _extract_user_from_git_blame_info(blame_info)
-            )
+                potential_secret_dict['hashed_secret'],
+                potential_secret_dict['type'],
+            ))
+            if origin:
+                potential_secret_dict['author'] = _get_user_from_email(
+                    origin['author'],
+                )
+                potential_secret_dict['commit'] = origin['commit']
+                continue
+
+            try:
+                blame_info = repo.storage.get_blame(
+                    filename,
+                    potential_secret_dict['line_number'],
+                )
+            except subprocess.CalledProcessError:
+                # Secrets found by per-commit scans may no longer be in HEAD.
+                potential_secret_dict['author'] = None
+            else:
+                potential_secret_dict['author'] = (
+                    _extract_user_from_git_blame_info(blame_info)
+                )
+
             # Set commit as current head when found, not when secret was added
             potential_secret_dict['commit'] = repo.storage.get_last_commit_hash()
 
@@ -107,7 +379,16 @@ def _extract_user_from_git_blame_info(info):
 
     index_of_mail = info.index('author-mail')
     email = info[index_of_mail + 1]     # Eg. `<khock@yelp.com>`
-    index_of_at_symbol = email.index('@')
 
-    # This will skip the prefix `<`, and extract the user up to the `@` sign.
-    return email[1:index_of_at_symbol]
+    # This will skip the prefix `<`
+    return _get_user_from_email(email[1:])
+
+
+def _get_user_from_email(email):
+    """
+    :type email: str
+    :param email: e.g. `khock@yelp.com`
+
+    :returns: the user, up to the `@` sign.
+    """
+    return email.split('@', 1)[0]
@@ -0,0 +1,80 @@
+import copy
+import signal
+
+from .list import list_tracked_repositories
+from .scan import _open_line_memo
+from .scan import scan_repo
+from detect_secrets_server.core.scheduler import Scheduler
+
+
+def serve(args):
+    """Scans tracked repositories according to their crontabs, until
+    interrupted. In-flight scans are completed before exiting.
+
+    Returns 0 on success.
+    """
+    # Lines are remembered across every scan, for as long as this runs.
+    with _open_line_memo(args) as line_memo:
+        scheduler = Scheduler(
+            lambda: list_tracked_repositories(args),
+            lambda metadata, is_local: _scan_repo(
+                args,
+                metadata['repo'],
+                is_local,
+                line_memo,
+            ),
+            jobs=args.jobs,
+            refresh_interval=args.refresh_interval,
+            spread=args.spread_schedule,
+            policy=args.policy if args.adaptive else None,
+        )
+
+        def _stop(signum, frame):
+            scheduler.stop()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, _stop)
+
+        scheduler.serve()
+
+    return 0
+
+
+def _scan_repo(args, repo, is_local, line_memo):
+    """
+    :type line_memo: LineMemo|None
+    :param line_memo: shared between concurrent scans.
+    """
+    scan_args = _get_scan_args(args, repo, is_local)
+    scan_args.line_memo = line_memo
+    try:
+        return scan_repo(scan_args)
+    finally:
+        # Otherwise, it would only be saved when the process exits (if at all).
+        if line_memo is not None:
+            line_memo.save()
+
+
+def _get_scan_args(args, repo, is_local):
+    """Scans are performed as if `scan` was invoked with the same
+    (common) options.
+    """
+    output = copy.copy(args)
+    output.repo = repo
+    output.local = bool(is_local)
+
+    for key in (
+        'always_run_output_hook',
+        'always_update_state',
+        'dry_run',
+        'fail_fast',
+        'maintain',
+        'scan_head',
+    ):
+        setattr(output, key, False)
+
+    output.clone_disk_budget = None
+    output.file_time_budget = None
+    output.record_activity = args.adaptive
+
+    return output
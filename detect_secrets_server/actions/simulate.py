@@ -0,0 +1,57 @@
+import json
+import time
+
+from .list import list_tracked_repositories
+from detect_secrets_server.core.simulation import simulate
+from detect_secrets_server.core.simulation import SimulatedRepo
+from detect_secrets_server.repos.factory import tracked_repo_factory
+from detect_secrets_server.util.cron import CronSchedule
+from detect_secrets_server.util.cron import spread_crontab
+
+
+def simulate_schedules(args):
+    """Replays the recent commit history of tracked repositories, and displays
+    the expected load and detection latency, both with their current crontabs,
+    and with adaptive scheduling.
+    """
+    end = int(time.time())
+    start = end - args.days * 24 * 60 * 60
+
+    s3_config = getattr(args, 's3_config', None)
+
+    repos = []
+    for tracked_repo, is_local in list_tracked_repositories(args):
+        repo = tracked_repo_factory(is_local, bool(s3_config)).load_from_file(
+            tracked_repo['repo'],
+            args.root_dir,
+            s3_config=s3_config,
+        )
+
+        expression = repo.crontab
+        if args.spread_schedule:
+            expression = spread_crontab(expression, repo.repo)
+
+        try:
+            schedule = CronSchedule(expression)
+        except ValueError:
+            continue
+
+        repos.append(
+            SimulatedRepo(
+                repo.repo,
+                schedule,
+                repo.storage.get_commit_timestamps(since=start),
+                activity=repo.activity,
+            ),
+        )
+
+    report = simulate(repos, start, end, args.policy)
+    report['days'] = args.days
+
+    print(
+        json.dumps(
+            report,
+            indent=2,
+            sort_keys=True,
+        ),
+    )
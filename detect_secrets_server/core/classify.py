@@ -0,0 +1,334 @@
+"""Generated, vendored and minified files (e.g. bundles, with lines that are
+hundreds of kilobytes long) are the slowest files for plugins to scan, and the
+least useful: they mostly find random looking strings that aren't secrets.
+
+Files are classified as GitHub's linguist does, with the `linguist-generated`
+and `linguist-vendored` git attributes, if set, and well-known paths otherwise.
+Files with very long added lines are classified as minified. Classified files
+are then skipped, or only scanned with cheap plugins.
+"""
+import re
+
+from detect_secrets_server.core.prefilter import ANCHORS
+
+
+GENERATED = 'generated'
+MINIFIED = 'minified'
+VENDORED = 'vendored'
+
+# What to do with classified files.
+CHEAP = 'cheap'
+SKIP = 'skip'
+
+# Plugins that classified files may be scanned with. These have selective
+# anchors, so the prefilter only runs them over the lines containing them,
+# and rarely find anything that isn't a secret.
+CHEAP_PLUGINS = frozenset(
+    name
+    for name in ANCHORS
+    if name != 'KeywordDetector'
+)
+
+# Added lines longer than this (in characters) mean that a file is minified.
+# This is well above long lines in config files (e.g. embedded certificates),
+# which should still be scanned as usual.
+DEFAULT_MAX_LINE_LENGTH = 50000
+
+VENDORED_PATHS = re.compile(
+    r'(^|/)('
+    r'vendors?|third[_-]party|node_modules|bower_components|jspm_packages|'
+    r'Godeps/_workspace|Pods|Carthage/Checkouts|\.yarn/(cache|releases)'
+    r')/',
+)
+GENERATED_PATHS = re.compile(
+    r'(^|/)('
+    r'package-lock\.json|npm-shrinkwrap\.json|yarn\.lock|pnpm-lock\.yaml|'
+    r'composer\.lock|Gemfile\.lock|Pipfile\.lock|poetry\.lock|Cargo\.lock|'
+    r'go\.sum|[^/]+\.pb\.go|[^/]+_pb2(_grpc)?\.py'
+    r')$',
+)
+MINIFIED_PATHS = re.compile(r'[.-]min\.(js|css)$|\.(js|css)\.map$')
+
+ATTRIBUTES = {
+    'linguist-generated': GENERATED,
+    'linguist-vendored': VENDORED,
+}
+
+
+class FileClassifier(object):
+
+    def __init__(self, get_attributes_files, max_line_length=DEFAULT_MAX_LINE_LENGTH):
+        """
+        :type get_attributes_files: function
+        :param get_attributes_files: see BaseStorage.get_attributes_files
+
+        :type max_line_length: int
+        """
+        self.get_attributes_files = get_attributes_files
+        self.max_line_length = max_line_length
+
+        # Mapping of directory to its list of (regex, attributes) rules.
+        self._rules = {}
+
+        # Mapping of filename to its classification.
+        self.classified = {}
+
+        # To estimate how much time was saved, we keep track of how long
+        # scanning took, with all plugins, and for classified files.
+        self.scanned_bytes = 0
+        self.scan_seconds = 0
+        self.classified_bytes = 0
+        self.classified_seconds = 0
+
+    def split_diff(self, diff):
+        """
+        :type diff: str
+        :rtype: tuple(str, str)
+        :returns: (diff of unclassified files, diff of classified files)
+        """
+        sections = _split_diff(diff)
+        self._load_rules(
+            filename
+            for filename, _ in sections
+            if filename
+        )
+
+        unclassified = []
+        classified = []
+        for filename, section in sections:
+            classification = filename and self.classify(filename, section)
+            if not classification:
+                unclassified.append(section)
+                continue
+
+            self.classified[filename] = classification
+            self.classified_bytes += len(section)
+            classified.append(section)
+
+        return ''.join(unclassified), ''.join(classified)
+
+    def classify(self, filename, diff):
+        """
+        :type filename: str
+
+        :type diff: str
+        :param diff: of this file.
+
+        :rtype: str|None
+        :returns: GENERATED, VENDORED or MINIFIED, if classified.
+        """
+        attributes = self._get_attributes(filename)
+        for attribute, classification in ATTRIBUTES.items():
+            if attributes.get(attribute):
+                return classification
+
+        # Attributes that are explicitly unset override the heuristics.
+        if 'linguist-vendored' not in attributes and VENDORED_PATHS.search(filename):
+            return VENDORED
+
+        if 'linguist-generated' not in attributes:
+            if GENERATED_PATHS.search(filename):
+                return GENERATED
+
+            if MINIFIED_PATHS.search(filename):
+                return MINIFIED
+
+        for line in diff.splitlines():
+            if line.startswith('+') and len(line) > self.max_line_length + 1:
+                return MINIFIED
+
+        return None
+
+    @property
+    def seconds_saved(self):
+        """
+        :rtype: float|None
+        :returns: estimate of how much longer classified files would have
+            taken to scan with all plugins, if known.
+        """
+        if not self.scanned_bytes:
+            return None
+
+        return max(
+            self.classified_bytes * self.scan_seconds / self.scanned_bytes
+            - self.classified_seconds,
+            0,
+        )
+
+    def _get_attributes(self, filename):
+        """
+        :type filename: str
+        :rtype: dict
+        :returns: mapping of attribute to whether it's set for filename.
+            Unspecified attributes are omitted.
+        """
+        attributes = {}
+
+        # Deeper .gitattributes files, and later lines, take precedence.
+        for directory in _get_directories(filename):
+            for regex, values in self._rules.get(directory, ()):
+                if not regex.match(filename):
+                    continue
+
+                for attribute, value in values.items():
+                    if value is None:
+                        attributes.pop(attribute, None)
+                    else:
+                        attributes[attribute] = value
+
+        return attributes
+
+    def _load_rules(self, filenames):
+        """
+        :type filenames: iterable(str)
+        """
+        directories = sorted(set(
+            directory
+            for filename in filenames
+            for directory in _get_directories(filename)
+            if directory not in self._rules
+        ))
+        if not directories:
+            return
+
+        contents = self.get_attributes_files(directories)
+        for directory in directories:
+            self._rules[directory] = _parse_attributes(
+                contents.get(directory, ''),
+                directory,
+            )
+
+
+def _split_diff(diff):
+    """
+    :type diff: str
+    :rtype: list(tuple(str|None, str))
+    :returns: (filename, diff) for each file in diff, if its new name is known.
+    """
+    sections = []
+    lines = []
+    for line in diff.splitlines(True):
+        if line.startswith('diff --git ') and lines:
+            sections.append(lines)
+            lines = []
+
+        lines.append(line)
+
+    if lines:
+        sections.append(lines)
+
+    output = []
+    for lines in sections:
+        filename = None
+        for line in lines:
+            if line.startswith('@@'):
+                break
+
+            if line.startswith('+++ b/'):
+                filename = line[len('+++ b/'):].rstrip('\n')
+
+        output.append((filename, ''.join(lines)))
+
+    return output
+
+
+def _get_directories(filename):
+    """
+    :type filename: str
+    :rtype: list(str)
+    :returns: directories containing filename, from the root of the
+        repository ('') down.
+    """
+    directories = ['']
+    parts = filename.split('/')[:-1]
+    for index in range(1, len(parts) + 1):
+        directories.append('/'.join(parts[:index]))
+
+    return directories
+
+
+def _parse_attributes(contents, directory):
+    """
+    :type contents: str
+    :param contents: of a .gitattributes file.
+
+    :type directory: str
+    :param directory: that the .gitattributes file is in.
+
+    :rtype: list(tuple(re.Pattern, dict))
+    :returns: (regex matching filenames, mapping of attribute to value) for
+        each line that sets a linguist attribute. Values are None, if the
+        attribute is unspecified.
+    """
+    rules = []
+    for line in contents.splitlines():
+        tokens = line.split()
+        if not tokens or tokens[0].startswith('#'):
+            continue
+
+        values = {}
+        for token in tokens[1:]:
+            if token[0] in '-!':
+                name, value = token[1:], (False if token[0] == '-' else None)
+            else:
+                name, _, value = token.partition('=')
+                value = value.lower() not in ('false', '0')
+
+            if name in ATTRIBUTES:
+                values[name] = value
+
+        # Patterns that match directories don't apply to the files in them.
+        if values and not tokens[0].endswith('/'):
+            rules.append((_compile_pattern(tokens[0], directory), values))
+
+    return rules
+
+
+def _compile_pattern(pattern, directory):
+    """Patterns follow the same rules as .gitignore files.
+
+    :type pattern: str
+    :type directory: str
+    :rtype: re.Pattern
+    """
+    prefix = re.escape(directory + '/') if directory else ''
+    if '/' not in pattern:
+        # Matches files with this name, in any subdirectory.
+        prefix += '(?:.*/)?'
+
+    return re.compile(prefix + _translate(pattern.lstrip('/')) + '$')
+
+
+def _translate(pattern):
+    """
+    :type pattern: str
+    :rtype: str
+    """
+    output = ''
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith('**/', index):
+            output += '(?:.*/)?'
+            index += 3
+        elif pattern.startswith('**', index):
+            output += '.*'
+            index += 2
+        elif pattern[index] == '*':
+            output += '[^/]*'
+            index += 1
+        elif pattern[index] == '?':
+            output += '[^/]'
+            index += 1
+        elif pattern[index] == '[' and ']' in pattern[index + 2:]:
+            end = pattern.index(']', index + 2)
+            characters = pattern[index + 1:end]
+            if characters[0] == '!':
+                characters = '^' + characters[1:]
+
+            output += '[' + characters.replace('\\', '\\\\') + ']'
+            index = end + 1
+        else:
+            output += re.escape(pattern[index])
+            index += 1
+
+    return output
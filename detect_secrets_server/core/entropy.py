@@ -0,0 +1,270 @@
+"""High entropy string plugins compute the Shannon entropy of every quoted
+string, one character of their charset at a time, in pure Python. On minified
+code, or data heavy diffs, this dominates scan time.
+
+Instead, the candidate strings of a whole diff (which may span many files) are
+gathered up front, and scored in a single batch: with a byte histogram in
+numpy, if it's installed, or a character count otherwise. Plugins are then only
+given lines with a candidate over their limit, and only calculate entropy
+themselves for those candidates. Their own logic decides what to report, so
+this never changes what is found.
+"""
+import functools
+import math
+from collections import Counter
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# Plugins whose entropy never exceeds the Shannon entropy of the candidate
+# (the hex plugin lowers it, for strings of digits).
+SCORED_PLUGINS = (
+    'Base64HighEntropyString',
+    'HexHighEntropyString',
+)
+
+# Scores are summed in a different order than the plugins', so candidates
+# this close to the limit are left for the plugins to decide.
+TOLERANCE = 1e-9
+
+# Number of candidates to score at a time, to bound numpy's memory usage
+# (a histogram of 256 counts for each).
+NUMPY_BATCH_SIZE = 4096
+
+
+class EntropyScorer(object):
+
+    def __init__(self, regexes, use_numpy=True):
+        """
+        :type regexes: iterable(re.Pattern)
+        :param regexes: that plugins find candidate strings with.
+
+        :type use_numpy: bool
+        :param use_numpy: if False, or numpy isn't installed, candidates are
+            scored in pure Python.
+        """
+        self.regexes = tuple(set(regexes))
+        self.use_numpy = use_numpy and numpy is not None
+
+        # Scores of the candidates in the current diff.
+        self._scores = {}
+
+    def add_diff(self, diff):
+        """Scores every candidate string on the lines added by diff, in a
+        single batch.
+
+        :type diff: str
+        """
+        candidates = set()
+        for line in diff.splitlines():
+            if not line.startswith('+') or line.startswith('+++'):
+                continue
+
+            for regex in self.regexes:
+                candidates.update(_get_candidates(regex, line[1:]))
+
+        # Only the current diff is remembered, to bound memory usage.
+        self._scores = {}
+        self._score(candidates)
+
+    def get_score(self, candidate):
+        """
+        :type candidate: str
+        :rtype: float
+        :returns: Shannon entropy of candidate.
+        """
+        try:
+            return self._scores[candidate]
+        except KeyError:
+            # e.g. lines that weren't in the last diff.
+            return _calculate_entropy(candidate)
+
+    def get_entropy(self, candidate, limit, calculate_entropy):
+        """
+        :type candidate: str
+        :type limit: float
+
+        :type calculate_entropy: function
+        :param calculate_entropy: the plugin's own calculation, which is only
+            used for candidates that may be over limit.
+
+        :rtype: float
+        """
+        score = self.get_score(candidate)
+        if score <= limit - TOLERANCE:
+            return score
+
+        return calculate_entropy(candidate)
+
+    def has_candidate(self, regex, line, limit):
+        """
+        :type regex: re.Pattern
+        :type line: str
+        :type limit: float
+
+        :rtype: bool
+        :returns: True, if line has a candidate string (found with regex)
+            that may have an entropy over limit.
+        """
+        limit -= TOLERANCE
+        return any(
+            self.get_score(candidate) > limit
+            for candidate in _get_candidates(regex, line)
+        )
+
+    def _score(self, candidates):
+        """
+        :type candidates: set(str)
+        """
+        if not self.use_numpy:
+            for candidate in candidates:
+                self._scores[candidate] = _calculate_entropy(candidate)
+
+            return
+
+        candidates = sorted(candidates)
+        for index in range(0, len(candidates), NUMPY_BATCH_SIZE):
+            batch = candidates[index:index + NUMPY_BATCH_SIZE]
+            self._scores.update(zip(batch, _calculate_entropies(batch)))
+
+
+class EntropyFilteredPlugin(object):
+    """Only passes lines to the wrapped plugin if they contain a candidate
+    string over its entropy limit. Otherwise, behaves like the wrapped plugin.
+
+    The wrapped plugin uses the scores of its candidates, and only calculates
+    entropy itself for those over its limit.
+    """
+
+    def __init__(self, plugin, scorer):
+        """
+        :type plugin: detect_secrets.plugins.high_entropy_strings.HighEntropyStringsPlugin
+        :type scorer: EntropyScorer
+        """
+        self.plugin = plugin
+        self.scorer = scorer
+
+        plugin.calculate_shannon_entropy = functools.partial(
+            self._calculate_shannon_entropy,
+            plugin.calculate_shannon_entropy,
+        )
+
+    def analyze_line(self, string, line_num, filename):
+        if not self.scorer.has_candidate(
+            self.plugin.regex,
+            string,
+            self.plugin.entropy_limit,
+        ):
+            return {}
+
+        return self.plugin.analyze_line(string, line_num, filename)
+
+    def _calculate_shannon_entropy(self, calculate_entropy, data):
+        return self.scorer.get_entropy(
+            data,
+            self.plugin.entropy_limit,
+            calculate_entropy,
+        )
+
+    def __getattr__(self, attr):
+        return getattr(self.plugin, attr)
+
+
+def apply_entropy_filter(plugins, use_numpy=True):
+    """
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    :type use_numpy: bool
+
+    :rtype: tuple
+    :returns: plugins, with high entropy string plugins wrapped by a shared
+        scorer.
+    """
+    scored = [
+        plugin
+        for plugin in plugins
+        if plugin.__class__.__name__ in SCORED_PLUGINS
+    ]
+    if not scored:
+        return tuple(plugins)
+
+    scorer = EntropyScorer(
+        [plugin.regex for plugin in scored],
+        use_numpy=use_numpy,
+    )
+    return tuple(
+        EntropyFilteredPlugin(plugin, scorer)
+        if plugin.__class__.__name__ in SCORED_PLUGINS
+        else plugin
+        for plugin in plugins
+    )
+
+
+def score_diff(plugins, diff):
+    """Scores the candidate strings in diff, before plugins are run over it.
+
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    :type diff: str
+    """
+    # Plugins may be wrapped again, e.g. by a line memo.
+    scorers = set(
+        plugin.scorer
+        for plugin in plugins
+        if isinstance(getattr(plugin, 'scorer', None), EntropyScorer)
+    )
+    for scorer in scorers:
+        scorer.add_diff(diff)
+
+
+def _get_candidates(regex, line):
+    for result in regex.findall(line):
+        # As in HighEntropyStringsPlugin.secret_generator
+        if isinstance(result, tuple):
+            result = result[1]
+
+        yield result
+
+
+def _calculate_entropy(data):
+    """
+    :type data: str
+    :rtype: float
+    """
+    length = float(len(data))
+    entropy = 0
+    for count in Counter(data).values():
+        p_x = count / length
+        entropy -= p_x * math.log(p_x, 2)
+
+    return entropy
+
+
+def _calculate_entropies(batch):
+    """
+    :type batch: list(str)
+    :param batch: candidate strings, which only contain ASCII characters.
+
+    :rtype: list(float)
+    """
+    encoded = [candidate.encode('ascii') for candidate in batch]
+    lengths = numpy.array([len(value) for value in encoded], dtype=numpy.int64)
+    characters = numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8)
+
+    # A histogram of the characters in each candidate, as one row each.
+    rows = numpy.repeat(numpy.arange(len(batch)), lengths)
+    counts = numpy.bincount(
+        rows * 256 + characters,
+        minlength=len(batch) * 256,
+    )
+
+    present = numpy.flatnonzero(counts)
+    rows = present // 256
+    p_x = counts[present] / lengths[rows]
+
+    return numpy.bincount(
+        rows,
+        weights=-p_x * numpy.log2(p_x),
+        minlength=len(batch),
+    ).tolist()
@@ -0,0 +1,331 @@
+"""A single pathological line (e.g. hundreds of kilobytes of minified code)
+can make a plugin's regex, or the exclude lines regex, backtrack for minutes,
+and stall the scan of a whole repository (or a worker, when serving).
+
+Both guards are opt-in. Lines longer than a cap are truncated before plugins
+see them (and recorded, since secrets past the cap are missed), and plugins
+are given a wall-clock budget for each file. Once a file exceeds it, the rest
+of the file is skipped, and the file, plugin and regex responsible are
+recorded.
+
+When scanning in the main thread, regexes are interrupted as soon as the
+budget runs out. Signals can only be handled by the main thread, so other
+threads check the budget after each line instead. This can't stop a
+pathological regex, so `serve` (which scans in worker threads) doesn't
+support a time budget.
+"""
+import linecache
+import re
+import signal
+import threading
+import time
+import traceback
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+# re.Pattern isn't available in older versions of python.
+PATTERN_TYPE = type(re.compile(''))
+
+HUNK_HEADER_REGEX = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)')
+
+
+class Overrun(namedtuple(
+    'Overrun',
+    [
+        'filename',
+        'plugin',
+        'regex',
+        'line_number',
+    ]
+)):
+    """A file that exceeded its time budget.
+
+    :type filename: str
+
+    :type plugin: str
+    :param plugin: classname of the plugin that was running.
+
+    :type regex: str|None
+    :param regex: pattern of the regex that was running, if known.
+
+    :type line_number: int
+    :param line_number: of the line that was being scanned.
+    """
+    pass
+
+
+class BudgetExceeded(Exception):
+    """Raised to interrupt a plugin, once its file's budget runs out."""
+    pass
+
+
+class ScanGuard(object):
+
+    def __init__(self, line_length_cap=None, file_time_budget=None):
+        """
+        :type line_length_cap: int|None
+        :param line_length_cap: lines longer than this (in characters) are
+            truncated. If None, lines are never truncated.
+
+        :type file_time_budget: float|None
+        :param file_time_budget: in seconds. If None, files aren't limited.
+        """
+        self.line_length_cap = line_length_cap
+        self.file_time_budget = file_time_budget
+
+        # (filename, line number) of each line that was truncated.
+        self.truncated_lines = []
+        self.overruns = []
+
+        self._long_line_regex = None
+        if line_length_cap:
+            # Diff lines are prefixed by one character (e.g. `+`).
+            self._long_line_regex = re.compile(
+                r'^[^\n]{%d}' % (line_length_cap + 2),
+                re.MULTILINE,
+            )
+
+        # Whether plugins can be interrupted, and are currently running.
+        # See enforce_time_budget.
+        self.interruptible = False
+        self.armed = False
+
+        self.reset()
+
+    def truncate_lines(self, diff):
+        """
+        :type diff: str
+        :rtype: str
+        """
+        if not self._long_line_regex or not self._long_line_regex.search(diff):
+            return diff
+
+        lines = diff.split('\n')
+        filename = None
+        line_number = 0
+        in_hunk = False
+        for index, line in enumerate(lines):
+            if line.startswith('diff '):
+                in_hunk = False
+                continue
+
+            if line.startswith('@@ '):
+                in_hunk = True
+                line_number = int(HUNK_HEADER_REGEX.match(line).group(1)) - 1
+                continue
+
+            if not in_hunk:
+                # The headers of each file are left alone.
+                if line.startswith('+++ '):
+                    filename = line[len('+++ b/'):]
+
+                continue
+
+            if line.startswith(('+', ' ')):
+                line_number += 1
+
+            # Plugins only see added lines.
+            if line.startswith('+') and len(line) > self.line_length_cap + 1:
+                lines[index] = line[:self.line_length_cap + 1]
+                self.truncated_lines.append((filename, line_number))
+
+        return '\n'.join(lines)
+
+    def analyze_line(self, plugin, string, line_num, filename):
+        """
+        :type plugin: detect_secrets.plugins.base.BasePlugin
+        :type string: str
+        :type line_num: int
+        :type filename: str
+
+        :rtype: dict
+        """
+        if filename != self._filename:
+            self._filename = filename
+            self._elapsed = 0
+            self._exceeded = False
+
+        if self._exceeded:
+            return {}
+
+        start = time.time()
+        try:
+            try:
+                if self.interruptible:
+                    self.armed = True
+                    signal.setitimer(
+                        signal.ITIMER_REAL,
+                        max(self.file_time_budget - self._elapsed, 1e-3),
+                    )
+
+                return plugin.analyze_line(string, line_num, filename)
+            finally:
+                if self.interruptible:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                    self.armed = False
+
+                self._elapsed += time.time() - start
+        except BudgetExceeded as e:
+            self._exceed(plugin, line_num, _find_regex(e.__traceback__))
+            return {}
+        finally:
+            if not self._exceeded and self._elapsed > self.file_time_budget:
+                self._exceed(plugin, line_num)
+
+    def reset(self):
+        # Files are scanned by each plugin in turn, so we keep track of how
+        # long the current file has taken.
+        self._filename = None
+        self._elapsed = 0
+        self._exceeded = False
+
+    def _exceed(self, plugin, line_num, regex=None):
+        self._exceeded = True
+        self.overruns.append(
+            Overrun(
+                filename=self._filename,
+                plugin=_get_plugin_name(plugin),
+                regex=regex,
+                line_number=line_num,
+            ),
+        )
+
+        # Other plugins won't see the rest of the file, so lines that
+        # plugins have found nothing on so far can't be remembered as clean.
+        recorder = getattr(plugin, 'recorder', None)
+        if recorder is not None:
+            recorder.reset()
+
+
+class GuardedPlugin(object):
+    """Skips the rest of each file, once it exceeds its time budget.
+    Otherwise, behaves like the wrapped plugin.
+    """
+
+    def __init__(self, plugin, guard):
+        """
+        :type plugin: detect_secrets.plugins.base.BasePlugin
+        :type guard: ScanGuard
+        """
+        self.plugin = plugin
+        self.guard = guard
+
+    def analyze_line(self, string, line_num, filename):
+        return self.guard.analyze_line(self.plugin, string, line_num, filename)
+
+    def __getattr__(self, attr):
+        return getattr(self.plugin, attr)
+
+
+def apply_scan_guard(plugins, guard):
+    """
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    :type guard: ScanGuard|None
+
+    :rtype: tuple
+    :returns: plugins, wrapped by guard, if it has a time budget.
+    """
+    if guard is None or not guard.file_time_budget:
+        return tuple(plugins)
+
+    return tuple(
+        GuardedPlugin(plugin, guard)
+        for plugin in plugins
+    )
+
+
+@contextmanager
+def enforce_time_budget(plugins):
+    """Within this context, plugins are interrupted once their file's budget
+    runs out, if possible.
+
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    """
+    guards = set(
+        plugin.guard
+        for plugin in plugins
+        if isinstance(plugin, GuardedPlugin)
+    )
+    for guard in guards:
+        guard.reset()
+
+    if not guards or not _can_interrupt():
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        # The alarm may go off just after a plugin finishes, in which case
+        # it's ignored.
+        if any(guard.armed for guard in guards):
+            raise BudgetExceeded
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    for guard in guards:
+        guard.interruptible = True
+
+    try:
+        yield
+    finally:
+        for guard in guards:
+            guard.interruptible = False
+
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _can_interrupt():
+    return (
+        hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+def _get_plugin_name(plugin):
+    """
+    :type plugin: detect_secrets.plugins.base.BasePlugin
+    :rtype: str
+    """
+    # Unwraps PrefilteredPlugin, MemoizedPlugin, etc.
+    while 'plugin' in vars(plugin):
+        plugin = plugin.plugin
+
+    return plugin.__class__.__name__
+
+
+def _find_regex(tb):
+    """Plugins run each regex on its own line, so the regex that was
+    interrupted is found by looking for a compiled regex that's used on the
+    line that was running.
+
+    :type tb: traceback
+    :param tb: of BudgetExceeded.
+
+    :rtype: str|None
+    :returns: the pattern of the regex that was running, if found.
+    """
+    frames = [
+        (frame, line_number)
+        for frame, line_number in traceback.walk_tb(tb)
+        if frame.f_globals.get('__name__') != __name__
+    ]
+    if not frames:
+        return None
+
+    frame, line_number = frames[-1]
+    line = linecache.getline(frame.f_code.co_filename, line_number)
+
+    candidates = dict(frame.f_globals)
+    candidates.update(frame.f_locals)
+    if 'self' in frame.f_locals:
+        for name in re.findall(r'\bself\.(\w+)', line):
+            candidates['self.' + name] = getattr(frame.f_locals['self'], name, None)
+
+    for name, value in candidates.items():
+        if (
+            isinstance(value, PATTERN_TYPE)
+            and re.search(r'(?<![\w.])' + re.escape(name) + r'\.\w+\(', line)
+        ):
+            return value.pattern
+
+    return None
@@ -0,0 +1,296 @@
+"""Vendored dependencies, license headers and generated code mean that the
+exact same lines are added to many files, across many repositories.
+
+Lines that plugins found no secrets on are remembered (as a hash of the line,
+the plugins' configuration and the file's type, which plugins depend on), in
+a bounded memo, so that plugins skip them when they're added again. The memo
+can be saved to a file, to share it between scans, and is shared between the
+concurrent scans of `serve`.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import detect_secrets
+from detect_secrets.plugins.common.filetype import determine_file_type
+
+import detect_secrets_server
+
+
+DEFAULT_MAX_SIZE = 100000
+
+# Size of each key, in bytes.
+KEY_SIZE = 16
+
+
+class LineMemo(object):
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, filename=None):
+        """
+        :type max_size: int
+        :param max_size: number of lines to remember. The least recently
+            used are forgotten first.
+
+        :type filename: str|None
+        :param filename: if provided, the memo is loaded from (and saved to)
+            this file.
+        """
+        self.max_size = max_size
+        self.filename = filename
+
+        # Keys of clean lines, least recently used first.
+        self._clean = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Each scan runs in a single thread, so counting lookups per thread
+        # lets concurrent scans report their own hit rates.
+        self._counts = threading.local()
+
+    @property
+    def hits(self):
+        """
+        :rtype: int
+        :returns: lookups of clean lines, by the current thread.
+        """
+        return getattr(self._counts, 'hits', 0)
+
+    @property
+    def misses(self):
+        """
+        :rtype: int
+        :returns: lookups of unknown lines, by the current thread.
+        """
+        return getattr(self._counts, 'misses', 0)
+
+    def is_clean(self, key):
+        """
+        :type key: bytes
+        :rtype: bool
+        """
+        with self._lock:
+            is_clean = key in self._clean
+            if is_clean:
+                self._clean.move_to_end(key)
+
+        if is_clean:
+            self._counts.hits = self.hits + 1
+        else:
+            self._counts.misses = self.misses + 1
+
+        return is_clean
+
+    def add_clean(self, key):
+        """
+        :type key: bytes
+        """
+        with self._lock:
+            self._clean[key] = None
+            self._clean.move_to_end(key)
+            while len(self._clean) > self.max_size:
+                self._clean.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """
+        :rtype: float|None
+        :returns: of the current thread's lookups.
+        """
+        if not (self.hits or self.misses):
+            return None
+
+        return self.hits / float(self.hits + self.misses)
+
+    def load(self):
+        if not self.filename or not os.path.isfile(self.filename):
+            return
+
+        with open(self.filename, 'rb') as f:
+            data = f.read()
+
+        end = len(data) - len(data) % KEY_SIZE
+        with self._lock:
+            for index in range(max(end - self.max_size * KEY_SIZE, 0), end, KEY_SIZE):
+                self._clean[data[index:index + KEY_SIZE]] = None
+
+    def save(self):
+        if not self.filename:
+            return
+
+        # Written atomically, so that concurrent scans don't load a partial memo.
+        temp_filename = '{}.{}.tmp'.format(self.filename, os.getpid())
+        with self._lock:
+            with open(temp_filename, 'wb') as f:
+                f.write(b''.join(self._clean))
+
+            os.rename(temp_filename, self.filename)
+
+
+class LineRecorder(object):
+    """Remembers the lines that a set of plugins found no secrets on."""
+
+    def __init__(self, memo, plugins_hash):
+        """
+        :type memo: LineMemo
+
+        :type plugins_hash: str
+        :param plugins_hash: see get_plugins_hash.
+        """
+        self.memo = memo
+        self.plugins_hash = plugins_hash
+
+        # Plugins are run over each file in turn, so we remember the key of
+        # each line in the current file (or None, if it's known to be clean).
+        self._filename = None
+        self._filetype = None
+        self._keys = {}
+
+        self._scanned = set()
+        self._found = set()
+
+    def get_key(self, line, filename):
+        """
+        :type line: str
+        :type filename: str
+
+        :rtype: bytes|None
+        :returns: None, if plugins are known to find no secrets on line.
+        """
+        if filename != self._filename:
+            self._filename = filename
+            self._filetype = determine_file_type(filename).name
+            self._keys = {}
+
+        try:
+            return self._keys[line]
+        except KeyError:
+            pass
+
+        key = hashlib.blake2b(
+            '\0'.join((self.plugins_hash, self._filetype, line)).encode('utf-8'),
+            digest_size=KEY_SIZE,
+        ).digest()
+        if self.memo.is_clean(key):
+            key = None
+        else:
+            self._scanned.add(key)
+
+        self._keys[line] = key
+        return key
+
+    def add_found(self, key):
+        """
+        :type key: bytes
+        """
+        self._found.add(key)
+
+    def record(self):
+        """Remembers the lines scanned since the last call, that no plugin
+        found secrets on. This should only be called once every plugin has
+        been run over them.
+        """
+        for key in self._scanned - self._found:
+            self.memo.add_clean(key)
+
+        self.reset()
+
+    def reset(self):
+        self._scanned = set()
+        self._found = set()
+
+        # Lines in the current file may now be known to be clean.
+        self._filename = None
+
+
+class MemoizedPlugin(object):
+    """Skips lines that are known to be clean. Otherwise, behaves like the
+    wrapped plugin.
+    """
+
+    def __init__(self, plugin, recorder):
+        """
+        :type plugin: detect_secrets.plugins.base.BasePlugin
+        :type recorder: LineRecorder
+        """
+        self.plugin = plugin
+        self.recorder = recorder
+
+    def analyze_line(self, string, line_num, filename):
+        key = self.recorder.get_key(string, filename)
+        if key is None:
+            return {}
+
+        output = self.plugin.analyze_line(string, line_num, filename)
+        if output:
+            self.recorder.add_found(key)
+
+        return output
+
+    def __getattr__(self, attr):
+        return getattr(self.plugin, attr)
+
+
+def get_plugins_hash(plugin_config, exclude_lines_regex=None):
+    """
+    :type plugin_config: dict
+    :param plugin_config: as in BaseTrackedRepo.plugin_config
+
+    :type exclude_lines_regex: str|None
+
+    :rtype: str
+    :returns: identifies what plugins find. This includes the versions of
+        detect-secrets (and this package), since plugins change between them.
+    """
+    return hashlib.sha256(
+        json.dumps(
+            [
+                detect_secrets.VERSION,
+                detect_secrets_server.__version__,
+                plugin_config,
+                exclude_lines_regex,
+            ],
+            sort_keys=True,
+        ).encode('utf-8'),
+    ).hexdigest()
+
+
+def apply_line_memo(plugins, memo, plugins_hash):
+    """
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    :type memo: LineMemo|None
+    :type plugins_hash: str
+
+    :rtype: tuple
+    :returns: plugins, wrapped by a shared recorder.
+    """
+    if memo is None or not plugins:
+        return tuple(plugins)
+
+    recorder = LineRecorder(memo, plugins_hash)
+    return tuple(
+        MemoizedPlugin(plugin, recorder)
+        for plugin in plugins
+    )
+
+
+@contextmanager
+def record_lines(plugins):
+    """Remembers the lines that plugins found no secrets on, once they have
+    all been run over them, within this context.
+
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    """
+    recorders = set(
+        plugin.recorder
+        for plugin in plugins
+        if isinstance(plugin, MemoizedPlugin)
+    )
+    for recorder in recorders:
+        recorder.reset()
+
+    yield
+
+    for recorder in recorders:
+        recorder.record()
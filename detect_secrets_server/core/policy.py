@@ -0,0 +1,163 @@
+"""Activity-adaptive scan scheduling.
+
+Static crontabs waste scans on dormant repositories, and under-scan busy ones.
+Instead, this derives each repository's scan interval from how often commits
+arrive (as recorded by `scan --record-activity`), within configured bounds, and
+backs off all repositories proportionally if the total scanning cost would
+exceed a CPU budget.
+"""
+import math
+from datetime import timedelta
+
+from detect_secrets.core.log import log
+
+
+# Weight given to the latest sample, when updating moving averages.
+MOVING_AVERAGE_WEIGHT = 0.3
+
+
+class IntervalSchedule(object):
+    """Runs every `interval` seconds. Shares its interface with CronSchedule."""
+
+    def __init__(self, interval):
+        """
+        :type interval: int
+        :param interval: seconds
+        """
+        self.interval = interval
+        self.expression = 'every {}s'.format(interval)
+
+    def __repr__(self):
+        return 'IntervalSchedule({})'.format(self.interval)
+
+    def get_next_run(self, after):
+        """
+        :type after: datetime.datetime
+        :rtype: datetime.datetime
+        """
+        return after + timedelta(seconds=self.interval)
+
+
+class AdaptivePolicy(object):
+
+    def __init__(
+        self,
+        min_interval,
+        max_interval,
+        cpu_budget=None,
+        commits_per_scan=1,
+    ):
+        """
+        :type min_interval: int
+        :param min_interval: seconds; repositories are never scanned more
+            often than this.
+
+        :type max_interval: int
+        :param max_interval: seconds; repositories are always scanned at least
+            this often.
+
+        :type cpu_budget: float|None
+        :param cpu_budget: maximum average number of CPU cores spent scanning.
+
+        :type commits_per_scan: float
+        :param commits_per_scan: the number of new commits we aim to find,
+            on average, with each scan.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.cpu_budget = cpu_budget
+        self.commits_per_scan = commits_per_scan
+
+    def get_interval(self, activity, scale=1):
+        """
+        :type activity: dict|None
+        :param activity: as recorded by BaseTrackedRepo.record_activity
+
+        :type scale: float
+        :param scale: multiplier applied to the ideal interval.
+
+        :rtype: int|None
+        :returns: seconds between scans, or None if there isn't enough
+            activity recorded to decide.
+        """
+        rate = (activity or {}).get('commit_rate')
+        if rate is None:
+            return None
+
+        if rate <= 0:
+            return self.max_interval
+
+        # The rate is recorded per hour.
+        return self._quantize(self.commits_per_scan / rate * 3600 * scale)
+
+    def get_intervals(self, activities):
+        """Like get_interval, but backs off all repositories if their
+        combined cost exceeds the CPU budget.
+
+        :type activities: list(dict|None)
+        :rtype: list(int|None)
+        """
+        intervals = [self.get_interval(activity) for activity in activities]
+        if not self.cpu_budget:
+            return intervals
+
+        demand = get_cpu_demand(activities, intervals)
+        if demand <= self.cpu_budget:
+            return intervals
+
+        scale = demand / self.cpu_budget
+        intervals = [
+            self.get_interval(activity, scale=scale)
+            for activity in activities
+        ]
+
+        demand = get_cpu_demand(activities, intervals)
+        if demand > self.cpu_budget:
+            log.warning(
+                'Unable to scan within a CPU budget of %s (needs %.2f), even at '
+                'the maximum interval.',
+                self.cpu_budget,
+                demand,
+            )
+
+        return intervals
+
+    def _quantize(self, interval):
+        """Intervals are rounded up to a power of two multiple of the minimum
+        interval, so that small fluctuations in activity don't constantly
+        reschedule repositories.
+        """
+        if interval <= self.min_interval:
+            return self.min_interval
+
+        exponent = math.ceil(math.log(interval / float(self.min_interval), 2))
+        return int(min(self.min_interval * 2 ** exponent, self.max_interval))
+
+
+def get_cpu_demand(activities, intervals):
+    """
+    :rtype: float
+    :returns: average number of CPU cores needed, to scan at these intervals.
+    """
+    return sum(
+        activity.get('scan_seconds', 0) / float(interval)
+        for activity, interval in zip(activities, intervals)
+        if activity and interval
+    )
+
+
+def get_moving_average(average, sample):
+    """
+    :type average: float|None
+    :param average: None, if there are no previous samples.
+
+    :type sample: float
+    :rtype: float
+    """
+    if average is None:
+        return round(sample, 4)
+
+    return round(
+        MOVING_AVERAGE_WEIGHT * sample + (1 - MOVING_AVERAGE_WEIGHT) * average,
+        4,
+    )
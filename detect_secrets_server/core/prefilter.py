@@ -0,0 +1,166 @@
+"""Most added lines contain none of the tokens that regex based plugins look
+for, yet each plugin checks every line against its allowlist, and its own
+regexes, in turn.
+
+Instead, each plugin's anchors (literals that every secret it finds must
+contain) are combined into a single regex, which is run once per line. Plugins
+are only given the lines with a hit for one of their anchors. Anchors are
+matched against the same text, with the same flags, as the plugin's own
+regexes, so this never changes what is found.
+
+Plugins without anchors (e.g. high entropy strings, which look for any
+random looking string) are given every line, as before.
+"""
+import re
+
+from detect_secrets.plugins.keyword import DENYLIST
+
+
+# Text that each plugin's regexes are matched against.
+ORIGINAL = 'original'
+LOWERCASE = 'lowercase'
+
+# Mapping of plugin classname to (text, flags, anchors).
+ANCHORS = {
+    'AWSKeyDetector': (ORIGINAL, 0, ('AKIA',)),
+    'BasicAuthDetector': (ORIGINAL, 0, ('://',)),
+    'IbmCosHmacDetector': (ORIGINAL, re.IGNORECASE, ('secret',)),
+    'JwtTokenDetector': (ORIGINAL, 0, ('eyJ',)),
+    'KeywordDetector': (LOWERCASE, 0, DENYLIST),
+    'MailchimpDetector': (ORIGINAL, 0, ('-us',)),
+    'PrivateKeyDetector': (ORIGINAL, 0, ('BEGIN', 'PuTTY-User-Key-File-')),
+    'SlackDetector': (ORIGINAL, re.IGNORECASE, ('xox', 'slack')),
+    'StripeDetector': (ORIGINAL, 0, ('k_live_',)),
+}
+
+
+class Prefilter(object):
+
+    def __init__(self, anchors):
+        """
+        :type anchors: dict
+        :param anchors: mapping of plugin classname to (text, flags, anchors),
+            as in ANCHORS.
+        """
+        # Anchors matched against the same text, with the same flags, are
+        # combined, so that most lines only need a single search for each.
+        groups = {}
+        for name, (text, flags, literals) in anchors.items():
+            groups.setdefault((text, flags), {})[name] = _compile(literals, flags)
+
+        self.groups = [
+            (
+                text,
+                _compile(
+                    sorted(set(
+                        literal
+                        for name in plugins
+                        for literal in anchors[name][2]
+                    )),
+                    flags,
+                ),
+                sorted(plugins.items()),
+            )
+            for (text, flags), plugins in sorted(groups.items())
+        ]
+
+        # Plugins are run over each file in turn, so we remember which
+        # plugins each line of the current file is relevant to.
+        self._filename = None
+        self._hits = {}
+
+    def get_hits(self, line, filename):
+        """
+        :type line: str
+        :type filename: str
+
+        :rtype: frozenset(str)
+        :returns: classnames of plugins with anchors in line.
+        """
+        if filename != self._filename:
+            self._filename = filename
+            self._hits = {}
+
+        try:
+            return self._hits[line]
+        except KeyError:
+            pass
+
+        hits = set()
+        lowered = None
+        for text, combined, plugins in self.groups:
+            if text == LOWERCASE:
+                if lowered is None:
+                    lowered = line.lower()
+
+                content = lowered
+            else:
+                content = line
+
+            if not combined.search(content):
+                continue
+
+            for name, regex in plugins:
+                if regex.search(content):
+                    hits.add(name)
+
+        hits = frozenset(hits)
+        self._hits[line] = hits
+        return hits
+
+
+class PrefilteredPlugin(object):
+    """Only passes lines to the wrapped plugin if they contain one of its
+    anchors. Otherwise, behaves like the wrapped plugin.
+    """
+
+    def __init__(self, plugin, prefilter):
+        """
+        :type plugin: detect_secrets.plugins.base.BasePlugin
+        :type prefilter: Prefilter
+        """
+        self.plugin = plugin
+        self.prefilter = prefilter
+        self.name = plugin.__class__.__name__
+
+    def analyze_line(self, string, line_num, filename):
+        if self.name not in self.prefilter.get_hits(string, filename):
+            return {}
+
+        return self.plugin.analyze_line(string, line_num, filename)
+
+    def __getattr__(self, attr):
+        return getattr(self.plugin, attr)
+
+
+def apply_prefilter(plugins, anchors=ANCHORS):
+    """
+    :type plugins: tuple(detect_secrets.plugins.base.BasePlugin)
+    :type anchors: dict
+
+    :rtype: tuple
+    :returns: plugins, with those that have anchors wrapped by a shared
+        prefilter.
+    """
+    anchors = {
+        plugin.__class__.__name__: anchors[plugin.__class__.__name__]
+        for plugin in plugins
+        if plugin.__class__.__name__ in anchors
+    }
+    if not anchors:
+        return tuple(plugins)
+
+    prefilter = Prefilter(anchors)
+    return tuple(
+        PrefilteredPlugin(plugin, prefilter)
+        if plugin.__class__.__name__ in anchors
+        else plugin
+        for plugin in plugins
+    )
+
+
+def _compile(literals, flags):
+    return re.compile(
+        '|'.join(re.escape(literal) for literal in literals),
+        flags,
+    )
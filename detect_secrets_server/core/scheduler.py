@@ -0,0 +1,265 @@
+"""In-process scheduling of tracked repository scans.
+
+Rather than having cron fork a new interpreter for every scan (with hundreds
+launching at the same minute), a single long running process keeps a priority
+queue of when each repository should next be scanned, and dispatches due scans
+to a bounded pool of worker threads.
+"""
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from detect_secrets.core.log import log
+
+from .policy import IntervalSchedule
+from detect_secrets_server.util.cron import CronSchedule
+from detect_secrets_server.util.cron import spread_crontab
+
+
+class ScheduledRepo(object):
+
+    def __init__(self, metadata, is_local, schedule):
+        """
+        :type metadata: dict
+        :param metadata: tracked repository metadata, as found in storage.
+
+        :type is_local: bool
+
+        :type schedule: CronSchedule
+        """
+        self.metadata = metadata
+        self.is_local = is_local
+        self.schedule = schedule
+
+        # Incremented whenever the schedule changes, so that outdated entries
+        # in the queue can be identified (and skipped).
+        self.generation = 0
+
+    @property
+    def key(self):
+        return get_key(self.metadata, self.is_local)
+
+
+class Scheduler(object):
+
+    def __init__(
+        self,
+        list_repositories,
+        run_scan,
+        jobs=1,
+        refresh_interval=60,
+        spread=False,
+        policy=None,
+        clock=time.time,
+    ):
+        """
+        :type list_repositories: function
+        :param list_repositories: returns iterable of (metadata, is_local), for
+            all tracked repositories.
+
+        :type run_scan: function
+        :param run_scan: called with (metadata, is_local) to scan a repository.
+
+        :type jobs: int
+        :param jobs: maximum number of concurrent scans.
+
+        :type refresh_interval: int
+        :param refresh_interval: seconds between checks for newly added (or
+            removed) repositories.
+
+        :type spread: bool
+        :param spread: if True, offsets each repository's crontab within its
+            period. See detect_secrets_server.util.cron.spread_crontab
+
+        :type policy: AdaptivePolicy|None
+        :param policy: if provided, repositories with recorded activity are
+            scanned at intervals determined by this policy, rather than by
+            their crontab.
+
+        :type clock: function
+        :param clock: returns current timestamp.
+        """
+        self.list_repositories = list_repositories
+        self.run_scan = run_scan
+        self.jobs = jobs
+        self.refresh_interval = refresh_interval
+        self.spread = spread
+        self.policy = policy
+        self.clock = clock
+
+        self.repos = {}
+        self.queue = []
+
+        # Mapping of key to the latest generation scheduled. This outlives
+        # the repository being removed, so that if it's added back, entries
+        # from before it was removed are still outdated.
+        self.generations = {}
+        self.running = set()
+        self.last_refresh = None
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+
+    def refresh(self):
+        """Synchronizes scheduled repositories with storage."""
+        now = self.clock()
+        tracked = list(self.list_repositories())
+
+        intervals = [None] * len(tracked)
+        if self.policy:
+            intervals = self.policy.get_intervals([
+                metadata.get('activity')
+                for metadata, _ in tracked
+            ])
+
+        found = set()
+        for (metadata, is_local), interval in zip(tracked, intervals):
+            key = get_key(metadata, is_local)
+            found.add(key)
+
+            try:
+                schedule = self._get_schedule(metadata, interval)
+            except (KeyError, ValueError):
+                log.error('Invalid crontab for %s, skipping.', metadata.get('repo'))
+                continue
+
+            existing = self.repos.get(key)
+            if existing and existing.schedule.expression == schedule.expression:
+                # Pick up any other changes to metadata.
+                existing.metadata = metadata
+                continue
+
+            repo = ScheduledRepo(metadata, is_local, schedule)
+            if key in self.generations:
+                repo.generation = self.generations[key] + 1
+
+            self.generations[key] = repo.generation
+
+            log.info('Scheduling %s (%s)', repo.metadata['repo'], schedule.expression)
+            self.repos[key] = repo
+
+            after = now
+            if interval:
+                # Intervals are relative to the last scan, so that rescheduling
+                # doesn't postpone the next one.
+                after = min(now, metadata['activity'].get('last_scanned', now))
+
+            self._enqueue(repo, after)
+
+        for key in set(self.repos) - found:
+            log.info('No longer scheduling %s', self.repos[key].metadata['repo'])
+            del self.repos[key]
+
+        self.last_refresh = now
+
+    def run_pending(self):
+        """Dispatches due scans, while there are idle workers.
+
+        :rtype: float
+        :returns: seconds until there is something more to do.
+        """
+        now = self.clock()
+        if self.last_refresh is None or now - self.last_refresh >= self.refresh_interval:
+            try:
+                self.refresh()
+            except Exception:
+                # Storage may be temporarily unavailable. In the meantime, we
+                # continue with the repositories we already know about.
+                log.exception('Unable to refresh tracked repositories')
+                self.last_refresh = now
+
+        while self.queue and self.queue[0][0] <= now:
+            with self.lock:
+                if len(self.running) >= self.jobs:
+                    # Due scans will be dispatched, once a worker becomes idle.
+                    return self.refresh_interval
+
+            scheduled_time, key, generation = heapq.heappop(self.queue)
+            repo = self.repos.get(key)
+            if not repo or repo.generation != generation:
+                continue
+
+            # If we've fallen behind, we skip missed runs, rather than catching up.
+            self._enqueue(repo, max(scheduled_time, now))
+
+            with self.lock:
+                if key in self.running:
+                    log.warning(
+                        'Previous scan of %s has not completed, skipping.',
+                        repo.metadata['repo'],
+                    )
+                    continue
+
+                self.running.add(key)
+
+            future = self.executor.submit(self._scan, repo)
+            future.add_done_callback(lambda _, key=key: self._on_completion(key))
+
+        next_refresh = self.last_refresh + self.refresh_interval
+        if self.queue:
+            return max(0, min(self.queue[0][0], next_refresh) - now)
+
+        return max(0, next_refresh - now)
+
+    def serve(self):
+        """Runs until stop() is called, then waits for in-flight scans."""
+        log.info('Serving with %d workers', self.jobs)
+        try:
+            while not self.stopping.is_set():
+                timeout = self.run_pending()
+
+                self.wakeup.wait(timeout)
+                self.wakeup.clear()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def shutdown(self):
+        with self.lock:
+            in_flight = len(self.running)
+
+        if in_flight:
+            log.info('Waiting for %d in-flight scans to complete', in_flight)
+
+        self.executor.shutdown(wait=True)
+
+    def _get_schedule(self, metadata, interval):
+        if interval:
+            return IntervalSchedule(interval)
+
+        expression = metadata['crontab']
+        if self.spread:
+            expression = spread_crontab(expression, metadata['repo'])
+
+        return CronSchedule(expression)
+
+    def _enqueue(self, repo, after):
+        next_run = repo.schedule.get_next_run(datetime.fromtimestamp(after))
+        heapq.heappush(
+            self.queue,
+            (next_run.timestamp(), repo.key, repo.generation),
+        )
+
+    def _scan(self, repo):
+        try:
+            self.run_scan(repo.metadata, repo.is_local)
+        except (Exception, SystemExit):
+            # A failing scan should never take down the scheduler.
+            log.exception('Unable to scan %s', repo.metadata['repo'])
+
+    def _on_completion(self, key):
+        with self.lock:
+            self.running.discard(key)
+
+        self.wakeup.set()
+
+
+def get_key(metadata, is_local):
+    return (metadata['repo'], bool(is_local))
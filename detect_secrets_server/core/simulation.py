@@ -0,0 +1,159 @@
+"""Replays historical commit activity, to compare the expected load (and
+detection latency) of crontab based scheduling, against adaptive scheduling.
+"""
+import bisect
+from collections import Counter
+from datetime import datetime
+
+from .policy import get_moving_average
+
+
+# Used for repositories without any recorded scans.
+DEFAULT_SCAN_SECONDS = 1.0
+
+
+class SimulatedRepo(object):
+
+    def __init__(self, name, schedule, commit_timestamps, activity=None):
+        """
+        :type name: str
+
+        :type schedule: CronSchedule
+        :param schedule: the repository's current crontab.
+
+        :type commit_timestamps: list(int)
+        :param commit_timestamps: in ascending order.
+
+        :type activity: dict|None
+        :param activity: as recorded by BaseTrackedRepo.record_activity
+        """
+        self.name = name
+        self.schedule = schedule
+        self.commit_timestamps = commit_timestamps
+        self.scan_seconds = (activity or {}).get('scan_seconds', DEFAULT_SCAN_SECONDS)
+
+    def get_crontab_scans(self, start, end):
+        """
+        :rtype: list(float)
+        :returns: timestamps of scans.
+        """
+        output = []
+        run = self.schedule.get_next_run(datetime.fromtimestamp(start))
+        while run.timestamp() < end:
+            output.append(run.timestamp())
+            run = self.schedule.get_next_run(run)
+
+        return output
+
+    def get_adaptive_scans(self, start, end, policy, scale=1):
+        """Until the commit rate is known, the crontab is followed. Afterwards,
+        each scan updates the commit rate, and determines the next interval.
+
+        :rtype: list(float)
+        """
+        output = []
+        activity = {'scan_seconds': self.scan_seconds}
+        last_scan = None
+
+        run = self.schedule.get_next_run(datetime.fromtimestamp(start)).timestamp()
+        while run < end:
+            output.append(run)
+
+            if last_scan is not None:
+                commits = self._count_commits(last_scan, run)
+                activity['commit_rate'] = get_moving_average(
+                    activity.get('commit_rate'),
+                    commits / ((run - last_scan) / 3600.0),
+                )
+
+            last_scan = run
+            interval = policy.get_interval(activity, scale=scale)
+            if interval:
+                run += interval
+            else:
+                run = self.schedule.get_next_run(datetime.fromtimestamp(run)).timestamp()
+
+        return output
+
+    def _count_commits(self, start, end):
+        """Commits within (start, end]"""
+        return (
+            bisect.bisect_right(self.commit_timestamps, end)
+            - bisect.bisect_right(self.commit_timestamps, start)
+        )
+
+
+def simulate(repos, start, end, policy):
+    """
+    :type repos: list(SimulatedRepo)
+    :type start: float
+    :type end: float
+    :type policy: AdaptivePolicy
+
+    :rtype: dict
+    """
+    crontab_scans = [repo.get_crontab_scans(start, end) for repo in repos]
+    adaptive_scans = [repo.get_adaptive_scans(start, end, policy) for repo in repos]
+
+    if policy.cpu_budget:
+        # Mirrors AdaptivePolicy.get_intervals, by backing off proportionally.
+        demand = _get_cpu_seconds(repos, adaptive_scans) / float(end - start)
+        if demand > policy.cpu_budget:
+            adaptive_scans = [
+                repo.get_adaptive_scans(
+                    start,
+                    end,
+                    policy,
+                    scale=demand / policy.cpu_budget,
+                )
+                for repo in repos
+            ]
+
+    return {
+        'repos': len(repos),
+        'commits': sum(len(repo.commit_timestamps) for repo in repos),
+        'crontab': _get_metrics(repos, crontab_scans, start, end),
+        'adaptive': _get_metrics(repos, adaptive_scans, start, end),
+    }
+
+
+def _get_metrics(repos, scans, start, end):
+    latencies = []
+    idle_scans = 0
+    scans_per_hour = Counter()
+    for repo, timestamps in zip(repos, scans):
+        previous = start
+        for timestamp in timestamps:
+            if not repo._count_commits(previous, timestamp):
+                idle_scans += 1
+
+            scans_per_hour[int((timestamp - start) // 3600)] += 1
+            previous = timestamp
+
+        for commit in repo.commit_timestamps:
+            index = bisect.bisect_left(timestamps, commit)
+            if commit >= start and index < len(timestamps):
+                latencies.append(timestamps[index] - commit)
+
+    total_scans = sum(len(timestamps) for timestamps in scans)
+    cpu_seconds = _get_cpu_seconds(repos, scans)
+
+    return {
+        'scans': total_scans,
+        'idle_scans': idle_scans,
+        'cpu_seconds': round(cpu_seconds, 2),
+        'average_cpu_cores': round(cpu_seconds / float(end - start), 4),
+        'peak_scans_per_hour': max(scans_per_hour.values()) if scans_per_hour else 0,
+        'mean_latency_seconds': (
+            int(sum(latencies) / len(latencies))
+            if latencies else None
+        ),
+        'max_latency_seconds': int(max(latencies)) if latencies else None,
+    }
+
+
+def _get_cpu_seconds(repos, scans):
+    return sum(
+        repo.scan_seconds * len(timestamps)
+        for repo, timestamps in zip(repos, scans)
+    )
@@ -9,6 +9,7 @@ from .common.options import CommonOptions
 from .common.validators import config_file
 from .common.validators import is_git_url
 from .common.validators import is_valid_file
+from .common.validators import positive_integer
 
 
 class AddOptions(CommonOptions):
@@ -31,7 +32,9 @@ class AddOptions(CommonOptions):
         self.add_local_flag()\
             ._add_config_flag_argument()\
             ._add_initialize_options()\
-            ._add_crontab_argument()
+            ._add_crontab_argument()\
+            ._add_seed_argument()\
+            ._add_concurrency_arguments()
         PluginOptions(self.parser).add_arguments()
 
         return self
@@ -60,6 +63,44 @@ class AddOptions(CommonOptions):
 
         return self
 
+    def _add_seed_argument(self):
+        self.parser.add_argument(
+            '--seed-dir',
+            type=is_valid_file,
+            help=(
+                'Directory of git bundles, or local mirrors, to clone new '
+                'repositories from. Only changes since then are fetched from '
+                'the remote. See detect_secrets_server.storage.seed for the '
+                'expected layout.'
+            ),
+            metavar='DIR',
+        )
+
+        return self
+
+    def _add_concurrency_arguments(self):
+        self.parser.add_argument(
+            '--jobs',
+            type=positive_integer,
+            default=1,
+            help=(
+                'With --config, the number of repositories to clone concurrently. '
+                'Defaults to %(default)s.'
+            ),
+            metavar='N',
+        )
+        self.parser.add_argument(
+            '--clone-timeout',
+            type=positive_integer,
+            help=(
+                'Abort cloning a repository, if it takes longer than this many '
+                'seconds.'
+            ),
+            metavar='SECONDS',
+        )
+
+        return self
+
     def _add_initialize_options(self):
         """Users can also configure their options on the command line,
         as compared to only specifying it through a config file.
@@ -89,6 +130,32 @@ class AddOptions(CommonOptions):
             metavar='REGEX',
         )
 
+        parser.add_argument(
+            '--object-pool',
+            type=str,
+            nargs=1,
+            help=(
+                'Repositories with the same object pool name share a single '
+                'git object store, so that common history (e.g. across forks) '
+                'is only stored and fetched once.'
+            ),
+            metavar='NAME',
+        )
+
+        parser.add_argument(
+            '--ref',
+            type=_is_valid_ref_pattern,
+            action='append',
+            dest='refs',
+            help=(
+                'Also scan new commits on refs matching this pattern (e.g. '
+                '`refs/heads/*`, or `refs/pull/*/head` for GitHub pull '
+                'requests), besides the main branch. Can be specified '
+                'multiple times.'
+            ),
+            metavar='PATTERN',
+        )
+
         return self
 
     @staticmethod
@@ -133,6 +200,9 @@ def _consolidate_initialize_args(args):
     if args.crontab:
         args.crontab = args.crontab[0]
 
+    if args.object_pool:
+        args.object_pool = args.object_pool[0]
+
 
 def _consolidate_config_file_plugin_options(args):
     """
@@ -224,6 +294,15 @@ def _should_discard_tracked_repo_in_config(tracked_repo):
         return True
 
 
+def _is_valid_ref_pattern(pattern):
+    if pattern.startswith('refs/'):
+        return pattern
+
+    raise argparse.ArgumentTypeError(
+        'Ref patterns should start with `refs/`.',
+    )
+
+
 def _is_valid_crontab(crontab):
     if CronSlices.is_valid(crontab):
         return crontab
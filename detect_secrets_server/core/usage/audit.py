@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+
+from .common.options import CommonOptions
+from .common.validators import is_valid_file
+from .common.validators import positive_integer
+
+
+class AuditOptions(CommonOptions):
+    """Describes how to scan the entire history of a tracked repository."""
+
+    def __init__(self, subparser):
+        super(AuditOptions, self).__init__(subparser, 'audit')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            'repo',
+            help=(
+                'Audits an already tracked repository by specifying a git URL '
+                '(that you would `git clone`).'
+            ),
+        )
+        self.parser.add_argument(
+            '--jobs',
+            type=positive_integer,
+            default=multiprocessing.cpu_count(),
+            help=(
+                'Number of processes to scan with. Defaults to the number '
+                'of CPUs.'
+            ),
+            metavar='N',
+        )
+        self.parser.add_argument(
+            '--exclude-files',
+            type=str,
+            help=(
+                'Filenames that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+        self.parser.add_argument(
+            '--exclude-lines',
+            type=str,
+            help=(
+                'Lines that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+        self.add_local_flag()
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        CommonOptions.consolidate_args(args)
+
+        if args.local:
+            is_valid_file(args.repo)
+            args.repo = os.path.abspath(args.repo)
@@ -1,8 +1,19 @@
+import argparse
 import os
+import socket
 from abc import ABCMeta
 
 from .. import s3
 from .storage import get_storage_options
+from .validators import config_file
+from .validators import duration
+from .validators import is_valid_file
+from .validators import positive_integer
+from detect_secrets_server.core.classify import CHEAP
+from detect_secrets_server.core.classify import DEFAULT_MAX_LINE_LENGTH
+from detect_secrets_server.core.classify import SKIP
+from detect_secrets_server.core.memo import DEFAULT_MAX_SIZE
+from detect_secrets_server.util.ring import HashRing
 
 
 class CommonOptions(object):
@@ -35,6 +46,176 @@ class CommonOptions(object):
 
         return self
 
+    def add_spread_schedule_flag(self):
+        self.parser.add_argument(
+            '--spread-schedule',
+            action='store_true',
+            help=(
+                'Offset each repository\'s crontab within its period (e.g. '
+                '`0 0 * * *` becomes a different time of day for each repository), '
+                'so that scans are spread out, rather than all starting at once. '
+                'Offsets are derived from the repository name, so are stable.'
+            ),
+        )
+
+        return self
+
+    def add_lease_flag(self):
+        self.parser.add_argument(
+            '--lease-ttl',
+            type=duration,
+            help=(
+                'Lease each repository while scanning it, so that it is not '
+                'scanned concurrently by other processes (or hosts, with s3 '
+                'storage). Repositories leased by others are skipped. Leases '
+                'expire after this long (e.g. 30m, 2h), in case their owner '
+                'dies, so this should exceed the longest scan.'
+            ),
+            metavar='DURATION',
+        )
+
+        return self
+
+    def add_recover_rewrites_flag(self):
+        self.parser.add_argument(
+            '--recover-rewrites',
+            action='store_true',
+            help=(
+                'If the last scanned commit no longer exists (e.g. after a '
+                'force push), scan the commits since the most recent commit '
+                'that survived the rewrite, rather than skipping to HEAD. '
+                'This logs updates to each clone (which also keeps rewritten '
+                'commits from being pruned for a while), so it should be '
+                'enabled before history is rewritten.'
+            ),
+        )
+
+        return self
+
+    def add_per_commit_flag(self):
+        self.parser.add_argument(
+            '--per-commit',
+            action='store_true',
+            help=(
+                'Scan the changes of each new commit in turn, rather than the '
+                'overall diff since the last scan. This finds secrets that '
+                'were added, then removed, in the meantime. Progress is saved '
+                'after each commit without secrets, so interrupted scans '
+                'resume where they left off.'
+            ),
+        )
+
+        return self
+
+    def add_generated_files_flags(self):
+        self.parser.add_argument(
+            '--generated-files',
+            choices=('scan', CHEAP, SKIP),
+            default='scan',
+            help=(
+                'What to do with generated, vendored and minified files, as '
+                'marked by the `linguist-generated` or `linguist-vendored` git '
+                'attributes, or otherwise found by their paths (e.g. vendor/, '
+                '*.min.js, lockfiles) or line lengths: `scan` them as usual, '
+                'only scan them with `cheap` plugins that look for specific '
+                'kinds of keys and tokens, or `skip` them. Files that are '
+                'not fully scanned are logged. Defaults to %(default)s.'
+            ),
+        )
+        self.parser.add_argument(
+            '--max-line-length',
+            type=positive_integer,
+            default=DEFAULT_MAX_LINE_LENGTH,
+            help=(
+                'Files with added lines longer than this are considered to be '
+                'minified. Defaults to %(default)s characters.'
+            ),
+            metavar='CHARACTERS',
+        )
+
+        return self
+
+    def add_scan_guard_flags(self):
+        self.add_line_length_cap_flag()
+        self.parser.add_argument(
+            '--file-time-budget',
+            type=duration,
+            help=(
+                'Skip the rest of a file once plugins have spent this long '
+                '(e.g. 30s, 2m) on it, and log the plugin and regex '
+                'responsible. By default, files aren\'t limited.'
+            ),
+            metavar='DURATION',
+        )
+
+        return self
+
+    def add_line_length_cap_flag(self):
+        self.parser.add_argument(
+            '--line-length-cap',
+            type=positive_integer,
+            help=(
+                'Truncate lines longer than this, before plugins see them, so '
+                'that pathological lines cannot make regexes backtrack for '
+                'minutes. Secrets past the cap are missed, so each truncated '
+                'line is logged. By default, lines are never truncated.'
+            ),
+            metavar='CHARACTERS',
+        )
+
+        return self
+
+    def add_line_memo_flags(self):
+        self.parser.add_argument(
+            '--line-memo-size',
+            type=positive_integer,
+            default=DEFAULT_MAX_SIZE,
+            help=(
+                'Remember up to this many lines that no secrets were found on, '
+                'so that plugins skip them when they are added again (e.g. in '
+                'vendored code). Defaults to %(default)s.'
+            ),
+            metavar='LINES',
+        )
+        self.parser.add_argument(
+            '--line-memo-file',
+            type=str,
+            help=(
+                'Load the remembered lines from this file, and save them to '
+                'it after scanning, so that they are shared between scans.'
+            ),
+            metavar='PATH',
+        )
+        self.parser.add_argument(
+            '--no-line-memo',
+            action='store_true',
+            help='Run plugins over every line, even if it is known to be clean.',
+        )
+
+        return self
+
+    def add_shard_flags(self):
+        self.parser.add_argument(
+            '--shard-config',
+            type=is_valid_file,
+            help=(
+                'Config file listing the scan nodes that tracked repositories '
+                'are split between (with consistent hashing). Only this node\'s '
+                'share of repositories are considered.'
+            ),
+            metavar='CONFIG_FILENAME',
+        )
+        self.parser.add_argument(
+            '--shard-node',
+            type=str,
+            help=(
+                'Name of this node, in --shard-config. Defaults to the hostname.'
+            ),
+            metavar='NAME',
+        )
+
+        return self
+
     def _add_common_arguments(self):
         self.parser.add_argument(
             '-s',
@@ -68,3 +249,32 @@ class CommonOptions(object):
         )
 
         s3.S3Options.consolidate_args(args)
+        _consolidate_shard_args(args)
+
+        if getattr(args, 'no_line_memo', False) and getattr(args, 'line_memo_file', None):
+            raise argparse.ArgumentTypeError(
+                'Can\'t use --no-line-memo with --line-memo-file.',
+            )
+
+
+def _consolidate_shard_args(args):
+    """Initializes args.shard_ring, if sharding is configured."""
+    if not getattr(args, 'shard_config', None):
+        args.shard_ring = None
+        return
+
+    args.shard_config = os.path.abspath(args.shard_config)
+    try:
+        args.shard_ring = HashRing.from_config(config_file(args.shard_config))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            'Invalid shard config: {}'.format(e),
+        )
+
+    if not args.shard_node:
+        args.shard_node = socket.gethostname()
+
+    if args.shard_node not in args.shard_ring.nodes:
+        raise argparse.ArgumentTypeError(
+            'Node "{}" is not in {}.'.format(args.shard_node, args.shard_config),
+        )
@@ -0,0 +1,77 @@
+import argparse
+
+from .validators import duration
+from detect_secrets_server.core.policy import AdaptivePolicy
+
+
+class PolicyOptions(object):
+
+    def __init__(self, parser):
+        self.parser = parser.add_argument_group(
+            title='adaptive scheduling',
+            description=(
+                'Scan repositories at intervals based on how often commits '
+                'arrive, rather than by their crontabs.'
+            ),
+        )
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            '--min-interval',
+            type=duration,
+            default='15m',
+            help=(
+                'Never scan a repository more often than this (e.g. 30s, 15m, '
+                '2h, 7d). Defaults to %(default)s.'
+            ),
+            metavar='DURATION',
+        )
+        self.parser.add_argument(
+            '--max-interval',
+            type=duration,
+            default='7d',
+            help=(
+                'Always scan a repository at least this often. '
+                'Defaults to %(default)s.'
+            ),
+            metavar='DURATION',
+        )
+        self.parser.add_argument(
+            '--cpu-budget',
+            type=_positive_float,
+            help=(
+                'Maximum average number of CPU cores to spend scanning. '
+                'Dormant repositories are backed off further, to stay within it.'
+            ),
+            metavar='CORES',
+        )
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        """Initializes args.policy"""
+        if args.min_interval > args.max_interval:
+            raise argparse.ArgumentTypeError(
+                '--min-interval must not exceed --max-interval.',
+            )
+
+        args.policy = AdaptivePolicy(
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            cpu_budget=args.cpu_budget,
+        )
+
+
+def _positive_float(value):
+    try:
+        output = float(value)
+    except ValueError:
+        output = 0
+
+    if output <= 0:
+        raise argparse.ArgumentTypeError(
+            'Must be a positive number: {}'.format(value),
+        )
+
+    return output
@@ -22,6 +22,79 @@ def is_git_url(url):
         )
 
 
+def disk_size(value):
+    """
+    Custom type to convert human friendly sizes (e.g. 500M, 20G) to bytes.
+    """
+    units = {
+        'K': 1024,
+        'M': 1024 ** 2,
+        'G': 1024 ** 3,
+        'T': 1024 ** 4,
+    }
+
+    multiplier = 1
+    if value and value[-1].upper() in units:
+        multiplier = units[value[-1].upper()]
+        value = value[:-1]
+
+    try:
+        output = int(float(value) * multiplier)
+    except ValueError:
+        output = -1
+
+    if output < 0:
+        raise argparse.ArgumentTypeError(
+            'Invalid disk size: {}'.format(value),
+        )
+
+    return output
+
+
+def positive_integer(value):
+    try:
+        output = int(value)
+    except ValueError:
+        output = 0
+
+    if output < 1:
+        raise argparse.ArgumentTypeError(
+            'Must be a positive integer: {}'.format(value),
+        )
+
+    return output
+
+
+def duration(value):
+    """
+    Custom type to convert human friendly durations (e.g. 15m, 2h, 7d) to seconds.
+    """
+    units = {
+        'S': 1,
+        'M': 60,
+        'H': 60 * 60,
+        'D': 60 * 60 * 24,
+        'W': 60 * 60 * 24 * 7,
+    }
+
+    multiplier = 1
+    if value and value[-1].upper() in units:
+        multiplier = units[value[-1].upper()]
+        value = value[:-1]
+
+    try:
+        output = int(float(value) * multiplier)
+    except ValueError:
+        output = 0
+
+    if output < 1:
+        raise argparse.ArgumentTypeError(
+            'Invalid duration: {}'.format(value),
+        )
+
+    return output
+
+
 def config_file(path):
     """
     Custom type to enforce input is valid filepath, and if valid,
@@ -30,7 +103,8 @@ def config_file(path):
     is_valid_file(path)
 
     with open(path) as f:
-        return yaml.safe_load(f.read())
+        # The C loader is an order of magnitude faster, for large config files.
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
 
 
 def json_file(path):
@@ -1,3 +1,5 @@
+import argparse
+
 from .common.install import get_install_options
 from .common.options import CommonOptions
 from .common.output import OutputOptions
@@ -17,11 +19,31 @@ class InstallOptions(CommonOptions):
             help='Method of installation.',
         )
 
+        self.add_spread_schedule_flag()
+        self.add_shard_flags()
+        self.parser.add_argument(
+            '--grouped',
+            action='store_true',
+            help=(
+                'Rather than one job per repository, install one job per distinct '
+                'crontab, which scans all repositories sharing it in a single '
+                'process. See `scan --all`.'
+            ),
+        )
+
         OutputOptions(self.parser).add_arguments()
 
         return self
 
     @staticmethod
     def consolidate_args(args):
+        # Each grouped job would need to list every tracked repository, to
+        # find the few with its spread out crontab. Grouped scans already run
+        # one repository after another, rather than all at once.
+        if args.grouped and args.spread_schedule:
+            raise argparse.ArgumentTypeError(
+                'Can\'t use --grouped with --spread-schedule.',
+            )
+
         for option in [CommonOptions, OutputOptions]:
             option.consolidate_args(args)
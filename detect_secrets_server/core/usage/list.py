@@ -1,7 +1,56 @@
+import argparse
+
 from .common.options import CommonOptions
+from .common.validators import config_file
+from .common.validators import is_valid_file
+from detect_secrets_server.util.ring import HashRing
 
 
 class ListOptions(CommonOptions):
 
     def __init__(self, subparser):
         super(ListOptions, self).__init__(subparser, 'list')
+
+    def add_arguments(self):
+        self.add_local_flag()
+        self.parser.add_argument(
+            '--schedule-histogram',
+            action='store_true',
+            help=(
+                'Rather than listing tracked repositories, display the number of '
+                'scans scheduled to start within each hour of the day.'
+            ),
+        )
+        self.add_spread_schedule_flag()
+        self.add_shard_flags()
+        self.parser.add_argument(
+            '--rebalance',
+            type=is_valid_file,
+            help=(
+                'Rather than listing tracked repositories, display which would '
+                'move between nodes, if --shard-config were replaced by this '
+                'config file.'
+            ),
+            metavar='CONFIG_FILENAME',
+        )
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        CommonOptions.consolidate_args(args)
+
+        if not args.rebalance:
+            return
+
+        if not args.shard_ring:
+            raise argparse.ArgumentTypeError(
+                '--rebalance must be used with --shard-config.',
+            )
+
+        try:
+            args.rebalance = HashRing.from_config(config_file(args.rebalance))
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(
+                'Invalid shard config: {}'.format(e),
+            )
@@ -0,0 +1,40 @@
+from .common.options import CommonOptions
+from .common.validators import disk_size
+from detect_secrets_server.storage.maintenance import DEFAULT_MAX_LOOSE_SIZE
+from detect_secrets_server.storage.maintenance import DEFAULT_MAX_PACKS
+
+
+class MaintainOptions(CommonOptions):
+    """Describes how to keep cloned repositories fast to query."""
+
+    def __init__(self, subparser):
+        super(MaintainOptions, self).__init__(subparser, 'maintain')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            '--max-packs',
+            type=int,
+            default=DEFAULT_MAX_PACKS,
+            help=(
+                'Maintain clones with more than this many packs. '
+                'Defaults to %(default)s.'
+            ),
+            metavar='N',
+        )
+        self.parser.add_argument(
+            '--max-loose-size',
+            type=disk_size,
+            default=DEFAULT_MAX_LOOSE_SIZE,
+            help=(
+                'Maintain clones whose loose objects take up more than this much '
+                'disk space (e.g. 500K, 16M). Defaults to 16M.'
+            ),
+            metavar='SIZE',
+        )
+        self.parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Maintain all clones, regardless of their pack count and size.',
+        )
+
+        return self
@@ -0,0 +1,8 @@
+from .common.options import CommonOptions
+
+
+class MigrateOptions(CommonOptions):
+    """Describes how to upgrade the on-disk layout of --root-dir."""
+
+    def __init__(self, subparser):
+        super(MigrateOptions, self).__init__(subparser, 'migrate')
@@ -4,9 +4,16 @@ from detect_secrets.core.usage import ParserBuilder
 
 import detect_secrets_server
 from .add import AddOptions
+from .audit import AuditOptions
 from .install import InstallOptions
 from .list import ListOptions
+from .maintain import MaintainOptions
+from .migrate import MigrateOptions
+from .pool import PoolOptions
+from .rescan import RescanOptions
 from .scan import ScanOptions
+from .serve import ServeOptions
+from .simulate import SimulateOptions
 
 
 class ServerParserBuilder(ParserBuilder):
@@ -34,7 +41,19 @@ class ServerParserBuilder(ParserBuilder):
             dest='action',
         )
 
-        for option in (AddOptions, ListOptions, InstallOptions, ScanOptions):
+        for option in (
+            AddOptions,
+            ListOptions,
+            InstallOptions,
+            ScanOptions,
+            MigrateOptions,
+            PoolOptions,
+            MaintainOptions,
+            ServeOptions,
+            SimulateOptions,
+            AuditOptions,
+            RescanOptions,
+        ):
             option(subparser).add_arguments()
 
         return self
@@ -60,6 +79,27 @@ class ServerParserBuilder(ParserBuilder):
             elif output.action == 'list':
                 ListOptions.consolidate_args(output)
 
+            elif output.action == 'migrate':
+                MigrateOptions.consolidate_args(output)
+
+            elif output.action == 'pool':
+                PoolOptions.consolidate_args(output)
+
+            elif output.action == 'maintain':
+                MaintainOptions.consolidate_args(output)
+
+            elif output.action == 'serve':
+                ServeOptions.consolidate_args(output)
+
+            elif output.action == 'simulate':
+                SimulateOptions.consolidate_args(output)
+
+            elif output.action == 'audit':
+                AuditOptions.consolidate_args(output)
+
+            elif output.action == 'rescan':
+                RescanOptions.consolidate_args(output)
+
         except argparse.ArgumentTypeError as e:
             self.parser.error(e)
 
@@ -84,6 +124,8 @@ def apply_default_plugin_options_to_repos(args):
             'crontab',
             'exclude_regex',
             'storage',
+            'object_pool',
+            'refs',
         ):
             if key not in tracked_repo:
                 tracked_repo[key] = getattr(args, key)
@@ -0,0 +1,20 @@
+from .common.options import CommonOptions
+
+
+class PoolOptions(CommonOptions):
+    """Describes how to manage shared object stores for related repositories."""
+
+    def __init__(self, subparser):
+        super(PoolOptions, self).__init__(subparser, 'pool')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            '--detect',
+            action='store_true',
+            help=(
+                'Group tracked repositories that share a root commit, and move '
+                'their clones onto a shared object store.'
+            ),
+        )
+
+        return self
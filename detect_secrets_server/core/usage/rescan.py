@@ -0,0 +1,105 @@
+import argparse
+import os
+
+from .common.options import CommonOptions
+from .common.output import OutputOptions
+from .common.validators import is_valid_file
+
+
+class RescanOptions(CommonOptions):
+    """Describes how to scan every file of a tracked repository again,
+    e.g. after its plugin configuration changes.
+    """
+
+    def __init__(self, subparser):
+        super(RescanOptions, self).__init__(subparser, 'rescan')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            'repo',
+            nargs='?',
+            help=(
+                'Rescans an already tracked repository by specifying a git URL '
+                '(that you would `git clone`).'
+            ),
+        )
+        self.parser.add_argument(
+            '--all',
+            action='store_true',
+            help=(
+                'Rescans all tracked repositories (or only local ones, with '
+                '--local), one after another, within a single process.'
+            ),
+        )
+        self.add_shard_flags()
+        self.parser.add_argument(
+            '--changed-plugins',
+            action='store_true',
+            help=(
+                'Only run plugins that were added, or configured differently '
+                '(e.g. with `add --config`), since the repository\'s files were '
+                'last scanned. Repositories without changes are skipped.'
+            ),
+        )
+        self.parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help=(
+                'Rescan the repository, without recording that its files were '
+                'scanned with the current plugin configuration.'
+            ),
+        )
+        self.parser.add_argument(
+            '--always-update-state',
+            action='store_true',
+            help=(
+                'Always record that the repository\'s files were scanned with '
+                'the current plugin configuration, despite finding secrets.'
+            ),
+        )
+        self.parser.add_argument(
+            '--exclude-files',
+            type=str,
+            help=(
+                'Filenames that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+        self.parser.add_argument(
+            '--exclude-lines',
+            type=str,
+            help=(
+                'Lines that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+        self.add_local_flag()
+        OutputOptions(self.parser).add_arguments()
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        if args.dry_run and args.always_update_state:
+            raise argparse.ArgumentTypeError(
+                'Can\'t use --dry-run with --always-update-state.',
+            )
+
+        if args.all:
+            if args.repo:
+                raise argparse.ArgumentTypeError(
+                    'Can\'t specify a repository with --all.',
+                )
+        elif not args.repo:
+            raise argparse.ArgumentTypeError(
+                'the following arguments are required: repo (or --all)',
+            )
+
+        for option in [CommonOptions, OutputOptions]:
+            option.consolidate_args(args)
+
+        if args.local and args.repo:
+            is_valid_file(args.repo)
+            args.repo = os.path.abspath(args.repo)
@@ -5,6 +5,7 @@ from detect_secrets.core.usage import PluginOptions
 
 from .common.options import CommonOptions
 from .common.output import OutputOptions
+from .common.validators import disk_size
 from .common.validators import is_valid_file
 
 
@@ -17,12 +18,30 @@ class ScanOptions(CommonOptions):
     def add_arguments(self):
         self.parser.add_argument(
             'repo',
-            nargs=1,
+            nargs='?',
             help=(
                 'Scans an already tracked repository by specifying a git URL '
                 '(that you would `git clone`).'
             ),
         )
+        self.parser.add_argument(
+            '--all',
+            action='store_true',
+            help=(
+                'Scans all tracked repositories (or only local ones, with '
+                '--local), one after another, within a single process.'
+            ),
+        )
+        self.parser.add_argument(
+            '--schedule',
+            type=str,
+            help=(
+                'With --all, only scans repositories with this crontab.'
+            ),
+            metavar='CRONTAB',
+        )
+        self.add_spread_schedule_flag()
+        self.add_shard_flags()
         self.parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -39,6 +58,16 @@ class ScanOptions(CommonOptions):
             ),
 
         )
+        self.parser.add_argument(
+            '--fail-fast',
+            action='store_true',
+            help=(
+                'For gating: scan the files most likely to contain secrets '
+                '(e.g. dotenv, credential and config files) first, and stop at '
+                'the first secret that isn\'t in the baseline. Its author is '
+                'not looked up, and the exit code is 1 if secrets are found.'
+            ),
+        )
         self.parser.add_argument(
             '--always-update-state',
             action='store_true',
@@ -77,6 +106,42 @@ class ScanOptions(CommonOptions):
             ),
         )
 
+        self.parser.add_argument(
+            '--clone-disk-budget',
+            type=disk_size,
+            help=(
+                'After scanning, evict the least recently scanned clones under '
+                '--root-dir, so that they take up at most this much disk space '
+                '(e.g. 500M, 20G). Evicted repositories are re-cloned on their '
+                'next scan.'
+            ),
+            metavar='SIZE',
+        )
+
+        self.parser.add_argument(
+            '--maintain',
+            action='store_true',
+            help=(
+                'After scanning, repack the clone and write commit graphs, if it '
+                'has accumulated too many packs. See `maintain`.'
+            ),
+        )
+
+        self.parser.add_argument(
+            '--record-activity',
+            action='store_true',
+            help=(
+                'Record how often commits arrive, and how long scans take, in '
+                'the tracked metadata. This is needed for `serve --adaptive`.'
+            ),
+        )
+
+        self.add_line_memo_flags()
+        self.add_lease_flag()
+        self.add_recover_rewrites_flag()
+        self.add_per_commit_flag()
+        self.add_generated_files_flags()
+        self.add_scan_guard_flags()
         self.add_local_flag()
         for option in [PluginOptions, OutputOptions]:
             option(self.parser).add_arguments()
@@ -95,11 +160,34 @@ class ScanOptions(CommonOptions):
                 '--always-run-output-hook must be run with --output-hook',
             )
 
+        if args.fail_fast and args.always_update_state:
+            raise argparse.ArgumentTypeError(
+                'Can\'t use --fail-fast with --always-update-state.',
+            )
+
+        if args.per_commit and args.scan_head:
+            raise argparse.ArgumentTypeError(
+                'Can\'t use --per-commit with --scan-head.',
+            )
+
+        if args.all:
+            if args.repo:
+                raise argparse.ArgumentTypeError(
+                    'Can\'t specify a repository with --all.',
+                )
+        elif not args.repo:
+            raise argparse.ArgumentTypeError(
+                'the following arguments are required: repo (or --all)',
+            )
+        elif args.schedule:
+            raise argparse.ArgumentTypeError(
+                '--schedule must be used with --all.',
+            )
+
         for option in [CommonOptions, OutputOptions]:
             option.consolidate_args(args)
 
-        args.repo = args.repo[0]
-        if args.local:
+        if args.local and args.repo:
             is_valid_file(args.repo)
             args.repo = os.path.abspath(args.repo)
 
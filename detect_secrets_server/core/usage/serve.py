@@ -0,0 +1,83 @@
+from .common.options import CommonOptions
+from .common.output import OutputOptions
+from .common.policy import PolicyOptions
+from .common.validators import positive_integer
+
+
+class ServeOptions(CommonOptions):
+    """Describes how to continuously scan tracked repositories, according to
+    their crontabs, without installing them with cron.
+    """
+
+    def __init__(self, subparser):
+        super(ServeOptions, self).__init__(subparser, 'serve')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            '--jobs',
+            type=positive_integer,
+            default=4,
+            help='Maximum number of concurrent scans. Defaults to %(default)s.',
+            metavar='N',
+        )
+        self.parser.add_argument(
+            '--refresh-interval',
+            type=positive_integer,
+            default=60,
+            help=(
+                'Seconds between checks for newly added (or removed) tracked '
+                'repositories. Defaults to %(default)s.'
+            ),
+            metavar='SECONDS',
+        )
+
+        self.parser.add_argument(
+            '--exclude-files',
+            type=str,
+            help=(
+                'Filenames that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+        self.parser.add_argument(
+            '--exclude-lines',
+            type=str,
+            help=(
+                'Lines that match this regex will be ignored when '
+                'scanning for secrets.'
+            ),
+            metavar='REGEX',
+        )
+
+        self.add_lease_flag()
+        self.add_recover_rewrites_flag()
+        self.add_per_commit_flag()
+        self.add_generated_files_flags()
+        self.add_line_memo_flags()
+
+        # Regexes can only be interrupted in the main thread, so workers would
+        # only notice that a file exceeded its time budget once the regex
+        # finishes. Therefore, only the line length cap is supported.
+        self.add_line_length_cap_flag()
+        self.add_shard_flags()
+        self.add_spread_schedule_flag()
+        self.parser.add_argument(
+            '--adaptive',
+            action='store_true',
+            help=(
+                'Record commit activity with each scan, and use it to decide '
+                'how often each repository is scanned. Until enough activity '
+                'is recorded, crontabs are followed.'
+            ),
+        )
+
+        PolicyOptions(self.parser).add_arguments()
+        OutputOptions(self.parser).add_arguments()
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        for option in [CommonOptions, PolicyOptions, OutputOptions]:
+            option.consolidate_args(args)
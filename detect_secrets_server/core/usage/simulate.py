@@ -0,0 +1,31 @@
+from .common.options import CommonOptions
+from .common.policy import PolicyOptions
+from .common.validators import positive_integer
+
+
+class SimulateOptions(CommonOptions):
+    """Describes how to compare crontab based scheduling against adaptive
+    scheduling, by replaying the commit history of cloned repositories.
+    """
+
+    def __init__(self, subparser):
+        super(SimulateOptions, self).__init__(subparser, 'simulate')
+
+    def add_arguments(self):
+        self.parser.add_argument(
+            '--days',
+            type=positive_integer,
+            default=30,
+            help='Number of days of history to replay. Defaults to %(default)s.',
+            metavar='N',
+        )
+        self.add_spread_schedule_flag()
+
+        PolicyOptions(self.parser).add_arguments()
+
+        return self
+
+    @staticmethod
+    def consolidate_args(args):
+        for option in [CommonOptions, PolicyOptions]:
+            option.consolidate_args(args)
@@ -1,14 +1,38 @@
+import functools
 import os
+import re
 import subprocess
 import sys
+import time
 from enum import Enum
 
 from detect_secrets.core.baseline import get_secrets_not_in_baseline
+from detect_secrets.core.log import log
 from detect_secrets.core.secrets_collection import SecretsCollection
 from detect_secrets.plugins.common import initialize as initialize_plugins
-
+from detect_secrets.plugins.common.filetype import determine_file_type
+
+from detect_secrets_server.core.classify import CHEAP
+from detect_secrets_server.core.classify import CHEAP_PLUGINS
+from detect_secrets_server.core.classify import DEFAULT_MAX_LINE_LENGTH
+from detect_secrets_server.core.classify import FileClassifier
+from detect_secrets_server.core.entropy import apply_entropy_filter
+from detect_secrets_server.core.entropy import score_diff
+from detect_secrets_server.core.guard import apply_scan_guard
+from detect_secrets_server.core.guard import enforce_time_budget
+from detect_secrets_server.core.guard import ScanGuard
+from detect_secrets_server.core.memo import apply_line_memo
+from detect_secrets_server.core.memo import get_plugins_hash
+from detect_secrets_server.core.memo import record_lines
+from detect_secrets_server.core.policy import get_moving_average
+from detect_secrets_server.core.prefilter import apply_prefilter
 from detect_secrets_server.storage.core import git
 from detect_secrets_server.storage.file import FileStorage
+from detect_secrets_server.util.priority import prioritize
+
+
+# Number of files to diff at a time, when scanning an entire tree.
+TREE_DIFF_BATCH_SIZE = 100
 
 
 class OverrideLevel(Enum):
@@ -35,6 +59,11 @@ class BaseTrackedRepo(object):
         exclude_regex,
         crontab='',
         rootdir=None,
+        object_pool=None,
+        activity=None,
+        refs=None,
+        ref_shas=None,
+        scanned_plugins=None,
         **kwargs
     ):
         """
@@ -62,6 +91,26 @@ class BaseTrackedRepo(object):
         :param baseline_filename: each repository may have a different
             baseline filename. This allows us to customize these filenames
             per repository.
+
+        :type object_pool: str|None
+        :param object_pool: repositories with the same object_pool share
+            a single git object store.
+
+        :type activity: dict|None
+        :param activity: statistics used for adaptive scheduling. See
+            record_activity.
+
+        :type refs: list(str)|None
+        :param refs: patterns of other refs to scan, besides the main branch.
+            e.g. `refs/pull/*/head`
+
+        :type ref_shas: dict|None
+        :param ref_shas: mapping of ref name to last commit hash scanned, for
+            refs matching these patterns.
+
+        :type scanned_plugins: dict|None
+        :param scanned_plugins: plugin configuration that the files at sha
+            were scanned with, if different from plugins. See rescan.
         """
         self.last_commit_hash = sha
         self.repo = repo
@@ -69,9 +118,31 @@ class BaseTrackedRepo(object):
         self.plugin_config = plugins
         self.baseline_filename = baseline_filename
         self.exclude_regex = exclude_regex
+        self.object_pool = object_pool
+        self.activity = activity
+        self.refs = refs
+        self.ref_shas = ref_shas or {}
+        self.scanned_plugins = scanned_plugins
+
+        # Where secrets were introduced, if known. See _scan_commits.
+        self.secret_origins = {}
+
+        # Set by _scan_refs, and saved by update.
+        self._scanned_ref_shas = None
+
+        # Generated, vendored and minified files found by the last scan.
+        # See FileClassifier.
+        self.file_classifier = None
+
+        # Plugins that classified files are scanned with, if not skipped.
+        self._cheap_plugins = None
+
+        # Long lines truncated, and files that exceeded their time budget,
+        # in the last scan. See ScanGuard.
+        self.scan_guard = None
 
         if rootdir:
-            self.storage = self.initialize_storage(rootdir).setup(repo)
+            self.storage = self.initialize_storage(rootdir).setup(repo, object_pool)
 
     @classmethod
     def load_from_file(
@@ -98,7 +169,7 @@ class BaseTrackedRepo(object):
         data = cls.get_tracked_repo_data(storage, repo_name)
 
         output = cls(**data)
-        output.storage = storage.setup(output.repo)
+        output.storage = storage.setup(output.repo, output.object_pool)
 
         return output
 
@@ -113,7 +184,21 @@ class BaseTrackedRepo(object):
     def name(self):
         return self.storage.repository_name
 
-    def scan(self, exclude_files_regex=None, exclude_lines_regex=None, scan_head=False):
+    def scan(
+        self,
+        exclude_files_regex=None,
+        exclude_lines_regex=None,
+        scan_head=False,
+        recover_rewrites=False,
+        per_commit=False,
+        checkpoint=None,
+        fail_fast=False,
+        line_memo=None,
+        generated_files=None,
+        max_line_length=DEFAULT_MAX_LINE_LENGTH,
+        line_length_cap=None,
+        file_time_budget=None,
+    ):
         """Fetches latest changes, and scans the git diff between last_commit_hash
         and HEAD.
 
@@ -125,50 +210,636 @@ class BaseTrackedRepo(object):
         :type exclude_lines: str|None
         :param exclude_lines: A regex matching lines to skip over.
 
+        :type recover_rewrites: bool
+        :param recover_rewrites: if last_commit_hash no longer exists, scans
+            the commits since the most recent one that survived the rewrite,
+            rather than skipping to HEAD.
+
+        :type per_commit: bool
+        :param per_commit: if True, scans the changes of each commit since
+            last_commit_hash, rather than the overall diff. This finds secrets
+            that were added, then removed, in the meantime.
+
+        :type checkpoint: function|None
+        :param checkpoint: with per_commit, this is called with the hash of each
+            commit scanned, until the first commit with secrets.
+
+        :type fail_fast: bool
+        :param fail_fast: if True, files most likely to contain secrets are
+            scanned first, and scanning stops as soon as a secret (that isn't
+            in the baseline) is found.
+
+        :type line_memo: detect_secrets_server.core.memo.LineMemo|None
+        :param line_memo: if provided, lines that are known to be clean are
+            skipped, and clean lines are remembered.
+
+        :type generated_files: str|None
+        :param generated_files: if CHEAP or SKIP, generated, vendored and
+            minified files are only scanned with cheap plugins, or skipped.
+
+        :type max_line_length: int
+        :param max_line_length: files with added lines longer than this are
+            classified as minified.
+
+        :type line_length_cap: int|None
+        :param line_length_cap: if provided, lines longer than this are
+            truncated, before plugins see them.
+
+        :type file_time_budget: float|None
+        :param file_time_budget: if provided, the rest of each file is skipped
+            once plugins have spent this many seconds on it.
+
         :rtype: SecretsCollection
         :returns: secrets found.
         """
-        self.storage.fetch_new_changes()
-
-        default_plugins = initialize_plugins.from_parser_builder(
-            self.plugin_config,
-            exclude_lines_regex=exclude_lines_regex,
+        self.storage.fetch_new_changes(
+            log_ref_updates=recover_rewrites,
+            ref_patterns=self.refs or (),
         )
+
+        self.scan_guard = None
+        if line_length_cap or file_time_budget:
+            self.scan_guard = ScanGuard(line_length_cap, file_time_budget)
+
         # TODO Issue 17: Ignoring self.exclude_regex, using the server scan CLI arg
         secrets = SecretsCollection(
-            plugins=default_plugins,
+            plugins=apply_scan_guard(
+                self._get_plugins(
+                    self.plugin_config,
+                    exclude_lines_regex,
+                    line_memo,
+                ),
+                self.scan_guard,
+            ),
             exclude_files=exclude_files_regex,
             exclude_lines=exclude_lines_regex,
         )
 
+        self.secret_origins = {}
+        self._scanned_ref_shas = None
+
+        self.file_classifier = None
+        self._cheap_plugins = None
+        if generated_files:
+            self.file_classifier = FileClassifier(
+                self.storage.get_attributes_files,
+                max_line_length,
+            )
+
+        if generated_files == CHEAP:
+            self._cheap_plugins = apply_scan_guard(
+                self._get_plugins(
+                    {
+                        name: config
+                        for name, config in self.plugin_config.items()
+                        if name in CHEAP_PLUGINS
+                    },
+                    exclude_lines_regex,
+                    line_memo,
+                ),
+                self.scan_guard,
+            )
+
+        # Files often return to a previous state (e.g. reverts), or are
+        # pushed to several refs, so we only need to scan each version once.
+        scanned_blobs = set()
+
+        should_stop = None
+        if fail_fast:
+            should_stop = functools.partial(
+                self._has_new_secrets,
+                secrets,
+                self._get_baseline(),
+            )
+
+        if per_commit:
+            scan = functools.partial(
+                self._scan_commits_since,
+                scanned_blobs=scanned_blobs,
+                checkpoint=checkpoint,
+                should_stop=should_stop,
+            )
+        else:
+            scan = functools.partial(self._scan_diff, should_stop=should_stop)
+
         scan_from_this_commit = git.get_empty_tree_commit_hash() if scan_head else self.last_commit_hash
         try:
-            diff_name_only = self.storage.get_diff_name_only(scan_from_this_commit)
+            stopped = scan(secrets, scan_from_this_commit)
+        except subprocess.CalledProcessError:
+            ancestor = None
+            if recover_rewrites and not scan_head:
+                ancestor = self.storage.find_surviving_ancestor(
+                    scan_from_this_commit,
+                )
 
-            # do a per-file diff + scan so we don't get a OOM if the the commit-diff is too large
-            for filename in diff_name_only:
-                file_diff = self.storage.get_diff(scan_from_this_commit, filename)
+            if not ancestor:
+                self.update()
+                return secrets
 
-                secrets.scan_diff(
-                    file_diff,
-                    baseline_filename=self.baseline_filename,
-                    last_commit_hash=scan_from_this_commit,
-                    repo_name=self.name,
-                )
-        except subprocess.CalledProcessError:
-            self.update()
+            log.warning(
+                '%s no longer exists in %s: scanning from %s instead.',
+                scan_from_this_commit,
+                self.name,
+                ancestor,
+            )
+            stopped = scan(secrets, ancestor)
+
+        if self.refs and not stopped:
+            self._scan_refs(secrets, scanned_blobs, should_stop)
+
+        return self._filter_baseline_secrets(secrets)
+
+    def rescan(
+        self,
+        exclude_files_regex=None,
+        exclude_lines_regex=None,
+        changed_plugins=False,
+    ):
+        """Scans every file at last_commit_hash (rather than the diff since),
+        e.g. to apply a new plugin configuration to existing code. Later
+        commits are left to the next scan.
+
+        :type exclude_files_regex: str|None
+        :type exclude_lines_regex: str|None
+
+        :type changed_plugins: bool
+        :param changed_plugins: if True, only runs plugins that were added, or
+            configured differently, since these files were scanned.
+
+        :rtype: SecretsCollection
+        :returns: secrets found.
+        """
+        plugins = self.plugin_config
+        if changed_plugins:
+            plugins = self.get_changed_plugins()
+
+        secrets = SecretsCollection(
+            plugins=self._get_plugins(plugins, exclude_lines_regex),
+            exclude_files=exclude_files_regex,
+            exclude_lines=exclude_lines_regex,
+        )
+        if not plugins:
             return secrets
 
-        if self.baseline_filename:
-            baseline = self.storage.get_baseline_file(self.baseline_filename)
-            if baseline:
-                baseline_collection = SecretsCollection.load_baseline_from_string(baseline)
-                secrets = get_secrets_not_in_baseline(secrets, baseline_collection)
+        # The clone may have been evicted since it was last scanned, in which
+        # case it's re-cloned.
+        self.storage.fetch_new_changes()
+
+        self._scan_tree(secrets, self.last_commit_hash)
+
+        return self._filter_baseline_secrets(secrets)
+
+    def get_changed_plugins(self):
+        """
+        :rtype: dict
+        :returns: plugin configuration for plugins that were added, or
+            configured differently, since the files at last_commit_hash
+            were scanned.
+        """
+        if self.scanned_plugins is None:
+            return {}
+
+        return {
+            name: config
+            for name, config in self.plugin_config.items()
+            if self.scanned_plugins.get(name) != config
+        }
+
+    @staticmethod
+    def _get_plugins(plugin_config, exclude_lines_regex=None, line_memo=None):
+        """
+        :type plugin_config: dict
+        :type exclude_lines_regex: str|None
+        :type line_memo: detect_secrets_server.core.memo.LineMemo|None
+
+        :rtype: tuple(detect_secrets.plugins.base.BasePlugin)
+        """
+        plugins = apply_entropy_filter(
+            apply_prefilter(
+                initialize_plugins.from_parser_builder(
+                    plugin_config,
+                    exclude_lines_regex=exclude_lines_regex,
+                ),
+            ),
+        )
+
+        return apply_line_memo(
+            plugins,
+            line_memo,
+            get_plugins_hash(plugin_config, exclude_lines_regex),
+        )
+
+    def _filter_baseline_secrets(self, secrets):
+        """
+        :type secrets: SecretsCollection
+        :rtype: SecretsCollection
+        """
+        baseline = self._get_baseline()
+        if baseline:
+            secrets = get_secrets_not_in_baseline(secrets, baseline)
 
         return secrets
 
+    def _get_baseline(self):
+        """
+        :rtype: SecretsCollection|None
+        """
+        if not self.baseline_filename:
+            return None
+
+        baseline = self.storage.get_baseline_file(self.baseline_filename)
+        if not baseline:
+            return None
+
+        return SecretsCollection.load_baseline_from_string(baseline)
+
+    @staticmethod
+    def _has_new_secrets(secrets, baseline):
+        """
+        :type secrets: SecretsCollection
+        :type baseline: SecretsCollection|None
+        :rtype: bool
+        """
+        if not secrets.data:
+            return False
+
+        if not baseline:
+            return True
+
+        return bool(get_secrets_not_in_baseline(secrets, baseline).data)
+
+    def audit(self, exclude_files_regex=None, exclude_lines_regex=None, jobs=1):
+        """Fetches latest changes, and scans the entire history of the
+        repository, rather than the diff since last_commit_hash.
+
+        :type exclude_files_regex: str|None
+        :type exclude_lines_regex: str|None
+
+        :type jobs: int
+        :param jobs: number of processes to scan with.
+
+        :rtype: generator(dict)
+        :returns: secrets, in the order they were introduced.
+        """
+        self.storage.fetch_new_changes()
+
+        for secret in self.storage.audit(
+            self.plugin_config,
+            exclude_files_regex=exclude_files_regex,
+            exclude_lines_regex=exclude_lines_regex,
+            jobs=jobs,
+        ):
+            if secret['filename'] != self.baseline_filename:
+                yield secret
+
+    def _scan_diff(self, secrets, from_sha, should_stop=None):
+        """
+        :type secrets: SecretsCollection
+        :type from_sha: str
+
+        :type should_stop: function|None
+        :param should_stop: if provided, files most likely to contain secrets
+            are scanned first, and scanning stops once this returns True.
+
+        :rtype: bool
+        :returns: True, if scanning stopped early.
+        """
+        diff_name_only = self.storage.get_diff_name_only(from_sha)
+        if should_stop:
+            diff_name_only = prioritize(diff_name_only)
+
+        # do a per-file diff + scan so we don't get a OOM if the the commit-diff is too large
+        for filename in diff_name_only:
+            file_diff = self.storage.get_diff(from_sha, filename)
+
+            self._scan_patch(secrets, file_diff, from_sha)
+
+            if should_stop and should_stop():
+                return True
+
+        return False
+
+    def _scan_tree(self, secrets, sha):
+        """
+        :type secrets: SecretsCollection
+        :type sha: str
+        """
+        empty_tree = git.get_empty_tree_commit_hash()
+        filenames = [
+            filename
+            for _, filename in self.storage.get_changed_blobs(empty_tree, sha)
+        ]
+
+        # Files are diffed in batches, so that we don't get a OOM if the
+        # tree is too large.
+        for index in range(0, len(filenames), TREE_DIFF_BATCH_SIZE):
+            self._scan_patch(
+                secrets,
+                self.storage.get_commit_diff(
+                    empty_tree,
+                    sha,
+                    filenames[index:index + TREE_DIFF_BATCH_SIZE],
+                ),
+                empty_tree,
+            )
+
+    def _scan_patch(self, secrets, diff, from_sha):
+        """
+        :type secrets: SecretsCollection
+        :type diff: str
+
+        :type from_sha: str
+        :param from_sha: that diff is from, for logging.
+        """
+        if not self.file_classifier:
+            self._run_plugins(secrets, diff, from_sha)
+            return
+
+        diff, classified = self.file_classifier.split_diff(diff)
+
+        start = time.time()
+        self._run_plugins(secrets, diff, from_sha)
+        self.file_classifier.scanned_bytes += len(diff)
+        self.file_classifier.scan_seconds += time.time() - start
+
+        if not classified or self._cheap_plugins is None:
+            return
+
+        start = time.time()
+        plugins = secrets.plugins
+        secrets.plugins = self._cheap_plugins
+        try:
+            self._run_plugins(secrets, classified, from_sha)
+        finally:
+            secrets.plugins = plugins
+
+        self.file_classifier.classified_seconds += time.time() - start
+
+    def _run_plugins(self, secrets, diff, from_sha):
+        """
+        :type secrets: SecretsCollection
+        :type diff: str
+        :type from_sha: str
+        """
+        if self.scan_guard:
+            diff = self.scan_guard.truncate_lines(diff)
+
+        # Candidates for high entropy strings are scored for the whole
+        # diff at once, which is much faster than one at a time.
+        score_diff(secrets.plugins, diff)
+
+        with record_lines(secrets.plugins), enforce_time_budget(secrets.plugins):
+            secrets.scan_diff(
+                diff,
+                baseline_filename=self.baseline_filename,
+                last_commit_hash=from_sha,
+                repo_name=self.name,
+            )
+
+    def _scan_commits_since(
+        self,
+        secrets,
+        from_sha,
+        scanned_blobs,
+        checkpoint=None,
+        should_stop=None,
+    ):
+        """
+        :type secrets: SecretsCollection
+        :type from_sha: str
+        :type scanned_blobs: set
+        :type checkpoint: function|None
+        :type should_stop: function|None
+
+        :rtype: bool
+        :returns: True, if scanning stopped early.
+        """
+        # Commits already scanned on other refs (e.g. pull requests that
+        # were fast-forwarded, or rebased) don't need to be scanned again.
+        commits = self.storage.get_commits_since(
+            from_sha,
+            exclude=sorted(set(self.ref_shas.values())),
+        )
+
+        return self._scan_commits(
+            secrets,
+            commits,
+            scanned_blobs,
+            checkpoint,
+            should_stop,
+        )
+
+    def _scan_refs(self, secrets, scanned_blobs, should_stop=None):
+        """Scans the commits on refs matching self.refs, which have not been
+        scanned on the main branch, or other refs.
+
+        :type secrets: SecretsCollection
+        :type scanned_blobs: set
+        :type should_stop: function|None
+        """
+        ref_shas = self.storage.get_refs(self.refs)
+        scanned = ['HEAD'] + sorted(set(self.ref_shas.values()))
+
+        for ref, sha in sorted(ref_shas.items()):
+            if self.ref_shas.get(ref) != sha and self._scan_commits(
+                secrets,
+                self.storage.get_ref_commits(sha, exclude=scanned),
+                scanned_blobs,
+                should_stop=should_stop,
+            ):
+                return
+
+            if sha not in scanned:
+                scanned.append(sha)
+
+        # Refs that no longer exist (e.g. merged branches) are dropped.
+        self._scanned_ref_shas = ref_shas
+
+    def _scan_commits(
+        self,
+        secrets,
+        commits,
+        scanned_blobs,
+        checkpoint=None,
+        should_stop=None,
+    ):
+        """
+        :type secrets: SecretsCollection
+
+        :type commits: list(tuple(str, str, str|None))
+        :param commits: (parent, commit hash, author email), oldest first.
+
+        :type scanned_blobs: set
+        :param scanned_blobs: (blob hash, file type) of file versions already
+            fully scanned, which are skipped. Plugins (e.g. KeywordDetector)
+            treat files differently depending on their type.
+
+        :type checkpoint: function|None
+
+        :type should_stop: function|None
+        :param should_stop: if provided, scanning stops after the first
+            commit for which this returns True.
+
+        :rtype: bool
+        :returns: True, if scanning stopped early.
+        """
+        is_clean = not secrets.data
+
+        for parent, sha, author in commits:
+            changed_blobs = self.storage.get_changed_blobs(parent, sha)
+            if author is None:
+                changed_blobs = self._skip_merged_refs(changed_blobs, sha)
+
+            blobs = []
+            for blob, filename in changed_blobs:
+                key = (blob, determine_file_type(filename))
+                if key not in scanned_blobs and not self._is_excluded(secrets, filename):
+                    blobs.append((key, filename))
+
+            filenames = [filename for _, filename in blobs]
+            if filenames:
+                self._scan_patch(
+                    secrets,
+                    self.storage.get_commit_diff(parent, sha, filenames),
+                    parent,
+                )
+
+            # Otherwise, a later copy of the same file version (e.g. at a path
+            # that isn't vendored) would be skipped without being fully scanned.
+            for key, filename in blobs:
+                if self._is_fully_scanned(filename):
+                    scanned_blobs.add(key)
+
+            for filename in filenames:
+                for secret in secrets.data.get(filename, ()):
+                    # Secrets are attributed to the first commit they're
+                    # found in, unless that's a merge.
+                    self.secret_origins.setdefault(
+                        (filename, secret.secret_hash, secret.type),
+                        {'author': author, 'commit': sha} if author else None,
+                    )
+
+            is_clean = is_clean and not secrets.data
+            if is_clean and checkpoint:
+                checkpoint(sha)
+
+            if should_stop and should_stop():
+                return True
+
+        return False
+
+    def _skip_merged_refs(self, changed_blobs, sha):
+        """A merge's diff (against its first parent) includes every change
+        made on the refs it merges. If a merged commit was the tip of a ref
+        scanned in a previous scan (e.g. a pull request), only file versions
+        that also differ from it (e.g. conflict resolutions) are new.
+
+        :type changed_blobs: list(tuple(str, str))
+        :type sha: str
+        :rtype: list(tuple(str, str))
+        """
+        scanned_tips = set(self.ref_shas.values())
+        if not scanned_tips:
+            return changed_blobs
+
+        for merged_sha in self.storage.get_merged_parents(sha):
+            if merged_sha in scanned_tips:
+                unmerged_blobs = set(self.storage.get_changed_blobs(merged_sha, sha))
+                changed_blobs = [
+                    blob
+                    for blob in changed_blobs
+                    if blob in unmerged_blobs
+                ]
+
+        return changed_blobs
+
+    def _is_excluded(self, secrets, filename):
+        """SecretsCollection.scan_diff skips these files, without scanning them.
+
+        :type secrets: SecretsCollection
+        :type filename: str
+        :rtype: bool
+        """
+        if filename == self.baseline_filename:
+            return True
+
+        return bool(
+            secrets.exclude_files
+            and re.search(secrets.exclude_files, filename, re.IGNORECASE)
+        )
+
+    def _is_fully_scanned(self, filename):
+        """
+        :type filename: str
+        :rtype: bool
+        :returns: False, if filename was classified (and therefore skipped, or
+            only scanned with cheap plugins), or exceeded its time budget.
+        """
+        if self.file_classifier and filename in self.file_classifier.classified:
+            return False
+
+        return not self.scan_guard or all(
+            overrun.filename != filename
+            for overrun in self.scan_guard.overruns
+        )
+
     def update(self):
         self.last_commit_hash = self.storage.get_last_commit_hash()
+        if self._scanned_ref_shas is not None:
+            self.ref_shas = self._scanned_ref_shas
+
+    def record_activity(self, from_sha, scan_seconds, now=None):
+        """Keeps moving averages of how often commits arrive, and how long
+        scans take, so that scans can be scheduled accordingly.
+
+        :type from_sha: str
+        :param from_sha: last commit hash scanned, before this scan.
+
+        :type scan_seconds: float
+        :param scan_seconds: how long this scan took.
+
+        :type now: float|None
+        :param now: timestamp of this scan.
+        """
+        if now is None:
+            now = time.time()
+
+        activity = dict(self.activity or {})
+        last_scanned = activity.get('last_scanned')
+        if last_scanned is not None and from_sha and now > last_scanned:
+            try:
+                commits = self.storage.get_commit_count(from_sha)
+            except subprocess.CalledProcessError:
+                # e.g. history was rewritten, so we don't know.
+                commits = None
+
+            if commits is not None:
+                activity['commit_rate'] = get_moving_average(
+                    activity.get('commit_rate'),
+                    commits / ((now - last_scanned) / 3600.0),
+                )
+
+        activity['scan_seconds'] = get_moving_average(
+            activity.get('scan_seconds'),
+            scan_seconds,
+        )
+        activity['last_scanned'] = int(now)
+
+        self.activity = activity
+
+    def acquire_lease(self, ttl):
+        """Prevents concurrent scans of this repository.
+
+        :type ttl: int
+        :param ttl: seconds, after which the lease expires.
+
+        :rtype: detect_secrets_server.storage.lease.Lease|None
+        :returns: None, if the repository is leased by someone else.
+        """
+        return self.storage.acquire_lease(
+            self.storage.hash_filename(self.name),
+            ttl,
+        )
 
     def save(self, override_level=OverrideLevel.ASK_USER):
         """Saves tracked repo config to file. Returns True if successful.
@@ -202,7 +873,11 @@ class BaseTrackedRepo(object):
     @property
     def __dict__(self):
         """This is written to the filesystem, and used in load_from_file.
-        Should contain all variables needed to initialize TrackedRepo."""
+        Should contain all variables needed to initialize TrackedRepo.
+
+        Optional settings are only written when set, so that metadata files
+        remain readable by older versions.
+        """
         output = {
             'repo': self.repo,
             'sha': self.last_commit_hash,
@@ -214,6 +889,24 @@ class BaseTrackedRepo(object):
             'plugins': self.plugin_config,
         }
 
+        if self.object_pool:
+            output['object_pool'] = self.object_pool
+
+        if self.activity:
+            output['activity'] = self.activity
+
+        if self.refs:
+            output['refs'] = self.refs
+
+        if self.ref_shas:
+            output['ref_shas'] = self.ref_shas
+
+        if (
+            self.scanned_plugins is not None
+            and self.scanned_plugins != self.plugin_config
+        ):
+            output['scanned_plugins'] = self.scanned_plugins
+
         return output
 
     def _prompt_user_override(self):  # pragma: no cover
@@ -0,0 +1,166 @@
+"""Audits the entire history of a cloned git repository, for every secret
+ever committed (to any branch), rather than only those in recent diffs.
+
+Rather than diffing every commit, each version of each file (i.e. each blob)
+is scanned exactly once, attributed to the first commit it appears in. Blobs
+are read in chunks, in the order they were introduced, so that chunks can be
+scanned in parallel while findings are still reported in order.
+"""
+import collections
+import io
+import itertools
+import multiprocessing
+
+from detect_secrets.plugins.common import initialize as initialize_plugins
+
+from .core import git
+
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Files with a null byte near the start are assumed to be binary, as git does.
+BINARY_CHECK_SIZE = 8000
+
+
+class HistoryAudit(object):
+
+    def __init__(
+        self,
+        location,
+        plugins,
+        exclude_files_regex=None,
+        exclude_lines_regex=None,
+        jobs=1,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        :type location: str
+        :param location: path to git repository.
+
+        :type plugins: dict
+        :param plugins: plugin configuration, as stored in tracked metadata.
+
+        :type exclude_files_regex: str|None
+        :type exclude_lines_regex: str|None
+
+        :type jobs: int
+        :param jobs: number of processes to scan blobs with.
+
+        :type chunk_size: int
+        :param chunk_size: number of blobs each process scans at a time.
+        """
+        self.location = location
+        self.plugins = plugins
+        self.exclude_files_regex = exclude_files_regex
+        self.exclude_lines_regex = exclude_lines_regex
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+
+    def run(self):
+        """
+        :rtype: generator(dict)
+        :returns: secrets, in the order they were introduced. Each secret is
+            only reported once per file, with the commit it first appeared in.
+        """
+        reported = set()
+        for findings in self._scan_chunks():
+            for finding in findings:
+                key = (
+                    finding['filename'],
+                    finding['hashed_secret'],
+                    finding['type'],
+                )
+                if key in reported:
+                    continue
+
+                reported.add(key)
+                yield finding
+
+    def _get_chunks(self):
+        blobs = git.get_blob_introductions(
+            self.location,
+            exclude_files_regex=self.exclude_files_regex,
+        )
+        while True:
+            chunk = list(itertools.islice(blobs, self.chunk_size))
+            if not chunk:
+                return
+
+            yield chunk
+
+    def _scan_chunks(self):
+        """
+        :rtype: generator(list(dict))
+        :returns: findings for each chunk, in order.
+        """
+        initargs = (
+            self.location,
+            self.plugins,
+            self.exclude_lines_regex,
+        )
+        if self.jobs == 1:
+            _initialize_worker(*initargs)
+            for chunk in self._get_chunks():
+                yield _scan_blobs(chunk)
+
+            return
+
+        pool = multiprocessing.Pool(
+            self.jobs,
+            initializer=_initialize_worker,
+            initargs=initargs,
+        )
+        try:
+            # Only a few chunks are queued up at a time, so that history
+            # doesn't need to fit in memory.
+            pending = collections.deque()
+            for chunk in self._get_chunks():
+                pending.append(pool.apply_async(_scan_blobs, (chunk,)))
+                if len(pending) >= self.jobs * 2:
+                    yield pending.popleft().get()
+
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+
+
+# Each worker process only initializes its plugins once.
+_worker = {}
+
+
+def _initialize_worker(location, plugins, exclude_lines_regex):
+    _worker['plugins'] = initialize_plugins.from_parser_builder(
+        plugins,
+        exclude_lines_regex=exclude_lines_regex,
+    )
+    _worker['location'] = location
+
+
+def _scan_blobs(blobs):
+    """
+    :type blobs: list(tuple(str, str, str, str))
+    :param blobs: output of git.get_blob_introductions
+
+    :rtype: list(dict)
+    """
+    findings = []
+    with git.BlobReader(_worker['location']) as reader:
+        for blob, filename, commit, author in blobs:
+            content = reader.read(blob)
+            if not content or b'\0' in content[:BINARY_CHECK_SIZE]:
+                continue
+
+            content = content.decode('utf-8', errors='ignore')
+
+            secrets = {}
+            for plugin in _worker['plugins']:
+                secrets.update(plugin.analyze(io.StringIO(content), filename))
+
+            for secret in sorted(secrets, key=lambda x: (x.lineno, x.type)):
+                finding = secret.json()
+                finding['commit'] = commit
+                finding['author'] = author
+                findings.append(finding)
+
+    return findings
@@ -1,12 +1,17 @@
 import hashlib
 import os
+import shutil
 import subprocess
 from abc import ABCMeta
 from abc import abstractmethod
 
 from detect_secrets.core.log import log
 
+from .audit import HistoryAudit
+from .cache import RepositoryCache
 from .core import git
+from .maintenance import RepositoryMaintenance
+from .pool import ObjectPool
 from detect_secrets_server.util.version import is_python_2
 
 if is_python_2():   # pragma: no cover
@@ -23,6 +28,9 @@ class BaseStorage(object):
     Structure:
         root
           |- repos      # This is where git repos are cloned to
+               |- ab
+                   |- cd
+                       |- abcd...   # Sharded by hash prefix, see get_shard_path
     """
     __metaclass__ = ABCMeta
 
@@ -49,7 +57,7 @@ class BaseStorage(object):
         """
         pass
 
-    def setup(self, repo_url):
+    def setup(self, repo_url, object_pool=None):
         """
         :param repo_url: this is placed in setup, rather than __init__,
             because we want to use this class without pinning it down
@@ -58,12 +66,16 @@ class BaseStorage(object):
             e.g. We should be able to retrieve information about the
             repo_url from a file, with delayed setup.
 
+        :type object_pool: str|None
+        :param object_pool: name of the shared object store to borrow
+            objects from, if any. See detect_secrets_server.storage.pool
+
         :returns: self, for better chaining
         """
         self.repo_url = repo_url
+        self.object_pool = ObjectPool(self.root, object_pool) if object_pool else None
 
-        if not os.path.isdir(self.root):
-            os.makedirs(self.root)
+        os.makedirs(self.root, exist_ok=True)
 
         self._initialize_git_repos_directory()
 
@@ -74,14 +86,166 @@ class BaseStorage(object):
         """Human friendly name of git repository tracked."""
         return self.get_repo_name(self.repo_url)
 
-    def clone(self):
+    def clone(self, seed=None, timeout=None):
+        """
+        :type seed: CloneSeed|None
+        :param seed: where to source the initial objects of new clones from,
+            rather than the remote. See detect_secrets_server.storage.seed
+
+        :type timeout: int|None
+        :param timeout: seconds, after which the clone is aborted with
+            subprocess.TimeoutExpired.
+        """
+        is_new_clone = not os.path.isdir(self._repo_location)
+        try:
+            self._clone(seed, timeout)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            # Otherwise, a partial clone would be mistaken for a complete one
+            # the next time round.
+            if is_new_clone and os.path.isdir(self._repo_location):
+                shutil.rmtree(self._repo_location)
+
+            raise
+
+        RepositoryCache.record_access(self._repo_location)
+
+    def _clone(self, seed, timeout):
+        reference = None
+        if self.object_pool:
+            self.object_pool.setup().fetch(self.repo_url, self.repository_name)
+            reference = self.object_pool.location
+
+        elif seed and not os.path.isdir(self._repo_location):
+            hashed_name = self.hash_filename(self.repository_name)
+
+            bundle = seed.find_bundle(self.repository_name, hashed_name)
+            if bundle and self._clone_from_bundle(bundle, timeout):
+                return
+
+            reference = seed.find_mirror(self.repository_name, hashed_name)
+
         git.clone_repo_to_location(
             self.repo_url,
             self._repo_location,
+            reference=reference,
+
+            # Objects from a seed mirror are copied, so that the mirror
+            # can be removed once the host is bootstrapped.
+            dissociate=not self.object_pool,
+            timeout=timeout,
         )
 
-    def fetch_new_changes(self):
-        git.fetch_new_changes(self._repo_location)
+    def _clone_from_bundle(self, bundle, timeout=None):
+        """Clones from the bundle, then fetches only the remaining changes
+        from the remote.
+
+        :rtype: bool
+        :returns: True if successful.
+        """
+        log.info('Seeding %s from %s', self.repository_name, bundle)
+        try:
+            git.clone_repo_to_location(bundle, self._repo_location)
+            git.set_remote_url(self._repo_location, self.repo_url)
+            git.fetch_new_changes(self._repo_location, timeout=timeout)
+        except subprocess.CalledProcessError:
+            log.warning(
+                'Unable to seed %s from %s, cloning from remote instead.',
+                self.repository_name,
+                bundle,
+            )
+            if os.path.isdir(self._repo_location):
+                shutil.rmtree(self._repo_location)
+
+            return False
+
+        return True
+
+    def fetch_new_changes(self, log_ref_updates=False, ref_patterns=()):
+        """
+        :type log_ref_updates: bool
+        :param log_ref_updates: see find_surviving_ancestor.
+
+        :type ref_patterns: iterable(str)
+        :param ref_patterns: other refs to update, besides the main branch.
+        """
+        if self.object_pool:
+            # Shared objects only need to be fetched once, across all members.
+            self.object_pool.setup().fetch(self.repo_url, self.repository_name)
+
+        try:
+            git.fetch_new_changes(
+                self._repo_location,
+                log_ref_updates=log_ref_updates,
+                ref_patterns=ref_patterns,
+            )
+        except subprocess.CalledProcessError:
+            if os.path.isdir(self._repo_location):
+                raise
+
+            # The clone may have been evicted to stay within the disk budget,
+            # so we transparently re-clone it.
+            log.info('Re-cloning %s', self.repository_name)
+            self.clone()
+            git.fetch_new_changes(
+                self._repo_location,
+                log_ref_updates=log_ref_updates,
+                ref_patterns=ref_patterns,
+            )
+
+        RepositoryCache.record_access(self._repo_location)
+
+    def audit(self, plugins, **kwargs):
+        """Scans every version of every file, in the history of all branches.
+
+        :type plugins: dict
+        :param plugins: plugin configuration, as stored in tracked metadata.
+
+        :rtype: generator(dict)
+        :returns: secrets, in the order they were introduced. See HistoryAudit
+            for the other arguments.
+        """
+        return HistoryAudit(self._repo_location, plugins, **kwargs).run()
+
+    def join_object_pool(self, name):
+        """Moves an existing clone onto a shared object store.
+
+        :type name: str
+        """
+        self.object_pool = ObjectPool(self.root, name).setup()
+        self.object_pool.fetch(self.repo_url, self.repository_name)
+        self.object_pool.attach(self._repo_location)
+
+    def enforce_clone_disk_budget(self, max_bytes):
+        """Evicts least recently used clones, so that all clones under root
+        take up at most max_bytes. The currently tracked repository is never
+        evicted.
+
+        :type max_bytes: int
+        :rtype: list
+        :returns: locations of evicted clones.
+        """
+        return RepositoryCache(os.path.join(self.root, 'repos')).evict(
+            max_bytes,
+            keep=(self._repo_location,),
+        )
+
+    def maintain(self, force=False, **kwargs):
+        """Writes commit graphs and multi-pack-indexes, repacks incrementally
+        and prunes, if the clone has accumulated too many packs or loose objects.
+
+        :type force: bool
+        :param force: perform maintenance, even if not needed.
+
+        :param kwargs: thresholds, see RepositoryMaintenance.
+
+        :rtype: dict|None
+        :returns: report of maintenance performed, if any.
+        """
+        report = RepositoryMaintenance(self._repo_location, **kwargs).run(force)
+        if report:
+            report['repo'] = self.repository_name
+
+        return report
 
     def get_diff(self, from_sha, filename=None):
         try:
@@ -137,6 +301,68 @@ class BaseStorage(object):
     def get_last_commit_hash(self):
         return git.get_last_commit_hash(self._repo_location)
 
+    def get_commit_count(self, from_sha):
+        return git.get_commit_count(self._repo_location, from_sha)
+
+    def get_commit_timestamps(self, since):
+        return git.get_commit_timestamps(self._repo_location, since)
+
+    def get_commits_since(self, from_sha, exclude=()):
+        return git.get_commits_since(self._repo_location, from_sha, exclude)
+
+    def get_ref_commits(self, sha, exclude=()):
+        return git.get_ref_commits(self._repo_location, sha, exclude)
+
+    def get_merged_parents(self, sha):
+        return git.get_merged_parents(self._repo_location, sha)
+
+    def get_refs(self, patterns):
+        return git.get_refs(self._repo_location, patterns)
+
+    def get_changed_blobs(self, parent, sha):
+        return git.get_changed_blobs(self._repo_location, parent, sha)
+
+    def get_commit_diff(self, parent, sha, files):
+        return git.get_commit_diff(self._repo_location, parent, sha, files)
+
+    def get_attributes_files(self, directories, sha='HEAD'):
+        return git.get_attributes_files(self._repo_location, sha, directories)
+
+    def find_surviving_ancestor(self, sha):
+        """After history is rewritten (e.g. by a force push), sha may no longer
+        exist. However, if updates to the clone were logged, we know what the
+        main branch pointed to before sha: the most recent of these to share
+        history with HEAD tells us which commits are new.
+
+        :type sha: str
+        :param sha: last commit scanned.
+
+        :rtype: str|None
+        :returns: the most recent commit in HEAD's history, that was also in
+            sha's history, if it can be found.
+        """
+        history = git.get_ref_history(self._repo_location)
+        candidates = [sha]
+        if sha in history:
+            candidates.extend(history[history.index(sha) + 1:])
+
+        for candidate in candidates:
+            try:
+                return git.get_merge_base(self._repo_location, candidate)
+            except subprocess.CalledProcessError:
+                continue
+
+        return None
+
+    def get_root_commits(self):
+        return git.get_root_commits(self._repo_location)
+
+    def get_reachable_objects_size(self):
+        return git.get_reachable_objects_size(self._repo_location)
+
+    def get_local_objects_size(self):
+        return git.get_local_objects_size(self._repo_location)
+
     def get_baseline_file(self, baseline_filename):
         return git.get_baseline_file(
             self._repo_location,
@@ -171,14 +397,21 @@ class BaseStorage(object):
 
         return name
 
+    def migrate(self):
+        """Moves entries stored in the legacy flat layout, into their sharded
+        locations.
+
+        :rtype: list
+        :returns: paths of entries moved.
+        """
+        return migrate_to_sharded_layout(os.path.join(self.root, 'repos'))
+
     def _initialize_git_repos_directory(self):
-        git_repos_root = os.path.join(self.root, 'repos')
-        if not os.path.isdir(git_repos_root):
-            os.makedirs(git_repos_root)
+        os.makedirs(os.path.join(self.root, 'repos'), exist_ok=True)
 
     @property
     def _repo_location(self):
-        return get_filepath_safe(
+        return get_sharded_filepath_safe(
             os.path.join(self.root, 'repos'),
             self.hash_filename(self.repository_name),
         )
@@ -216,17 +449,21 @@ class LocalGitRepository(BaseStorage):
             git.get_remote_url(path),
         )
 
-    def clone(self):
+    def clone(self, seed=None, timeout=None):
         """If it is locally on disk, no need to clone it."""
         return
 
-    def fetch_new_changes(self):
+    def fetch_new_changes(self, log_ref_updates=False, ref_patterns=()):
         """The assumption is, if you are scanning a local git repository,
         then you are "actively" working on it. Therefore, this module will
         not bear the responsibility of auto-updating the repo with `git fetch`.
         """
         return
 
+    def maintain(self, force=False, **kwargs):
+        """Similarly, maintenance of local repositories is left to the user."""
+        return None
+
     def _initialize_git_repos_directory(self):
         """Don't need to create a place for tracking git repos"""
         return
@@ -258,3 +495,70 @@ def get_filepath_safe(prefix, file):
         raise ValueError
 
     return filepath
+
+
+# Having tens of thousands of entries in a single directory degrades lookups
+# on most filesystems, so we fan them out by the leading characters of their
+# (hashed) names. e.g. `abcdef...` is stored at `ab/cd/abcdef...`
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+def get_shard_path(file):
+    """
+    :type file: str
+    :rtype: str
+    """
+    return os.path.join(
+        *[
+            file[index * SHARD_WIDTH:(index + 1) * SHARD_WIDTH]
+            for index in range(SHARD_LEVELS)
+        ] + [file]
+    )
+
+
+def get_sharded_filepath_safe(prefix, file):
+    """Like get_filepath_safe, but for the sharded layout. For backwards
+    compatibility, this will return the legacy (flat) path if it exists.
+    """
+    legacy_filepath = get_filepath_safe(prefix, file)
+    if os.path.exists(legacy_filepath):
+        return legacy_filepath
+
+    return get_filepath_safe(prefix, get_shard_path(file))
+
+
+def migrate_to_sharded_layout(directory, excluded=()):
+    """Moves entries directly under `directory` into their sharded locations.
+
+    :type directory: str
+    :type excluded: iterable
+    :param excluded: names of entries that should not be moved.
+
+    :rtype: list
+    :returns: paths of entries moved.
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    moved = []
+    for name in sorted(os.listdir(directory)):
+        # Shard directories are never longer than SHARD_WIDTH.
+        if name in excluded or len(name) <= SHARD_WIDTH:
+            continue
+
+        destination = get_filepath_safe(directory, get_shard_path(name))
+        if os.path.exists(destination):
+            log.warning('Unable to migrate %s: %s already exists', name, destination)
+            continue
+
+        ensure_parent_directory_exists(destination)
+        os.rename(os.path.join(directory, name), destination)
+        moved.append(destination)
+
+    return moved
+
+
+def ensure_parent_directory_exists(filepath):
+    # Others (e.g. concurrent `add` workers) may be creating it at the same time.
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
@@ -0,0 +1,118 @@
+"""Disk budget management for cloned git repositories.
+
+Every tracked repository keeps a bare clone under `<root>/repos`. Left alone,
+this directory grows without bound. This module keeps track of when each clone
+was last used, and evicts the least recently used clones to stay under a given
+disk budget. Evicted repositories are transparently re-cloned on their next scan
+(see BaseStorage.fetch_new_changes).
+"""
+import os
+import shutil
+import time
+
+from detect_secrets.core.log import log
+
+
+# This file is placed within each bare clone, and its mtime denotes the last
+# time the clone was used.
+LAST_ACCESS_FILENAME = 'detect-secrets-server-last-access'
+
+
+class RepositoryCache(object):
+
+    def __init__(self, directory):
+        """
+        :type directory: str
+        :param directory: where git repositories are cloned to.
+        """
+        self.directory = directory
+
+    @staticmethod
+    def record_access(location):
+        """
+        :type location: str
+        :param location: path to bare git repository.
+        """
+        if not os.path.isdir(location):
+            return
+
+        with open(os.path.join(location, LAST_ACCESS_FILENAME), 'a'):
+            pass
+
+        now = time.time()
+        os.utime(os.path.join(location, LAST_ACCESS_FILENAME), (now, now))
+
+    def get_clones(self):
+        """
+        :rtype: list((str, float, int))
+        :returns: (location, last_access_time, size_in_bytes), sorted from least
+            recently used.
+        """
+        output = [
+            (location, _get_last_access_time(location), _get_size(location))
+            for location in self._get_clone_locations()
+        ]
+
+        return sorted(output, key=lambda clone: clone[1])
+
+    def evict(self, max_bytes, keep=()):
+        """Removes least recently used clones, until the total size of all
+        clones is at most max_bytes.
+
+        :type max_bytes: int
+        :type keep: iterable
+        :param keep: locations of clones that should never be evicted.
+
+        :rtype: list
+        :returns: locations of evicted clones.
+        """
+        clones = self.get_clones()
+        total_size = sum(size for _, _, size in clones)
+
+        evicted = []
+        for location, _, size in clones:
+            if total_size <= max_bytes:
+                break
+
+            if location in keep:
+                continue
+
+            log.info('Evicting %s to free %d bytes', location, size)
+            shutil.rmtree(location)
+
+            total_size -= size
+            evicted.append(location)
+
+        if total_size > max_bytes:
+            log.warning(
+                'Unable to reduce clones in %s to %d bytes (currently %d bytes)',
+                self.directory,
+                max_bytes,
+                total_size,
+            )
+
+        return evicted
+
+    def _get_clone_locations(self):
+        """Supports both the sharded, and legacy (flat) layout."""
+        for root, directories, files in os.walk(self.directory):
+            if 'HEAD' in files and 'objects' in directories:
+                directories[:] = []
+                yield root
+
+
+def _get_last_access_time(location):
+    try:
+        return os.path.getmtime(os.path.join(location, LAST_ACCESS_FILENAME))
+    except OSError:
+        # Clones created before access was recorded.
+        return os.path.getmtime(location)
+
+
+def _get_size(location):
+    output = 0
+    for root, _, files in os.walk(location):
+        for filename in files:
+            output += os.lstat(os.path.join(root, filename)).st_size
+
+    return output
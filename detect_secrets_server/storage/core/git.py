@@ -1,8 +1,10 @@
 """Collection of all git command interactions"""
 import os
+import posixpath
 import re
 import subprocess
 import sys
+import tempfile
 
 from detect_secrets.core.log import log
 
@@ -10,6 +12,9 @@ from detect_secrets_server.constants import IGNORED_FILE_EXTENSIONS
 
 GIT_EMPTY_TREE_HASH = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
 
+# Number of .gitattributes files to look for at a time.
+ATTRIBUTES_BATCH_SIZE = 500
+
 
 def get_last_commit_hash(directory):
     return _git(
@@ -23,26 +28,55 @@ def get_empty_tree_commit_hash():
     return GIT_EMPTY_TREE_HASH
 
 
-def clone_repo_to_location(repo, directory):
+def clone_repo_to_location(
+    repo,
+    directory,
+    reference=None,
+    dissociate=False,
+    timeout=None,
+):
     """
     :type repo: str
     :param repo: git url to clone
 
     :type directory: str
     :param directory: local directory path
+
+    :type reference: str|None
+    :param reference: path to a local repository to borrow objects from,
+        through git alternates.
+
+    :type dissociate: bool
+    :param dissociate: if True, objects are only copied from reference during
+        the clone (rather than borrowed), and reference is ignored if it is
+        not a valid repository.
+
+    :type timeout: int|None
+    :param timeout: seconds, after which the clone is aborted with
+        subprocess.TimeoutExpired.
     """
+    git_args = [
+        'git', 'clone',
+        repo,
+        directory,
+
+        # We clone a bare repo, because we're not interested in the
+        # files themselves. This will be more space efficient.
+        '--bare',
+    ]
+    if reference and dissociate:
+        git_args.extend(['--reference-if-able', reference, '--dissociate'])
+    elif reference:
+        git_args.extend(['--reference', reference])
+
     try:
         # We need to run it through check_output, because we want to trigger
         # a subprocess.CalledProcessError upon failure.
-        subprocess.check_output([
-            'git', 'clone',
-            repo,
-            directory,
-
-            # We clone a bare repo, because we're not interested in the
-            # files themselves. This will be more space efficient.
-            '--bare',
-        ], stderr=subprocess.STDOUT)
+        subprocess.check_output(
+            git_args,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+        )
     except subprocess.CalledProcessError as e:
         error_message = e.output.decode('utf-8')
 
@@ -55,10 +89,28 @@ def clone_repo_to_location(repo, directory):
             raise
 
 
-def fetch_new_changes(directory):
+def fetch_new_changes(
+    directory,
+    timeout=None,
+    log_ref_updates=False,
+    ref_patterns=(),
+):
+    """
+    :type log_ref_updates: bool
+    :param log_ref_updates: if True, records the update in the main branch's
+        reflog (which bare clones don't keep, by default). See get_ref_history.
+
+    :type ref_patterns: iterable(str)
+    :param ref_patterns: other refs to update, in the same fetch.
+        e.g. `refs/pull/*/head`
+    """
     main_branch = _get_main_branch(directory)
-    _git(
-        directory,
+
+    git_args = []
+    if log_ref_updates:
+        git_args.extend(['-c', 'core.logAllRefUpdates=always'])
+
+    git_args.extend([
         'fetch',
         '--quiet',
         'origin',
@@ -67,6 +119,528 @@ def fetch_new_changes(directory):
             main_branch,
         ),
         '--force',
+    ])
+    git_args.extend(
+        '+{0}:{0}'.format(pattern)
+        for pattern in ref_patterns
+    )
+    _git(directory, *git_args, timeout=timeout)
+
+
+def set_remote_url(directory, url):
+    _git(
+        directory,
+        'remote',
+        'set-url',
+        'origin',
+        url,
+    )
+
+
+def initialize_bare_repo(directory):
+    _git(
+        directory,
+        'init',
+        '--bare',
+        '--quiet',
+    )
+
+
+def fetch_into_namespace(directory, repo, namespace):
+    """Fetches all branches of repo, into `refs/remotes/<namespace>/*`.
+    This allows multiple repositories to share the same object store, without
+    their refs colliding (or being garbage collected).
+    """
+    _git(
+        directory,
+        'fetch',
+        '--quiet',
+        repo,
+        '+refs/heads/*:refs/remotes/{}/*'.format(namespace),
+    )
+
+
+def get_root_commits(directory):
+    return _git(
+        directory,
+        'rev-list',
+        '--max-parents=0',
+        'HEAD',
+    ).splitlines()
+
+
+def repack(directory):
+    _git(
+        directory,
+        'repack',
+        '-a',
+        '-d',
+        '-q',
+    )
+
+
+def repack_without_alternate_objects(directory):
+    """Removes objects from the local object store, that are already
+    available through git alternates.
+    """
+    _git(
+        directory,
+        'repack',
+        '-a',
+        '-d',
+        '-l',
+        '-q',
+    )
+    _git(
+        directory,
+        'prune-packed',
+        '-q',
+    )
+
+
+def get_reachable_objects_size(directory):
+    """
+    :rtype: int
+    :returns: on-disk size (in bytes) of all objects reachable from any ref,
+        including those borrowed through git alternates.
+    """
+    return int(
+        _git(
+            directory,
+            'rev-list',
+            '--all',
+            '--objects',
+            '--disk-usage',
+        ) or 0
+    )
+
+
+def get_local_objects_size(directory):
+    """
+    :rtype: int
+    :returns: on-disk size (in bytes) of objects stored in this repository.
+    """
+    output = get_object_statistics(directory)
+
+    # These are reported in KiB.
+    return (output.get('size', 0) + output.get('size-pack', 0)) * 1024
+
+
+def get_object_statistics(directory):
+    """
+    :rtype: dict
+    :returns: output of `git count-objects -v`, e.g.
+        {'count': 0, 'size': 0, 'in-pack': 42, 'packs': 1, 'size-pack': 12, ...}
+    """
+    output = {}
+    for line in _git(directory, 'count-objects', '-v').splitlines():
+        key, value = line.split(':', 1)
+        try:
+            output[key.strip()] = int(value.strip())
+        except ValueError:  # pragma: no cover
+            pass
+
+    return output
+
+
+def write_commit_graph(directory):
+    """Commit graphs speed up history traversal (e.g. `rev-list`, `log`,
+    `merge-base`), by not having to parse each commit object.
+    """
+    _git(
+        directory,
+        'commit-graph',
+        'write',
+        '--reachable',
+        '--split',
+    )
+
+
+def repack_incrementally(directory):
+    """Rather than rewriting everything into a single pack, this only
+    combines packs until their sizes form a geometric progression. This keeps
+    the number of packs (and therefore object lookups) logarithmic, at a
+    fraction of the cost of a full repack. The multi-pack-index lets a single
+    lookup cover all remaining packs.
+    """
+    _git(
+        directory,
+        'repack',
+        '-d',
+        '-q',
+        '--geometric=2',
+        '--write-midx',
+    )
+
+
+def prune(directory):
+    # This grace period avoids racing with concurrent fetches.
+    _git(
+        directory,
+        'prune',
+        '--expire=2.weeks.ago',
+    )
+
+
+def log_recent_changes(directory, max_count=50):
+    """This is a standard workload for benchmarking object access: it
+    diffs each of the most recent commits against its parent.
+    """
+    return _git(
+        directory,
+        'log',
+        '--max-count={}'.format(max_count),
+        '--raw',
+        '--format=%H',
+        'HEAD',
+    )
+
+
+def get_commit_count(directory, from_sha):
+    """
+    :rtype: int
+    :returns: number of commits between from_sha and HEAD.
+    """
+    return int(
+        _git(
+            directory,
+            'rev-list',
+            '--count',
+            '{}..HEAD'.format(from_sha),
+        ) or 0
+    )
+
+
+def get_commit_timestamps(directory, since):
+    """
+    :type since: int
+    :param since: timestamp, from which to retrieve commits.
+
+    :rtype: list(int)
+    :returns: commit timestamps of HEAD's history, in ascending order.
+    """
+    output = _git(
+        directory,
+        'log',
+        '--format=%ct',
+        '--since={}'.format(since),
+        'HEAD',
+    )
+
+    return sorted(int(line) for line in (output or '').splitlines())
+
+
+def get_commits_since(directory, from_sha, exclude=()):
+    """Merges are treated as single commits, by following first parents.
+    This keeps history linear, so that any of these commits can be used as
+    a starting point.
+
+    :type exclude: iterable(str)
+    :param exclude: commits whose history should be skipped.
+
+    :rtype: list(tuple(str, str, str|None))
+    :returns: (first parent, commit hash, author email) of each commit after
+        from_sha, up to HEAD, oldest first. Merges have no author, since
+        they include changes made by others.
+    """
+    return _get_commits(
+        directory,
+        '--first-parent',
+        '{}..HEAD'.format(from_sha),
+        *_exclude_commits(exclude)
+    )
+
+
+def get_ref_commits(directory, sha, exclude=()):
+    """Unlike get_commits_since, merges are skipped entirely, since their
+    changes are made on other refs.
+
+    :type exclude: iterable(str)
+    :param exclude: commits whose history should be skipped.
+
+    :rtype: list(tuple(str, str, str))
+    :returns: (first parent, commit hash, author email) of each commit in
+        sha's history, oldest first.
+    """
+    return _get_commits(
+        directory,
+        '--no-merges',
+        sha,
+        *_exclude_commits(exclude)
+    )
+
+
+def get_merged_parents(directory, sha):
+    """
+    :rtype: list(str)
+    :returns: parents of sha, other than its first parent (i.e. the commits
+        it merges, if any).
+    """
+    return _git(
+        directory,
+        'rev-list',
+        '--parents',
+        '-n', '1',
+        sha,
+    ).split()[2:]
+
+
+def get_refs(directory, patterns):
+    """
+    :type patterns: iterable(str)
+    :param patterns: e.g. `refs/pull/*/head`
+
+    :rtype: dict(str, str)
+    :returns: mapping of ref name to commit hash, for refs matching patterns.
+    """
+    output = _git(
+        directory,
+        'for-each-ref',
+        '--format=%(refname) %(objectname)',
+        *patterns
+    )
+
+    return dict(
+        line.split(' ', 1)
+        for line in output.splitlines()
+    )
+
+
+def get_changed_blobs(directory, parent, sha):
+    """
+    :rtype: list(tuple(str, str))
+    :returns: (blob hash, filename) of each file added or modified between
+        parent and sha.
+    """
+    output = _git(
+        directory,
+        'diff-tree',
+        '-r',
+        '--diff-filter', 'AM',
+        parent,
+        sha,
+    )
+
+    blobs = []
+    for line in output.splitlines():
+        # Each line looks like `:<old mode> <new mode> <old blob> <new blob> <status>\t<filename>`
+        metadata, filename = line.split('\t', 1)
+        if os.path.splitext(filename)[1] in IGNORED_FILE_EXTENSIONS:
+            continue
+
+        blobs.append((metadata.split()[3], filename))
+
+    return blobs
+
+
+def get_commit_diff(directory, parent, sha, files):
+    """
+    :type files: list(str)
+    :param files: filenames to include in the diff.
+    """
+    return _git(
+        directory,
+        'diff-tree',
+        '-p',
+        parent,
+        sha,
+        '--',
+        *files,
+        should_strip_output=False
+    )
+
+
+def get_attributes_files(directory, sha, directories):
+    """
+    :type directories: iterable(str)
+    :param directories: relative to the root of the repository, which is ''.
+
+    :rtype: dict
+    :returns: mapping of directory to the contents of its .gitattributes
+        file at sha, for those that have one.
+    """
+    paths = [
+        posixpath.join(path, '.gitattributes')
+        for path in directories
+    ]
+
+    output = {}
+    # Listed in batches, so that the argument list doesn't get too long.
+    for index in range(0, len(paths), ATTRIBUTES_BATCH_SIZE):
+        listing = _git(
+            directory,
+            'ls-tree',
+            sha,
+            '--',
+            *paths[index:index + ATTRIBUTES_BATCH_SIZE]
+        )
+
+        # Each line looks like `<mode> <type> <object>\t<path>`
+        for line in (listing or '').splitlines():
+            metadata, path = line.split('\t', 1)
+            output[posixpath.dirname(path)] = _git(
+                directory,
+                'cat-file',
+                'blob',
+                metadata.split()[2],
+                should_strip_output=False
+            )
+
+    return output
+
+
+def get_blob_introductions(directory, exclude_files_regex=None):
+    """Streams the changes made by each commit, on all branches, so that they
+    never need to fit in memory at once. To list commits oldest first, git
+    walks the whole history before the first one is listed, but it only
+    keeps the commits themselves (not their changes) in memory.
+
+    :type exclude_files_regex: str|None
+    :param exclude_files_regex: versions of files at matching paths are skipped,
+        but are still listed if they appear at other paths later.
+
+    :rtype: generator(tuple(str, str, str, str))
+    :returns: (blob hash, filename, commit hash, author email) for each version
+        of each file, the first time it appears, oldest first.
+    """
+    exclude_files = None
+    if exclude_files_regex:
+        exclude_files = re.compile(exclude_files_regex, re.IGNORECASE)
+
+    seen = set()
+    commit = author = None
+    for line in _stream_git(
+        directory,
+        'log',
+        '--all',
+        '--reverse',
+
+        # Merge commits are diffed against each of their parents, since a
+        # version of a file may first appear when resolving a merge.
+        '-m',
+        '--no-renames',
+        '--raw',
+        '--no-abbrev',
+        '--diff-filter', 'AM',
+        '--format=%x00%H %ae',
+    ):
+        if line.startswith('\0'):
+            commit, author = line[1:].split(' ', 1)
+            continue
+
+        if not line.startswith(':'):
+            continue
+
+        # Each line looks like `:<old mode> <new mode> <old blob> <new blob> <status>\t<filename>`
+        metadata, filename = line.split('\t', 1)
+        blob = metadata.split()[3]
+        if (
+            blob in seen
+            or
+            os.path.splitext(filename)[1] in IGNORED_FILE_EXTENSIONS
+            or
+            (exclude_files and exclude_files.search(filename))
+        ):
+            continue
+
+        seen.add(blob)
+        yield blob, filename, commit, author
+
+
+class BlobReader(object):
+    """Reads blobs through a single `git cat-file --batch` process, rather
+    than starting a new process for each of them.
+    """
+
+    def __init__(self, directory):
+        self.process = subprocess.Popen(
+            [
+                'git',
+                '--git-dir', directory,
+                'cat-file',
+                '--batch',
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, blob):
+        """
+        :type blob: str
+        :rtype: bytes|None
+        :returns: contents of blob, if it exists.
+        """
+        self.process.stdin.write(blob.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+
+        # Each object looks like `<hash> <type> <size>\n<contents>\n`
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            return None
+
+        content = self.process.stdout.read(int(header[2]))
+        self.process.stdout.read(1)
+
+        return content
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+def get_ref_history(directory):
+    """The main branch's reflog is read directly, rather than through
+    `git reflog`, since commits that were rewritten may have since been
+    pruned.
+
+    :rtype: list(str)
+    :returns: commit hashes the main branch has pointed to, most recent first.
+        These may no longer exist.
+    """
+    filename = os.path.join(
+        directory,
+        'logs',
+        'refs',
+        'heads',
+        _get_main_branch(directory),
+    )
+    try:
+        with open(filename) as f:
+            lines = f.read().splitlines()
+    except IOError:
+        return []
+
+    history = []
+    for line in reversed(lines):
+        # Each line looks like `<old sha> <new sha> <committer> <time>\t<reason>`
+        shas = line.split(' ', 2)[:2]
+        for sha in reversed(shas):
+            if sha.strip('0') and sha not in history[-1:]:
+                history.append(sha)
+
+    return history
+
+
+def get_merge_base(directory, sha):
+    """
+    :raises: subprocess.CalledProcessError
+        if sha does not exist, or does not share history with HEAD.
+
+    :rtype: str
+    :returns: the most recent commit in both sha's and HEAD's history.
+    """
+    return _git(
+        directory,
+        'merge-base',
+        sha,
+        'HEAD',
     )
 
 
@@ -174,6 +748,38 @@ def get_blame(directory, filename, line_number):
     )
 
 
+def _get_commits(directory, history, *revisions):
+    output = _git(
+        directory,
+        'log',
+        '--reverse',
+        history,
+        '--format=%H %P%x09%ae',
+        *revisions
+    )
+
+    commits = []
+    for line in output.splitlines():
+        shas, author = line.split('\t', 1)
+        shas = shas.split()
+
+        commits.append((
+            shas[1] if len(shas) > 1 else GIT_EMPTY_TREE_HASH,
+            shas[0],
+            author if len(shas) <= 2 else None,
+        ))
+
+    return commits
+
+
+def _exclude_commits(shas):
+    shas = list(shas)
+    if not shas:
+        return []
+
+    return ['--not'] + shas
+
+
 def _get_main_branch(directory):
     """While this is `master` most of the time, there are some exceptions"""
     return _git(
@@ -201,6 +807,42 @@ def _filter_filenames_from_diff(directory, last_commit_hash):
     ]
 
 
+def _stream_git(directory, *args):
+    """Like _git, but yields each line of output as soon as it is available.
+
+    :raises: subprocess.CalledProcessError
+    """
+    # stderr isn't read until git exits, so it goes to a file: a pipe could
+    # fill up, and block git from writing any more output.
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            [
+                'git',
+                '--git-dir', directory,
+            ] + list(args),
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+        )
+
+        try:
+            for line in process.stdout:
+                yield line.decode('utf-8', errors='ignore').rstrip('\n')
+        finally:
+            # If we stop early, git is terminated by SIGPIPE.
+            process.stdout.close()
+            returncode = process.wait()
+
+            stderr.seek(0)
+            error_message = stderr.read()
+
+    if returncode:
+        raise subprocess.CalledProcessError(
+            returncode,
+            ['git'] + list(args),
+            error_message,
+        )
+
+
 def _git(directory, *args, **kwargs):
     try:
         output = subprocess.check_output(
@@ -208,7 +850,8 @@ def _git(directory, *args, **kwargs):
                 'git',
                 '--git-dir', directory,
             ] + list(args),
-            stderr=subprocess.STDOUT
+            stderr=subprocess.STDOUT,
+            timeout=kwargs.get('timeout'),
         ).decode('utf-8', errors='ignore')
 
         # This is to fix https://github.com/matiasb/python-unidiff/issues/54
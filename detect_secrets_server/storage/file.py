@@ -2,8 +2,14 @@ import json
 import os
 
 from .base import BaseStorage
+from .base import ensure_parent_directory_exists
 from .base import get_filepath_safe
+from .base import get_shard_path
+from .base import get_sharded_filepath_safe
 from .base import LocalGitRepository
+from .base import migrate_to_sharded_layout
+from .lease import FileLease
+from .lease import LeaseUnavailable
 
 
 class FileStorage(BaseStorage):
@@ -12,15 +18,16 @@ class FileStorage(BaseStorage):
     Structure:
         root
           |- repos      # This is where git repos are cloned to
-          |- tracked    # This is where meta files containing state reside
+          |- tracked    # This is where meta files containing state reside,
+                        # sharded in the same way as `repos`.
+          |- locks      # Leases for repositories being scanned, sharded
+                        # in the same way.
     """
 
-    def setup(self, repo_url):
-        super(FileStorage, self).setup(repo_url)
+    def setup(self, repo_url, object_pool=None):
+        super(FileStorage, self).setup(repo_url, object_pool)
 
-        storage_root = os.path.join(self.root, 'tracked')
-        if not os.path.isdir(storage_root):
-            os.makedirs(storage_root)
+        os.makedirs(os.path.join(self.root, 'tracked'), exist_ok=True)
 
         return self
 
@@ -38,46 +45,68 @@ class FileStorage(BaseStorage):
         :raises: ValueError
         """
         filename = self.get_tracked_file_location(key)
+        ensure_parent_directory_exists(filename)
         with open(filename, 'w') as f:
             f.write(json.dumps(value, indent=2, sort_keys=True))
 
     def get_tracked_file_location(self, key):
-        return get_filepath_safe(
+        return get_sharded_filepath_safe(
             os.path.join(self.root, 'tracked'),
             '{}.json'.format(key),
         )
 
+    def acquire_lease(self, key, ttl):
+        """
+        :type key: str
+        :param key: same as the tracked file's key.
+
+        :type ttl: int
+        :param ttl: seconds
+
+        :rtype: detect_secrets_server.storage.lease.Lease|None
+        :returns: None, if the repository is leased by someone else.
+        """
+        filename = get_filepath_safe(
+            os.path.join(self.root, 'locks'),
+            get_shard_path('{}.lock'.format(key)),
+        )
+        ensure_parent_directory_exists(filename)
+
+        try:
+            return FileLease(filename, ttl)
+        except LeaseUnavailable:
+            return None
+
     def get_tracked_repositories(self):
         filepath = get_filepath_safe(
             self.root,
             'tracked',
         )
 
-        for root, _, files in os.walk(filepath):
-            for filename in files:
-                with open(os.path.join(root, filename)) as f:
-                    yield json.loads(f.read()), False
+        for filename in _get_tracked_filenames(filepath, excluded=('local',)):
+            with open(filename) as f:
+                yield json.loads(f.read()), False
 
-            break
+    def migrate(self):
+        return super(FileStorage, self).migrate() + migrate_to_sharded_layout(
+            os.path.join(self.root, 'tracked'),
+            excluded=('local',),
+        )
 
 
 class FileStorageWithLocalGit(LocalGitRepository, FileStorage):
 
-    def setup(self, repo_url):
-        super(FileStorage, self).setup(repo_url)
+    def setup(self, repo_url, object_pool=None):
+        super(FileStorage, self).setup(repo_url, object_pool)
 
-        storage_root = os.path.join(self.root, 'tracked')
-        if not os.path.isdir(storage_root):
-            os.makedirs(storage_root)
+        os.makedirs(os.path.join(self.root, 'tracked'), exist_ok=True)
 
-        local_storage_root = os.path.join(self.root, 'tracked', 'local')
-        if not os.path.isdir(local_storage_root):
-            os.makedirs(local_storage_root)
+        os.makedirs(os.path.join(self.root, 'tracked', 'local'), exist_ok=True)
 
         return self
 
     def get_tracked_file_location(self, key):
-        return get_filepath_safe(
+        return get_sharded_filepath_safe(
             os.path.join(self.root, 'tracked', 'local'),
             '{}.json'.format(key),
         )
@@ -91,9 +120,29 @@ class FileStorageWithLocalGit(LocalGitRepository, FileStorage):
             'local',
         )
 
-        for root, _, files in os.walk(filepath):
-            for filename in files:
-                with open(os.path.join(root, filename)) as f:
-                    yield json.loads(f.read()), True
+        for filename in _get_tracked_filenames(filepath):
+            with open(filename) as f:
+                yield json.loads(f.read()), True
+
+    def migrate(self):
+        return super(FileStorageWithLocalGit, self).migrate() + migrate_to_sharded_layout(
+            os.path.join(self.root, 'tracked', 'local'),
+        )
 
-            break
+
+def _get_tracked_filenames(directory, excluded=()):
+    """Supports both the sharded, and legacy (flat) layout.
+
+    :type excluded: iterable
+    :param excluded: names of top-level directories to skip over.
+    """
+    for root, directories, files in os.walk(directory):
+        if root == directory:
+            directories[:] = [
+                name
+                for name in directories
+                if name not in excluded
+            ]
+
+        for filename in files:
+            yield os.path.join(root, filename)
@@ -0,0 +1,98 @@
+"""Leases prevent the same repository from being scanned concurrently (by
+overlapping cron jobs, `serve` workers, or multiple hosts sharing the same
+tracked repositories), which would otherwise fetch into the same clone,
+alert twice, and race to save state.
+
+A lease is held by a single owner until it is released, or until its TTL
+expires (so that a crashed owner doesn't block scans forever).
+"""
+import errno
+import fcntl
+import json
+import os
+import socket
+import time
+from abc import ABCMeta
+from abc import abstractmethod
+
+
+class Lease(object):
+    __metaclass__ = ABCMeta
+
+    def __init__(self, ttl):
+        """
+        :type ttl: int
+        :param ttl: seconds, after which the lease may be taken over.
+        """
+        self.owner = get_lease_owner()
+        self.expires = int(time.time() + ttl)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    @abstractmethod
+    def release(self):
+        """Allows others to acquire the lease."""
+        pass
+
+    def json(self):
+        return {
+            'owner': self.owner,
+            'expires': self.expires,
+        }
+
+
+class FileLease(Lease):
+    """An exclusive `flock` on a file under root/locks. The kernel releases it
+    when its owner exits, so unlike other leases, it never needs to be taken
+    over after a crash: the TTL is only recorded for visibility.
+    """
+
+    def __init__(self, filename, ttl):
+        """
+        :type filename: str
+        :raises: LeaseUnavailable
+        """
+        super(FileLease, self).__init__(ttl)
+        self.filename = filename
+
+        self.fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as e:
+            os.close(self.fd)
+            self.fd = None
+
+            if e.errno in (errno.EAGAIN, errno.EACCES):
+                raise LeaseUnavailable(filename)
+
+            raise
+
+        os.ftruncate(self.fd, 0)
+        os.write(self.fd, json.dumps(self.json()).encode('utf-8'))
+
+    def release(self):
+        if self.fd is None:
+            return
+
+        # The file itself is left behind, since removing it would race with
+        # others opening it.
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
+
+
+class LeaseUnavailable(Exception):
+    """Raised when a lease is currently held by someone else."""
+    pass
+
+
+def get_lease_owner():
+    """
+    :rtype: str
+    :returns: identifies this process, across hosts.
+    """
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
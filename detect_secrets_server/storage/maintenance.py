@@ -0,0 +1,115 @@
+"""Background maintenance for cloned git repositories.
+
+Every `fetch_new_changes` adds a new pack to the clone. Left alone, the growing
+number of packs (and loose objects) makes every object lookup slower, and
+therefore `rev-parse`, `diff` and `blame` as well. This module decides when a
+clone needs maintenance, performs it, and records how long a standard diff took
+before and after, so that the benefit is measurable.
+"""
+import json
+import os
+import time
+
+from detect_secrets.core.log import log
+
+from .core import git
+
+
+# This file is placed within each bare clone, and holds the report of the most
+# recent maintenance.
+MAINTENANCE_FILENAME = 'detect-secrets-server-maintenance'
+
+DEFAULT_MAX_PACKS = 10
+DEFAULT_MAX_LOOSE_SIZE = 16 * 1024 ** 2
+
+
+class RepositoryMaintenance(object):
+
+    def __init__(
+        self,
+        location,
+        max_packs=DEFAULT_MAX_PACKS,
+        max_loose_size=DEFAULT_MAX_LOOSE_SIZE,
+    ):
+        """
+        :type location: str
+        :param location: path to bare git repository.
+
+        :type max_packs: int
+        :param max_packs: maintenance is needed when there are more packs
+            than this.
+
+        :type max_loose_size: int
+        :param max_loose_size: maintenance is needed when loose objects take
+            up more than this many bytes.
+        """
+        self.location = location
+        self.max_packs = max_packs
+        self.max_loose_size = max_loose_size
+
+    def is_needed(self, statistics=None):
+        """
+        :type statistics: dict|None
+        :param statistics: output of git.get_object_statistics, if already
+            computed.
+
+        :rtype: bool
+        """
+        if statistics is None:
+            statistics = git.get_object_statistics(self.location)
+
+        return (
+            statistics.get('packs', 0) > self.max_packs
+            or statistics.get('size', 0) * 1024 > self.max_loose_size
+        )
+
+    def run(self, force=False):
+        """
+        :type force: bool
+        :param force: perform maintenance, even if not needed.
+
+        :rtype: dict|None
+        :returns: report of maintenance performed, if any.
+        """
+        before = git.get_object_statistics(self.location)
+        if not force and not self.is_needed(before):
+            return None
+
+        log.info('Performing maintenance on %s', self.location)
+        diff_seconds_before = self._time_standard_diff()
+
+        git.repack_incrementally(self.location)
+        git.prune(self.location)
+        git.write_commit_graph(self.location)
+
+        after = git.get_object_statistics(self.location)
+        report = {
+            'packs_before': before.get('packs', 0),
+            'packs_after': after.get('packs', 0),
+            'loose_objects_before': before.get('count', 0),
+            'loose_objects_after': after.get('count', 0),
+            'diff_seconds_before': diff_seconds_before,
+            'diff_seconds_after': self._time_standard_diff(),
+            'timestamp': int(time.time()),
+        }
+
+        with open(os.path.join(self.location, MAINTENANCE_FILENAME), 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+        return report
+
+    def get_last_report(self):
+        """
+        :rtype: dict|None
+        """
+        try:
+            with open(os.path.join(self.location, MAINTENANCE_FILENAME)) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def _time_standard_diff(self):
+        start = time.time()
+        git.log_recent_changes(self.location)
+
+        return round(time.time() - start, 4)
@@ -0,0 +1,140 @@
+"""Shared object stores for related repositories.
+
+Many tracked repositories are forks of the same upstream. Rather than storing
+(and fetching) their common history once per clone, repositories in the same
+group borrow objects from a shared bare repository (the "pool"), through
+git alternates.
+
+Structure:
+    root
+      |- pools
+           |- <hashed pool name>    # bare repository, with each member's
+                                    # branches under refs/remotes/<member>/*
+
+Members of the same pool may be added (or scanned) concurrently, so the pool
+is set up and fetched into while holding a lock on a file inside it.
+"""
+import fcntl
+import hashlib
+import os
+from contextlib import contextmanager
+
+from .core import git
+
+
+class ObjectPool(object):
+
+    def __init__(self, root, name):
+        """
+        :type root: str
+        :param root: same as BaseStorage.root
+
+        :type name: str
+        :param name: pools are identified by name, so that they can be
+            explicitly configured.
+        """
+        self.name = name
+        self.location = os.path.join(
+            root,
+            'pools',
+            hashlib.sha512(name.encode('utf-8')).hexdigest(),
+        )
+
+    def setup(self):
+        """:returns: self, for better chaining"""
+        os.makedirs(self.location, exist_ok=True)
+        with self._lock():
+            if not os.path.isfile(os.path.join(self.location, 'HEAD')):
+                git.initialize_bare_repo(self.location)
+
+        return self
+
+    def fetch(self, repo_url, member_name):
+        """Fetches a member's objects into the pool. Objects shared with other
+        members will already be in the pool, so they won't be fetched again.
+        """
+        with self._lock():
+            git.fetch_into_namespace(
+                self.location,
+                repo_url,
+                hashlib.sha1(member_name.encode('utf-8')).hexdigest(),
+            )
+
+    def attach(self, location):
+        """Makes an existing clone borrow objects from this pool, and removes
+        its own copy of those objects.
+
+        :type location: str
+        :param location: path to bare git repository.
+        """
+        alternates = os.path.join(location, 'objects', 'info', 'alternates')
+        os.makedirs(os.path.dirname(alternates), exist_ok=True)
+
+        objects_directory = os.path.join(self.location, 'objects')
+        if os.path.exists(alternates):
+            with open(alternates) as f:
+                if objects_directory in f.read().splitlines():
+                    return
+
+        with open(alternates, 'a') as f:
+            f.write(objects_directory + '\n')
+
+        # Loose objects can't be de-duplicated against alternates, so we
+        # make sure everything is packed first.
+        with self._lock():
+            git.repack(self.location)
+        git.repack_without_alternate_objects(location)
+
+    def get_report(self, members):
+        """
+        :type members: list(BaseStorage)
+        :param members: storage for repositories borrowing from this pool.
+
+        :rtype: dict
+        """
+        pool_size = git.get_local_objects_size(self.location)
+
+        # Without the pool, each member would need to store every object it
+        # can reach. With the pool, it only stores the ones the pool doesn't have.
+        standalone_size = 0
+        local_size = 0
+        for storage in members:
+            standalone_size += storage.get_reachable_objects_size()
+            local_size += storage.get_local_objects_size()
+
+        return {
+            'pool': self.name,
+            'repos': len(members),
+            'pool_size': pool_size,
+            'disk_saved': standalone_size - local_size - pool_size,
+        }
+
+    @contextmanager
+    def _lock(self):
+        """Blocks until no one else (in this, or any other process) holds the
+        lock on this pool.
+        """
+        fd = os.open(
+            os.path.join(self.location, 'pool.lock'),
+            os.O_RDWR | os.O_CREAT,
+            0o644,
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock.
+            os.close(fd)
+
+
+def get_pool_name_for_root_commits(root_commits):
+    """Repositories that share a root commit share history, so they should
+    share a pool.
+
+    :type root_commits: list
+    :rtype: str|None
+    """
+    if not root_commits:
+        return None
+
+    return 'root-{}'.format(sorted(root_commits)[0])
@@ -1,9 +1,18 @@
+import json
 import os
+import time
 
+from .base import ensure_parent_directory_exists
 from .file import FileStorage
 from .file import FileStorageWithLocalGit
+from .lease import Lease
 from detect_secrets_server.core.usage.s3 import should_enable_s3_options
 
+try:
+    FileNotFoundError
+except NameError:  # pragma: no cover
+    FileNotFoundError = IOError
+
 
 class S3Storage(FileStorage):
     """For file state management, backed to Amazon S3.
@@ -27,14 +36,25 @@ class S3Storage(FileStorage):
         self._initialize_client()
 
     def get(self, key, force_download=True):
-        """Downloads file from S3 into local storage."""
+        """Downloads file from S3 into local storage.
+
+        :raises: FileNotFoundError
+        :raises: ValueError
+        """
         file_on_disk = self.get_tracked_file_location(key)
         if force_download or not os.path.exists(file_on_disk):
-            self.client.download_file(
-                Bucket=self.bucket_name,
-                Key=self.get_s3_tracked_file_location(key),
-                Filename=file_on_disk,
-            )
+            ensure_parent_directory_exists(file_on_disk)
+            try:
+                self.client.download_file(
+                    Bucket=self.bucket_name,
+                    Key=self.get_s3_tracked_file_location(key),
+                    Filename=file_on_disk,
+                )
+            except self.client.exceptions.ClientError as e:
+                if _is_missing(e):
+                    raise FileNotFoundError(self.get_s3_tracked_file_location(key))
+
+                raise
 
         return super(S3Storage, self).get(key)
 
@@ -50,7 +70,11 @@ class S3Storage(FileStorage):
         )
         for page in pages:
             for obj in page['Contents']:
-                filename = os.path.splitext(obj['Key'][len(self.prefix):])[0]
+                filename, extension = os.path.splitext(obj['Key'][len(self.prefix):])
+                if extension != '.json':
+                    # e.g. leases
+                    continue
+
                 if filename.startswith('/'):
                     filename = filename[1:]
 
@@ -66,6 +90,71 @@ class S3Storage(FileStorage):
                     None,
                 )
 
+    def acquire_lease(self, key, ttl):
+        """Leases are stored alongside tracked files, and created (or taken
+        over, once expired) with conditional writes, so that only one host
+        can succeed.
+
+        :type key: str
+        :param key: same as the tracked file's key.
+
+        :type ttl: int
+        :param ttl: seconds
+
+        :rtype: S3Lease|None
+        :returns: None, if the repository is leased by someone else.
+        """
+        lease = S3Lease(self, self.get_s3_lease_location(key), ttl)
+        try:
+            response = self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=lease.key,
+                Body=json.dumps(lease.json()),
+                IfNoneMatch='*',
+            )
+        except self.client.exceptions.ClientError as e:
+            if not _is_precondition_failure(e):
+                raise
+
+            response = self._take_over_expired_lease(lease)
+            if not response:
+                return None
+
+        lease.etag = response['ETag']
+        return lease
+
+    def _take_over_expired_lease(self, lease):
+        try:
+            existing = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=lease.key,
+            )
+        except self.client.exceptions.ClientError:
+            # e.g. it was just released. We'll get it next time.
+            return None
+
+        try:
+            expires = json.loads(existing['Body'].read())['expires']
+        except (ValueError, KeyError):
+            expires = 0
+
+        if expires > time.time():
+            return None
+
+        try:
+            return self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=lease.key,
+                Body=json.dumps(lease.json()),
+                IfMatch=existing['ETag'],
+            )
+        except self.client.exceptions.ClientError as e:
+            if not _is_precondition_failure(e):
+                raise
+
+            # Someone else took it over first.
+            return None
+
     def upload(self, key, value):
         """This is different than `put`, to support situations where you
         may want to upload locally, but not to be sync'ed with the cloud.
@@ -119,6 +208,65 @@ class S3Storage(FileStorage):
             key + '.json'
         )
 
+    def get_s3_lease_location(self, key):
+        return os.path.join(
+            self.prefix,
+            'locks',
+            key + '.lock',
+        )
+
 
 class S3StorageWithLocalGit(S3Storage, FileStorageWithLocalGit):
     pass
+
+
+class S3Lease(Lease):
+
+    def __init__(self, storage, key, ttl):
+        """
+        :type storage: S3Storage
+        :type key: str
+        :param key: S3 key of the lease object.
+        """
+        super(S3Lease, self).__init__(ttl)
+        self.storage = storage
+        self.key = key
+        self.etag = None
+
+    def release(self):
+        """Only deletes the lease if it is still ours, i.e. it hasn't expired,
+        and been taken over since. This is a conditional delete, so that it
+        can't race with someone else taking it over.
+        """
+        if not self.etag:
+            return
+
+        client = self.storage.client
+        try:
+            client.delete_object(
+                Bucket=self.storage.bucket_name,
+                Key=self.key,
+                IfMatch=self.etag,
+            )
+        except client.exceptions.ClientError as e:
+            # Otherwise, it has already been taken over (or deleted).
+            if not (_is_precondition_failure(e) or _is_missing(e)):
+                raise
+        finally:
+            self.etag = None
+
+
+def _is_missing(error):
+    return error.response['Error']['Code'] in ('NoSuchKey', '404')
+
+
+def _is_precondition_failure(error):
+    return error.response['Error']['Code'] in (
+        # Someone else has written to the lease since.
+        'PreconditionFailed',
+        '412',
+
+        # Someone else is writing to the lease concurrently.
+        'ConditionalRequestConflict',
+        '409',
+    )
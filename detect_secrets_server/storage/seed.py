@@ -0,0 +1,82 @@
+"""Seeding new clones from local disk.
+
+When (re)building a scanning host, cloning thousands of repositories over the
+network takes hours. Instead, the initial objects can be taken from a local
+directory of pre-built git bundles, or from local mirrors of the repositories,
+so that only the changes made since then are fetched from the remote.
+
+Within the seed directory, the following are looked up (in order of priority):
+    |- <hashed name>.bundle       # bundles, named like tracked files
+    |- <org>/<name>.bundle        # bundles, named like the repository
+    |- ab/cd/<hashed name>        # mirrors, e.g. `repos` from another host
+    |- <hashed name>
+    |- <org>/<name>.git
+    |- <org>/<name>
+
+Bundles can be created with `git bundle create <name>.bundle --all`.
+"""
+import os
+
+from detect_secrets_server.storage.base import get_filepath_safe
+from detect_secrets_server.storage.base import get_shard_path
+
+
+class CloneSeed(object):
+
+    def __init__(self, directory):
+        """
+        :type directory: str
+        :param directory: where bundles and/or mirrors are found.
+        """
+        self.directory = directory
+
+    def find_bundle(self, repo_name, hashed_name):
+        """
+        :type repo_name: str
+        :param repo_name: e.g. `yelp/detect-secrets`
+
+        :type hashed_name: str
+        :param hashed_name: as given by BaseStorage.hash_filename
+
+        :rtype: str|None
+        :returns: path to bundle, if found.
+        """
+        for filename in (
+            hashed_name + '.bundle',
+            repo_name + '.bundle',
+        ):
+            path = self._get_path(filename)
+            if path and os.path.isfile(path):
+                return path
+
+        return None
+
+    def find_mirror(self, repo_name, hashed_name):
+        """
+        :rtype: str|None
+        :returns: path to bare git repository, if found.
+        """
+        for filename in (
+            get_shard_path(hashed_name),
+            hashed_name,
+            repo_name + '.git',
+            repo_name,
+        ):
+            path = self._get_path(filename)
+            if path and _is_git_repository(path):
+                return path
+
+        return None
+
+    def _get_path(self, filename):
+        try:
+            return get_filepath_safe(self.directory, filename)
+        except ValueError:
+            return None
+
+
+def _is_git_repository(path):
+    return (
+        os.path.isfile(os.path.join(path, 'HEAD'))
+        and os.path.isdir(os.path.join(path, 'objects'))
+    )
@@ -0,0 +1,261 @@
+"""A minimal crontab expression evaluator.
+
+python-crontab is only an optional dependency (for `install cron`), and needs
+yet another package to compute run times. This supports the standard five
+field syntax (with lists, ranges, steps and names), as well as the common
+@-aliases, which is everything that `add --crontab` accepts in practice.
+"""
+import hashlib
+from datetime import timedelta
+
+
+ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTH_NAMES = (
+    'jan', 'feb', 'mar', 'apr', 'may', 'jun',
+    'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
+)
+DAY_NAMES = ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat')
+
+# (name, minimum, maximum, names)
+FIELDS = (
+    ('minute', 0, 59, ()),
+    ('hour', 0, 23, ()),
+    ('day', 1, 31, ()),
+    ('month', 1, 12, MONTH_NAMES),
+
+    # Both 0 and 7 are Sunday.
+    ('weekday', 0, 7, DAY_NAMES),
+)
+
+# Every valid schedule runs at least once within this many days (e.g. Feb 29th).
+MAX_SEARCH_DAYS = 366 * 8
+
+
+class CronSchedule(object):
+
+    def __init__(self, expression):
+        """
+        :type expression: str
+        :raises: ValueError
+        """
+        self.expression = expression
+
+        fields = ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != len(FIELDS):
+            raise ValueError('Invalid crontab: {}'.format(expression))
+
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays,
+        ) = [
+            _parse_field(value, *field)
+            for value, field in zip(fields, FIELDS)
+        ]
+        self.weekdays = {day % 7 for day in weekdays}
+
+        # When both day fields are restricted, a run happens when *either*
+        # matches (rather than both).
+        self.is_day_or_weekday = (
+            not fields[2].startswith('*')
+            and not fields[4].startswith('*')
+        )
+
+        # Fail fast, rather than on first use.
+        if not any(
+            day <= _days_in_month(month)
+            for month in self.months
+            for day in self.days
+        ) and not self.is_day_or_weekday:
+            raise ValueError('Invalid crontab: {}'.format(expression))
+
+    def __repr__(self):
+        return 'CronSchedule({!r})'.format(self.expression)
+
+    def get_next_run(self, after):
+        """
+        :type after: datetime.datetime
+        :rtype: datetime.datetime
+        :returns: the earliest time this schedule runs, strictly after `after`.
+        """
+        output = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = output + timedelta(days=MAX_SEARCH_DAYS)
+
+        while output < limit:
+            if output.month not in self.months:
+                output = _start_of_next_month(output)
+                continue
+
+            if not self._is_matching_day(output):
+                output = output.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+
+            if output.hour not in self.hours:
+                output = output.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            minute = _next_value(self.minutes, output.minute)
+            if minute is None:
+                output = output.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            return output.replace(minute=minute)
+
+        raise ValueError(  # pragma: no cover
+            'Unable to find next run for {}'.format(self.expression),
+        )
+
+    def _is_matching_day(self, date):
+        is_matching_day = date.day in self.days
+
+        # Python's Monday is 0, whereas cron's Sunday is 0.
+        is_matching_weekday = (date.weekday() + 1) % 7 in self.weekdays
+
+        if self.is_day_or_weekday:
+            return is_matching_day or is_matching_weekday
+
+        return is_matching_day and is_matching_weekday
+
+
+def is_valid_crontab(expression):
+    try:
+        CronSchedule(expression)
+        return True
+    except ValueError:
+        return False
+
+
+def spread_crontab(expression, name):
+    """Deterministically offsets a schedule within its period, so that
+    repositories sharing a crontab don't all run at the same time.
+
+    Only fields left at their "round" defaults are moved: a minute or hour of
+    `0` becomes a value derived from name, and `*/n` becomes `k-max/n`, for an
+    offset k < n. e.g. `0 0 * * *` might become `17 5 * * *`, and
+    `*/15 * * * *` might become `7-59/15 * * * *`.
+
+    :type expression: str
+    :type name: str
+    :param name: identifies the repository, e.g. its git URL.
+
+    :rtype: str
+    """
+    fields = ALIASES.get(expression.strip().lower(), expression).split()
+    if len(fields) != len(FIELDS):
+        return expression
+
+    digest = int(hashlib.sha256(name.encode('utf-8')).hexdigest(), 16)
+    for index, (_, _, maximum, _) in enumerate(FIELDS[:2]):
+        period = maximum + 1
+        offset = digest % period
+        digest //= period
+
+        value = fields[index]
+        if value == '0':
+            fields[index] = str(offset)
+        elif value.startswith('*/'):
+            try:
+                step = int(value[2:])
+            except ValueError:
+                continue
+
+            if 1 < step <= maximum:
+                fields[index] = '{}-{}/{}'.format(offset % step, maximum, step)
+
+    return ' '.join(fields)
+
+
+def get_runs_per_hour(schedules, day):
+    """
+    :type schedules: iterable(CronSchedule)
+    :type day: datetime.datetime
+    :param day: midnight of the day to report on.
+
+    :rtype: list(int)
+    :returns: number of runs starting within each hour of the day.
+    """
+    output = [0] * 24
+    end = day + timedelta(days=1)
+    for schedule in schedules:
+        run = schedule.get_next_run(day - timedelta(minutes=1))
+        while run < end:
+            output[run.hour] += 1
+            run = schedule.get_next_run(run)
+
+    return output
+
+
+def _parse_field(value, name, minimum, maximum, names):
+    output = set()
+    for part in value.lower().split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = _parse_number(step, name, names=())
+            if step < 1:
+                raise ValueError('Invalid step for {}: {}'.format(name, value))
+
+        if part == '*':
+            start, end = minimum, maximum
+        elif '-' in part:
+            start, end = [
+                _parse_number(number, name, names)
+                for number in part.split('-', 1)
+            ]
+        else:
+            start = _parse_number(part, name, names)
+
+            # e.g. `5/15` means every 15, starting from 5.
+            end = maximum if step > 1 else start
+
+        if not (minimum <= start <= end <= maximum):
+            raise ValueError('Invalid {}: {}'.format(name, value))
+
+        output.update(range(start, end + 1, step))
+
+    return output
+
+
+def _parse_number(value, name, names):
+    if value in names:
+        return names.index(value) + (1 if name == 'month' else 0)
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('Invalid {}: {}'.format(name, value))
+
+
+def _next_value(values, current):
+    candidates = [value for value in values if value >= current]
+    return min(candidates) if candidates else None
+
+
+def _start_of_next_month(date):
+    date = date.replace(day=1, hour=0, minute=0)
+    if date.month == 12:
+        return date.replace(year=date.year + 1, month=1)
+
+    return date.replace(month=date.month + 1)
+
+
+def _days_in_month(month):
+    # We're generous with February, since leap years exist.
+    if month == 2:
+        return 29
+
+    if month in (4, 6, 9, 11):
+        return 30
+
+    return 31
@@ -0,0 +1,46 @@
+import os
+import threading
+
+
+class ProgressJournal(object):
+    """Records completed entries of a long running job, so that the job can be
+    resumed (skipping these entries) if interrupted.
+
+    Entries are appended to the journal file as soon as they complete, so that
+    progress survives a crash.
+    """
+
+    def __init__(self, filename):
+        """
+        :type filename: str
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+
+        self.entries = set()
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                self.entries = set(f.read().splitlines())
+
+    def __contains__(self, entry):
+        return entry in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, entry):
+        """
+        :type entry: str
+        """
+        with self.lock:
+            with open(self.filename, 'a') as f:
+                f.write(entry + '\n')
+
+            self.entries.add(entry)
+
+    def remove(self):
+        """Once the job has completed, there is nothing more to resume."""
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+        self.entries = set()
@@ -0,0 +1,52 @@
+"""Orders files by how likely they are to contain secrets, so that scans
+which stop at the first secret found (see `scan --fail-fast`) find it sooner.
+"""
+import os
+import re
+
+
+# Most likely first. Files matching none of these are scanned last.
+_PRIORITIES = (
+    # dotenv files, e.g. `.env`, `.env.production`, `prod.env`
+    re.compile(r'(^|\.)env(\.|$)'),
+
+    # Credentials, keys, and the files that tools keep them in.
+    re.compile(
+        r'credential|secret|passw|token|api_?key|private|id_[rd]sa|htpasswd|'
+        r'\.(pem|key|p12|pfx|jks|keystore|netrc|npmrc|pypirc|pgpass)$',
+    ),
+
+    # Configuration
+    re.compile(
+        r'config|setting|docker-compose|'
+        r'\.(ya?ml|json|ini|cfg|conf|properties|toml|xml|tf|tfvars)$',
+    ),
+)
+
+
+def get_priority(filename):
+    """
+    :type filename: str
+    :rtype: int
+    :returns: lower values are more likely to contain secrets.
+    """
+    name = os.path.basename(filename).lower()
+    if _PRIORITIES[0].search(name):
+        return 0
+
+    path = filename.lower()
+    for priority, regex in enumerate(_PRIORITIES[1:], 1):
+        if regex.search(path):
+            return priority
+
+    return len(_PRIORITIES)
+
+
+def prioritize(filenames):
+    """
+    :type filenames: iterable(str)
+    :rtype: list(str)
+    :returns: filenames, most likely to contain secrets first. Otherwise,
+        their order is preserved.
+    """
+    return sorted(filenames, key=get_priority)
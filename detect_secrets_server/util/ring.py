@@ -0,0 +1,142 @@
+"""Consistent hashing, to split tracked repositories between scan nodes.
+
+Each node is placed at many (pseudo-random) points on a ring, and each
+repository is assigned to the node at the next point after its own hash.
+Therefore, when a node is added (or removed), only the repositories between
+its points and their predecessors move: about 1/N of them.
+
+Shard configs look like this:
+
+    vnodes: 128         # optional, points per unit of weight
+    nodes:
+      scanner-1: 1      # name: weight
+      scanner-2: 2      # receives twice as many repositories
+
+or, if all nodes are weighted equally:
+
+    nodes:
+      - scanner-1
+      - scanner-2
+"""
+import bisect
+import hashlib
+from collections import Counter
+
+
+DEFAULT_VNODES = 128
+
+
+class HashRing(object):
+
+    def __init__(self, nodes, vnodes=DEFAULT_VNODES):
+        """
+        :type nodes: dict(str, int)
+        :param nodes: mapping of node name to weight.
+
+        :type vnodes: int
+        :param vnodes: points on the ring, per unit of weight. More points
+            means a more even split.
+
+        :raises: ValueError
+        """
+        if not nodes:
+            raise ValueError('At least one node is required.')
+
+        if any(
+            not isinstance(weight, int) or weight < 1
+            for weight in nodes.values()
+        ):
+            raise ValueError('Node weights must be positive integers.')
+
+        self.nodes = dict(nodes)
+        self.vnodes = vnodes
+
+        points = sorted(
+            (_get_position('{}-{}'.format(node, index)), node)
+            for node, weight in self.nodes.items()
+            for index in range(vnodes * weight)
+        )
+        self._positions = [position for position, _ in points]
+        self._owners = [node for _, node in points]
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        :type config: dict
+        :param config: see module docstring.
+
+        :raises: ValueError
+        """
+        if not isinstance(config, dict):
+            raise ValueError('Shard config must be a mapping.')
+
+        nodes = config.get('nodes')
+        if isinstance(nodes, list):
+            nodes = {str(node): 1 for node in nodes}
+        elif isinstance(nodes, dict):
+            nodes = {str(node): weight for node, weight in nodes.items()}
+        else:
+            raise ValueError('Shard config must list `nodes`.')
+
+        vnodes = config.get('vnodes', DEFAULT_VNODES)
+        if not isinstance(vnodes, int) or vnodes < 1:
+            raise ValueError('`vnodes` must be a positive integer.')
+
+        return cls(nodes, vnodes=vnodes)
+
+    def get_node(self, key):
+        """
+        :type key: str
+        :param key: hex digest, as given by BaseStorage.hash_filename
+
+        :rtype: str
+        """
+        index = bisect.bisect_right(self._positions, int(key[:16], 16))
+        return self._owners[index % len(self._owners)]
+
+
+def get_rebalance_report(keys, before, after):
+    """
+    :type keys: dict(str, str)
+    :param keys: mapping of repository name to hashed key.
+
+    :type before: HashRing
+    :type after: HashRing
+
+    :rtype: dict
+    """
+    moves = []
+    counts = {
+        'before': Counter(),
+        'after': Counter(),
+    }
+    for name, key in sorted(keys.items()):
+        source = before.get_node(key)
+        destination = after.get_node(key)
+
+        counts['before'][source] += 1
+        counts['after'][destination] += 1
+        if source != destination:
+            moves.append({
+                'repo': name,
+                'from': source,
+                'to': destination,
+            })
+
+    return {
+        'total': len(keys),
+        'moved': len(moves),
+        'moved_fraction': round(len(moves) / float(len(keys)), 4) if keys else 0,
+        'nodes': {
+            node: {
+                'before': counts['before'][node],
+                'after': counts['after'][node],
+            }
+            for node in sorted(set(before.nodes) | set(after.nodes))
+        },
+        'moves': moves,
+    }
+
+
+def _get_position(value):
+    return int(hashlib.sha512(value.encode('utf-8')).hexdigest()[:16], 16)
@@ -33,6 +33,9 @@ setup(
         'cron': [
             'python-crontab',
         ],
+        'numpy': [
+            'numpy',
+        ],
     },
     entry_points={
         'console_scripts': [
@@ -0,0 +1,157 @@
+"""
+Entropy scoring benchmark harness.
+
+Scans synthetic diffs of minified JavaScript (many short quoted strings per
+line, and the occasional random token) with the high entropy string plugins,
+as they are, and with candidates scored in batches, in pure Python and in
+numpy. Reports the wall time of each, and checks that they find the same
+secrets.
+
+Usage:
+    $ python -m testing.benchmarks.entropy --files 50 --lines 200
+"""
+import argparse
+import base64
+import binascii
+import json
+import random
+import sys
+import time
+
+from detect_secrets.core.secrets_collection import SecretsCollection
+from detect_secrets.plugins.high_entropy_strings import Base64HighEntropyString
+from detect_secrets.plugins.high_entropy_strings import HexHighEntropyString
+
+from detect_secrets_server.core import entropy
+from detect_secrets_server.core.entropy import apply_entropy_filter
+from detect_secrets_server.core.entropy import score_diff
+
+
+WORDS = (
+    'click', 'div', 'none', 'block', 'use strict', 'function', 'undefined',
+    'object', 'string', 'data-id', 'aria-label', 'px', 'transform', 'hidden',
+)
+
+
+def run(num_files, num_lines, seed=0):
+    """
+    :type num_files: int
+    :param num_files: number of files in the diff
+
+    :type num_lines: int
+    :param num_lines: number of added lines in each file
+
+    :rtype: dict
+    :returns: mapping of implementation to its metrics.
+    """
+    diff = _generate_diff(num_files, num_lines, random.Random(seed))
+
+    implementations = [('plugins', tuple), ('python', _filter(use_numpy=False))]
+    if entropy.numpy is not None:
+        implementations.append(('numpy', _filter(use_numpy=True)))
+
+    results = {}
+    expected = None
+    for name, wrap in implementations:
+        secrets = SecretsCollection(
+            plugins=wrap((
+                Base64HighEntropyString(base64_limit=4.5),
+                HexHighEntropyString(hex_limit=3),
+            )),
+        )
+
+        start = time.time()
+        score_diff(secrets.plugins, diff)
+        secrets.scan_diff(diff)
+        wall_time = time.time() - start
+
+        found = secrets.json()
+        if expected is None:
+            expected = found
+        elif found != expected:
+            raise AssertionError('{} found different secrets'.format(name))
+
+        results[name] = {
+            'wall_time': round(wall_time, 4),
+            'secrets': sum(len(value) for value in found.values()),
+        }
+
+    return results
+
+
+def _filter(use_numpy):
+    def wrap(plugins):
+        return apply_entropy_filter(plugins, use_numpy=use_numpy)
+
+    return wrap
+
+
+def _generate_diff(num_files, num_lines, rng):
+    output = []
+    for index in range(num_files):
+        filename = 'static/bundle-{}.min.js'.format(index)
+        output += [
+            'diff --git a/{0} b/{0}'.format(filename),
+            '--- a/{}'.format(filename),
+            '+++ b/{}'.format(filename),
+            '@@ -0,0 +1,{} @@'.format(num_lines),
+        ]
+        output += [
+            '+' + _generate_line(rng)
+            for _ in range(num_lines)
+        ]
+
+    return '\n'.join(output) + '\n'
+
+
+def _generate_line(rng):
+    values = []
+    for _ in range(40):
+        kind = rng.random()
+        if kind < 0.01:
+            value = base64.b64encode(_random_bytes(rng, 24)).decode('ascii')
+        elif kind < 0.02:
+            value = binascii.hexlify(_random_bytes(rng, 20)).decode('ascii')
+        elif kind < 0.3:
+            value = '{:x}'.format(rng.getrandbits(24))
+        else:
+            value = rng.choice(WORDS)
+
+        values.append('{}:"{}"'.format(rng.choice('abcdefgh'), value))
+
+    return 'var o={' + ','.join(values) + '};'
+
+
+def _random_bytes(rng, length):
+    return bytes(rng.getrandbits(8) for _ in range(length))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--files',
+        type=int,
+        default=50,
+        help='Number of files in the diff.',
+    )
+    parser.add_argument(
+        '--lines',
+        type=int,
+        default=200,
+        help='Number of added lines in each file.',
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        json.dumps(
+            run(args.files, args.lines),
+            indent=2,
+            sort_keys=True,
+        ),
+    )
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
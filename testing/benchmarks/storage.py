@@ -0,0 +1,199 @@
+"""
+Storage benchmark harness.
+
+Drives the `add`, `list`, `install` and `scan` actions against a large number
+of synthetic tracked repositories, and reports the number of storage requests,
+bytes transferred and wall time for each action. All git interactions are
+stubbed out, so that the numbers reflect the storage layer only.
+
+Usage:
+    $ python -m testing.benchmarks.storage --repos 5000 --storage s3
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from detect_secrets_server import actions
+from detect_secrets_server.core.usage.parser import ServerParserBuilder
+from testing.local_s3 import mock_s3
+from testing.util import cache_buster
+
+
+CREDENTIALS_FILE = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),
+        '../../examples/aws_credentials.json',
+    ),
+)
+
+BENCHMARKED_ACTIONS = ('add', 'list', 'install', 'scan')
+
+
+def run(num_repos, storage='s3', root_dir=None):
+    """
+    :type num_repos: int
+    :param num_repos: number of synthetic repositories to track
+
+    :type storage: str
+    :param storage: one of `file` or `s3`
+
+    :type root_dir: str|None
+    :param root_dir: if not specified, a temporary directory will be used.
+
+    :rtype: dict
+    :returns: mapping of action to its metrics.
+    """
+    cleanup = False
+    if not root_dir:
+        root_dir = tempfile.mkdtemp()
+        cleanup = True
+
+    repos = [
+        'git@github.com:benchmark/repo-{}'.format(index)
+        for index in range(num_repos)
+    ]
+
+    # Storage options are cached, and may have been computed without S3 support.
+    cache_buster()
+
+    results = {}
+    try:
+        with mock_s3() as client, _mock_git(), _mock_crontab():
+            for action in BENCHMARKED_ACTIONS:
+                args = _parse_args(action, root_dir, storage)
+
+                client.stats.reset()
+                start = time.time()
+                with _quiet():
+                    _ACTION_RUNNERS[action](args, repos)
+
+                results[action] = dict(
+                    wall_time=round(time.time() - start, 4),
+                    **client.stats.json()
+                )
+    finally:
+        cache_buster()
+        if cleanup:
+            shutil.rmtree(root_dir)
+
+    return results
+
+
+def _run_add(args, repos):
+    for repo in repos:
+        args.repo = repo
+        actions.add_repo(args)
+
+
+def _run_list(args, repos):
+    actions.display_tracked_repositories(args)
+
+
+def _run_install(args, repos):
+    actions.install_mapper(args)
+
+
+def _run_scan(args, repos):
+    for repo in repos:
+        args.repo = repo
+        actions.scan_repo(args)
+
+
+_ACTION_RUNNERS = {
+    'add': _run_add,
+    'list': _run_list,
+    'install': _run_install,
+    'scan': _run_scan,
+}
+
+
+def _parse_args(action, root_dir, storage):
+    argv = [action]
+    if action == 'add':
+        argv.append('git@github.com:benchmark/placeholder')
+    elif action == 'install':
+        argv.append('cron')
+    elif action == 'scan':
+        argv.append('benchmark/placeholder')
+
+    argv += ['--root-dir', root_dir, '--storage', storage]
+    if storage == 's3':
+        argv += [
+            '--s3-credentials-file', CREDENTIALS_FILE,
+            '--s3-bucket', 'benchmark',
+            '--s3-prefix', 'tracked',
+        ]
+
+    return ServerParserBuilder().parse_args(argv)
+
+
+@contextmanager
+def _mock_git():
+    """Every repository is empty, and never changes."""
+    def _git(directory, *args, **kwargs):
+        if args[0] == 'rev-parse':
+            return 'master' if '--abbrev-ref' in args else 'deadbeef'
+
+        return ''
+
+    with mock.patch(
+        'detect_secrets_server.storage.core.git._git',
+        side_effect=_git,
+    ), mock.patch(
+        'detect_secrets_server.storage.core.git.clone_repo_to_location',
+    ):
+        yield
+
+
+@contextmanager
+def _mock_crontab():
+    with mock.patch(
+        'detect_secrets_server.actions.install.CronTab',
+    ):
+        yield
+
+
+@contextmanager
+def _quiet():
+    with open(os.devnull, 'w') as devnull, mock.patch.object(sys, 'stdout', devnull):
+        yield
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--repos',
+        type=int,
+        default=1000,
+        help='Number of synthetic repositories to track.',
+    )
+    parser.add_argument(
+        '--storage',
+        choices=('file', 's3'),
+        default='s3',
+    )
+    parser.add_argument(
+        '--root-dir',
+        help='Defaults to a temporary directory.',
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        json.dumps(
+            run(args.repos, args.storage, args.root_dir),
+            indent=2,
+            sort_keys=True,
+        ),
+    )
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+An in-process, S3-compatible stand-in for the subset of the boto3 client API
+that detect-secrets-server uses.
+
+Unlike `mock.Mock()`, this actually stores objects, so that the storage layer
+can be driven end-to-end offline. It also keeps track of every request made
+against it, so that we can measure (and guard against regressions of) the
+number of S3 calls and bytes transferred for each action.
+
+Example:
+    >>> client = LocalS3Client()
+    >>> with mock_s3(client):
+    ...     S3Storage(root, config).get_tracked_repositories()
+    >>> client.stats.requests
+"""
+import copy
+import hashlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+
+class ClientError(Exception):
+    """Mirrors botocore.exceptions.ClientError, so that callers can inspect
+    `e.response['Error']['Code']` in the same way.
+    """
+
+    def __init__(self, code, operation_name):
+        self.response = {
+            'Error': {
+                'Code': code,
+                'Message': code,
+            },
+        }
+        self.operation_name = operation_name
+
+        super(ClientError, self).__init__(
+            'An error occurred ({}) when calling the {} operation'.format(
+                code,
+                operation_name,
+            ),
+        )
+
+
+class RequestStats(object):
+    """Keeps count of requests, and bytes transferred."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def json(self):
+        return {
+            'requests': dict(self.requests),
+            'total_requests': self.total_requests,
+            'bytes_uploaded': self.bytes_uploaded,
+            'bytes_downloaded': self.bytes_downloaded,
+        }
+
+
+class LocalS3Client(object):
+    """Implements the boto3 S3 client methods used by S3Storage.
+
+    Objects are stored in memory, per bucket. Buckets are created lazily.
+    """
+
+    # This is the S3 default (and maximum) page size.
+    MAX_KEYS = 1000
+
+    def __init__(self):
+        self.buckets = {}
+        self.stats = RequestStats()
+        self.exceptions = mock.Mock(ClientError=ClientError)
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with open(Filename, 'rb') as f:
+            body = f.read()
+
+        self._put(Bucket, Key, body)
+        self._record('PutObject', uploaded=len(body))
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        obj = self._get(Bucket, Key, 'GetObject')
+        with open(Filename, 'wb') as f:
+            f.write(obj['Body'])
+
+        self._record('GetObject', downloaded=len(obj['Body']))
+
+    def put_object(self, Bucket, Key, Body=b'', IfMatch=None, IfNoneMatch=None, **kwargs):
+        if not isinstance(Body, bytes):
+            Body = Body.encode('utf-8')
+
+        existing = self.buckets.get(Bucket, {}).get(Key)
+        if IfNoneMatch == '*' and existing:
+            self._record('PutObject')
+            raise ClientError('PreconditionFailed', 'PutObject')
+        if IfMatch is not None and (not existing or existing['ETag'] != IfMatch):
+            self._record('PutObject')
+            raise ClientError('PreconditionFailed', 'PutObject')
+
+        obj = self._put(Bucket, Key, Body)
+        self._record('PutObject', uploaded=len(Body))
+
+        return {
+            'ETag': obj['ETag'],
+        }
+
+    def get_object(self, Bucket, Key, **kwargs):
+        obj = self._get(Bucket, Key, 'GetObject')
+        self._record('GetObject', downloaded=len(obj['Body']))
+
+        return {
+            'Body': _StreamingBody(obj['Body']),
+            'ETag': obj['ETag'],
+            'ContentLength': len(obj['Body']),
+            'LastModified': obj['LastModified'],
+        }
+
+    def head_object(self, Bucket, Key, **kwargs):
+        obj = self._get(Bucket, Key, 'HeadObject')
+        self._record('HeadObject')
+
+        return {
+            'ETag': obj['ETag'],
+            'ContentLength': len(obj['Body']),
+            'LastModified': obj['LastModified'],
+        }
+
+    def delete_object(self, Bucket, Key, IfMatch=None, **kwargs):
+        if IfMatch is not None:
+            existing = self._get(Bucket, Key, 'DeleteObject')
+            if existing['ETag'] != IfMatch:
+                self._record('DeleteObject')
+                raise ClientError('PreconditionFailed', 'DeleteObject')
+
+        self.buckets.get(Bucket, {}).pop(Key, None)
+        self._record('DeleteObject')
+
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=None, **kwargs):
+        keys = self._list_keys(Bucket, Prefix)
+
+        start = int(ContinuationToken) if ContinuationToken else 0
+        end = start + min(MaxKeys or self.MAX_KEYS, self.MAX_KEYS)
+
+        output = self._list_response(Bucket, keys[start:end])
+        output['KeyCount'] = len(keys[start:end])
+        output['IsTruncated'] = end < len(keys)
+        if output['IsTruncated']:
+            output['NextContinuationToken'] = str(end)
+
+        self._record('ListObjectsV2')
+        return output
+
+    def list_objects(self, Bucket, Prefix='', Marker='', MaxKeys=None, **kwargs):
+        all_keys = [
+            key
+            for key in self._list_keys(Bucket, Prefix)
+            if key > Marker
+        ]
+        keys = all_keys[:min(MaxKeys or self.MAX_KEYS, self.MAX_KEYS)]
+
+        output = self._list_response(Bucket, keys)
+        output['IsTruncated'] = len(keys) < len(all_keys)
+
+        self._record('ListObjects')
+        return output
+
+    def get_paginator(self, operation_name):
+        return _Paginator(self, operation_name)
+
+    def _put(self, bucket, key, body):
+        obj = {
+            'Body': body,
+            'ETag': '"{}"'.format(hashlib.md5(body).hexdigest()),
+            'LastModified': datetime.now(),
+        }
+        self.buckets.setdefault(bucket, {})[key] = obj
+
+        return obj
+
+    def _get(self, bucket, key, operation_name):
+        try:
+            return self.buckets[bucket][key]
+        except KeyError:
+            self._record(operation_name)
+            raise ClientError('404', operation_name)
+
+    def _list_keys(self, bucket, prefix):
+        return sorted(
+            key
+            for key in self.buckets.get(bucket, {})
+            if key.startswith(prefix)
+        )
+
+    def _list_response(self, bucket, keys):
+        output = {}
+        if keys:
+            output['Contents'] = [
+                {
+                    'Key': key,
+                    'Size': len(self.buckets[bucket][key]['Body']),
+                    'ETag': self.buckets[bucket][key]['ETag'],
+                    'LastModified': self.buckets[bucket][key]['LastModified'],
+                }
+                for key in keys
+            ]
+
+        return output
+
+    def _record(self, operation_name, uploaded=0, downloaded=0):
+        self.stats.requests[operation_name] += 1
+        self.stats.bytes_uploaded += uploaded
+        self.stats.bytes_downloaded += downloaded
+
+
+class _Paginator(object):
+
+    def __init__(self, client, operation_name):
+        self.client = client
+        self.operation_name = operation_name
+
+    def paginate(self, **kwargs):
+        kwargs = copy.deepcopy(kwargs)
+        operation = getattr(self.client, self.operation_name)
+
+        while True:
+            page = operation(**kwargs)
+            yield page
+
+            if not page.get('IsTruncated'):
+                return
+
+            if self.operation_name == 'list_objects_v2':
+                kwargs['ContinuationToken'] = page['NextContinuationToken']
+            else:
+                kwargs['Marker'] = page['Contents'][-1]['Key']
+
+
+class _StreamingBody(object):
+
+    def __init__(self, body):
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+@contextmanager
+def mock_s3(client=None):
+    """Routes all S3Storage instances to a LocalS3Client.
+
+    :type client: LocalS3Client|None
+    :rtype: LocalS3Client
+    """
+    if not client:
+        client = LocalS3Client()
+
+    boto3 = mock.Mock()
+    boto3.client.return_value = client
+
+    with mock.patch(
+        'detect_secrets_server.storage.s3.S3Storage._get_boto3',
+        return_value=boto3,
+    ), mock.patch(
+        'detect_secrets_server.core.usage.common.storage.should_enable_s3_options',
+        return_value=True,
+    ), mock.patch(
+        'detect_secrets_server.core.usage.s3.should_enable_s3_options',
+        return_value=True,
+    ):
+        yield client
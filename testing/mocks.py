@@ -72,13 +72,19 @@ def mock_git_calls(*cases):
     def _mock_single_git_call(directory, *args, **kwargs):
         return _mock_subprocess_git_call(['git'] + list(args))
 
+    def _mock_streamed_git_call(directory, *args):
+        return iter(_mock_single_git_call(directory, *args).splitlines())
+
     # mock_subprocess is needed for `clone_repo_to_location`.
     with mock.patch(
         'detect_secrets_server.storage.core.git._git'
     ) as mock_git, mock.patch(
+        'detect_secrets_server.storage.core.git._stream_git'
+    ) as mock_stream_git, mock.patch(
         'detect_secrets_server.storage.core.git.subprocess.check_output'
     ) as mock_subprocess:
         mock_git.side_effect = _mock_single_git_call
+        mock_stream_git.side_effect = _mock_streamed_git_call
         mock_subprocess.side_effect = _mock_subprocess_git_call
 
         yield
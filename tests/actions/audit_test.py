@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+from detect_secrets_server.actions import audit_repo
+from detect_secrets_server.core.usage.parser import ServerParserBuilder
+from testing.factories import metadata_factory
+
+
+class TestAuditRepo(object):
+
+    @staticmethod
+    def parse_args(argument_string=''):
+        with mock.patch(
+            'detect_secrets_server.core.usage.s3.should_enable_s3_options',
+            return_value=False,
+        ):
+            return ServerParserBuilder().parse_args(
+                'audit yelp/detect-secrets {}'.format(argument_string).split()
+            )
+
+    def test_quits_early_if_cannot_load_meta_tracking_file(self):
+        assert audit_repo(self.parse_args()) == 1
+
+    def test_displays_secrets_as_ndjson(self, capsys):
+        args = self.parse_args('--jobs 2 --exclude-files ^tests/')
+        with mock.patch(
+            'detect_secrets_server.storage.file.FileStorage.get',
+            return_value=metadata_factory('git@github.com:yelp/detect-secrets'),
+        ), mock.patch(
+            'detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo.audit',
+            return_value=iter([
+                {
+                    'filename': 'config.py',
+                    'commit': 'commit1',
+                    'author': 'khock@yelp.com',
+                },
+                {
+                    'filename': 'config.py',
+                    'commit': 'commit2',
+                    'author': 'foo@example.com',
+                },
+            ]),
+        ) as mock_audit:
+            assert audit_repo(args) == 0
+
+        mock_audit.assert_called_with(
+            exclude_files_regex='^tests/',
+            exclude_lines_regex=None,
+            jobs=2,
+        )
+        assert [
+            json.loads(line)
+            for line in capsys.readouterr().out.splitlines()
+        ] == [
+            {
+                'repo': 'yelp/detect-secrets',
+                'filename': 'config.py',
+                'commit': 'commit1',
+                'author': 'khock',
+            },
+            {
+                'repo': 'yelp/detect-secrets',
+                'filename': 'config.py',
+                'commit': 'commit2',
+                'author': 'foo',
+            },
+        ]
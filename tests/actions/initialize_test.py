@@ -1,4 +1,6 @@
+import json
 import os
+import subprocess
 from contextlib import contextmanager
 from unittest import mock
 
@@ -8,6 +10,7 @@ from detect_secrets_server.actions import add_repo
 from detect_secrets_server.actions import initialize
 from detect_secrets_server.core.usage.parser import ServerParserBuilder
 from detect_secrets_server.storage.base import BaseStorage
+from detect_secrets_server.storage.base import get_shard_path
 from testing.factories import metadata_factory
 from testing.factories import single_repo_config_factory
 from testing.mocks import mock_git_calls
@@ -155,6 +158,104 @@ class TestInitialize:
             assert kwargs['baseline_filename'] == 'baseline.file'
             assert kwargs['exclude_regex'] == 'something_here'
 
+    def test_seed_dir(self, mock_rootdir):
+        with mock_repos_config({
+            'tracked': [
+                single_repo_config_factory(
+                    'git@github.com:yelp/detect-secrets',
+                ),
+            ]
+        }):
+            args = self.parse_args(
+                '--seed-dir {} --root-dir {}'.format(mock_rootdir, mock_rootdir)
+            )
+
+        with mock_repo_class('BaseTrackedRepo') as repo_class:
+            initialize(args)
+
+            seed = repo_class.return_value.storage.clone.call_args[1]['seed']
+            assert seed.directory == mock_rootdir
+
+
+class TestBulkInitialize:
+
+    def teardown(self):
+        cache_buster()
+
+    def test_concurrent_clones(self, mock_rootdir, mock_clone):
+        args = self.parse_args(mock_rootdir, 3, '--jobs 2 --clone-timeout 60')
+
+        assert initialize(args) == 0
+
+        assert sorted(repo for repo, _ in mock_clone.calls) == [
+            'git@github.com:yelp/repo-0',
+            'git@github.com:yelp/repo-1',
+            'git@github.com:yelp/repo-2',
+        ]
+        assert all(timeout == 60 for _, timeout in mock_clone.calls)
+
+        # Nothing to resume, after a successful run.
+        assert not [name for name in os.listdir(mock_rootdir) if name.endswith('.journal')]
+
+    def test_resumes_after_failures(self, mock_rootdir, mock_clone):
+        mock_clone.failures.add('git@github.com:yelp/repo-1')
+        args = self.parse_args(mock_rootdir, 3)
+
+        with mock.patch(
+            'detect_secrets_server.actions.initialize.log',
+        ) as mock_log:
+            assert initialize(args) == 1
+
+        summary = mock_log.error.call_args_list[-1][0]
+        assert summary[1:3] == (1, 3)
+        assert 'git@github.com:yelp/repo-1: fatal: unable to access' in summary[3]
+
+        mock_clone.calls.clear()
+        mock_clone.failures.clear()
+        assert initialize(self.parse_args(mock_rootdir, 3)) == 0
+        assert mock_clone.calls == [('git@github.com:yelp/repo-1', None)]
+
+    @staticmethod
+    def parse_args(mock_rootdir, num_repos, argument_string=''):
+        with mock_repos_config({
+            'tracked': [
+                single_repo_config_factory(
+                    'git@github.com:yelp/repo-{}'.format(index),
+                )
+                for index in range(num_repos)
+            ],
+        }):
+            return ServerParserBuilder().parse_args(
+                'add will_be_mocked --config --root-dir {} {}'.format(
+                    mock_rootdir,
+                    argument_string,
+                ).split()
+            )
+
+
+@pytest.fixture
+def mock_clone(mock_file_operations):
+    def clone(self, seed=None, timeout=None):
+        mock_clone.calls.append((self.repo_url, timeout))
+        if self.repo_url in mock_clone.failures:
+            raise subprocess.CalledProcessError(
+                128,
+                'git clone',
+                b'Cloning...\nfatal: unable to access remote\n',
+            )
+
+    mock_clone.calls = []
+    mock_clone.failures = set()
+
+    with mock.patch(
+        'detect_secrets_server.storage.base.BaseStorage.clone',
+        new=clone,
+    ), mock.patch(
+        'detect_secrets_server.storage.base.git.get_last_commit_hash',
+        return_value='mocked_sha',
+    ):
+        yield mock_clone
+
 
 class TestAddRepo:
     @staticmethod
@@ -199,7 +300,7 @@ class TestAddRepo:
         repo = 'git@github.com:yelp/detect-secrets'
         directory = '{}/repos/{}'.format(
             mock_rootdir,
-            BaseStorage.hash_filename('yelp/detect-secrets'),
+            get_shard_path(BaseStorage.hash_filename('yelp/detect-secrets')),
         )
 
         git_calls = [
@@ -252,6 +353,119 @@ class TestAddRepo:
             ),
         )
 
+    def test_add_repo_with_refs(self, mock_file_operations, mock_rootdir):
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse HEAD',
+                mocked_output='mocked_sha',
+            ),
+        ):
+            args = self.parse_args(
+                'add examples --local --ref refs/pull/*/head --root-dir {}'.format(
+                    mock_rootdir,
+                )
+            )
+
+            add_repo(args)
+
+        mock_file_operations.write.assert_called_with(
+            metadata_factory(
+                sha='mocked_sha',
+                repo=os.path.abspath(
+                    os.path.join(
+                        os.path.dirname(__file__),
+                        '../../examples',
+                    ),
+                ),
+                refs=['refs/pull/*/head'],
+                json=True,
+            ),
+        )
+
+    def test_readding_repo_remembers_scanned_plugins(
+        self,
+        mock_file_operations,
+        mock_rootdir,
+    ):
+        repo = 'git@github.com:yelp/detect-secrets'
+        previous = metadata_factory(repo)
+
+        with mock.patch(
+            'detect_secrets_server.storage.file.FileStorage.get_tracked_file_location',
+            return_value='examples/config.yaml',
+        ), mock.patch(
+            'detect_secrets_server.storage.file.FileStorage.get',
+            return_value=previous,
+        ), mock_git_calls(
+            SubprocessMock(
+                expected_input='git clone {} {}/repos/{} --bare'.format(
+                    repo,
+                    mock_rootdir,
+                    get_shard_path(BaseStorage.hash_filename('yelp/detect-secrets')),
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse HEAD',
+                mocked_output='mocked_sha',
+            ),
+        ):
+            add_repo(
+                self.parse_args(
+                    'add {} --hex-limit 2 --root-dir {}'.format(repo, mock_rootdir),
+                ),
+            )
+
+        metadata = json.loads(mock_file_operations.write.call_args[0][0])
+        assert metadata['plugins']['HexHighEntropyString'] == {'hex_limit': 2}
+        assert metadata['scanned_plugins'] == previous['plugins']
+
+    def test_readding_s3_repo_remembers_scanned_plugins(
+        self,
+        local_s3,
+        mock_rootdir,
+    ):
+        # Storage options may have been cached without S3 support.
+        cache_buster()
+
+        repo = 'git@github.com:yelp/detect-secrets'
+        key = BaseStorage.hash_filename('yelp/detect-secrets')
+        previous = metadata_factory(repo)
+        local_s3.put_object(
+            Bucket='pail',
+            Key='prefix/{}.json'.format(key),
+            Body=json.dumps(previous),
+        )
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git clone {} {}/repos/{} --bare'.format(
+                    repo,
+                    mock_rootdir,
+                    get_shard_path(key),
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse HEAD',
+                mocked_output='mocked_sha',
+            ),
+        ):
+            add_repo(
+                self.parse_args(
+                    'add {} --hex-limit 2 --root-dir {} '
+                    '--storage s3 '
+                    '--s3-credentials-file examples/aws_credentials.json '
+                    '--s3-bucket pail '
+                    '--s3-prefix prefix'.format(repo, mock_rootdir),
+                    has_s3=True,
+                ),
+            )
+
+        metadata = json.loads(
+            local_s3.buckets['pail']['prefix/{}.json'.format(key)]['Body'],
+        )
+        assert metadata['plugins']['HexHighEntropyString'] == {'hex_limit': 2}
+        assert metadata['scanned_plugins'] == previous['plugins']
+
     def test_add_s3_backend_repo(self, mock_file_operations, mocked_boto):
         args = self.parse_args(
             'add {} '
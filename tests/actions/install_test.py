@@ -8,6 +8,7 @@ import pytest
 
 from detect_secrets_server.actions.install import install_mapper
 from detect_secrets_server.core.usage.parser import ServerParserBuilder
+from detect_secrets_server.util.cron import spread_crontab
 from testing.factories import metadata_factory
 
 
@@ -50,6 +51,93 @@ class TestInstallCron(object):
         """).format(mock_rootdir, mock_rootdir)[1:-1]
         mock_crontab.write_to_user.assert_called_with(user=True)
 
+    def test_spread_schedule(self, mock_crontab, mock_rootdir, mock_metadata):
+        args = self.parse_args(mock_rootdir, '--spread-schedule')
+        with mock_metadata(
+            remote_files=(
+                metadata_factory(
+                    repo='git@github.com:yelp/detect-secrets',
+                    json=True,
+                ),
+            ),
+            local_files=(
+                metadata_factory(
+                    repo='examples',
+                    crontab='30 9 * * *',
+                    json=True,
+                ),
+            ),
+        ):
+            install_mapper(args)
+
+        assert mock_crontab.content == textwrap.dedent("""
+            {}    detect-secrets-server scan git@github.com:yelp/detect-secrets --root-dir {}
+            30 9 * * *    detect-secrets-server scan examples --local --root-dir {}
+        """).format(
+            spread_crontab('0 0 * * *', 'git@github.com:yelp/detect-secrets'),
+            mock_rootdir,
+            mock_rootdir,
+        )[1:-1]
+
+    def test_grouped(self, mock_crontab, mock_rootdir, mock_metadata):
+        args = self.parse_args(mock_rootdir, '--grouped')
+        with mock_metadata(
+            remote_files=(
+                metadata_factory(
+                    repo='git@github.com:yelp/detect-secrets',
+                    json=True,
+                ),
+                metadata_factory(
+                    repo='git@github.com:yelp/detect-secrets-server',
+                    json=True,
+                ),
+            ),
+            local_files=(
+                metadata_factory(
+                    repo='examples',
+                    json=True,
+                ),
+            ),
+        ):
+            install_mapper(args)
+
+        assert mock_crontab.content == textwrap.dedent("""
+            0 0 * * *    detect-secrets-server scan --all --schedule '0 0 * * *' --root-dir {}
+            0 0 * * *    detect-secrets-server scan --all --schedule '0 0 * * *' --local --root-dir {}
+        """).format(mock_rootdir, mock_rootdir)[1:-1]
+
+    def test_grouped_with_shards(self, mock_crontab, mock_rootdir, mock_metadata):
+        config = os.path.join(mock_rootdir, 'shards[1].yaml')
+        with open(config, 'w') as f:
+            f.write('nodes: [scanner-1]')
+
+        args = self.parse_args(
+            mock_rootdir,
+            '--grouped --shard-config {} --shard-node scanner-1'.format(config),
+        )
+        with mock_metadata(
+            remote_files=(
+                metadata_factory(
+                    repo='git@github.com:yelp/detect-secrets',
+                    json=True,
+                ),
+            ),
+        ):
+            install_mapper(args)
+
+        # Grouped scans need to select the same share of repositories.
+        assert mock_crontab.content == (
+            "0 0 * * *    detect-secrets-server scan --all --schedule '0 0 * * *'"
+            " --shard-config '{}' --shard-node scanner-1 --root-dir {}".format(
+                config,
+                mock_rootdir,
+            )
+        )
+
+    def test_grouped_with_spread_schedule(self, mock_rootdir):
+        with pytest.raises(SystemExit):
+            self.parse_args(mock_rootdir, '--grouped --spread-schedule')
+
     def test_crontab_writes_with_output_hook(
         self,
         mock_crontab,
@@ -0,0 +1,134 @@
+import json
+import os
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from detect_secrets_server.actions.list import display_schedule_histogram
+from detect_secrets_server.actions.list import display_tracked_repositories
+from detect_secrets_server.actions.list import list_tracked_repositories
+from testing.base_usage_test import UsageTest
+
+
+class TestDisplayTrackedRepositories(UsageTest):
+
+    def test_filters_local_repositories(self, mock_repos, capsys):
+        display_tracked_repositories(self.parse_args('list --local'))
+
+        assert capsys.readouterr().out == '/path/to/local\n'
+
+    def test_schedule_histogram(self, mock_repos, capsys):
+        display_schedule_histogram(
+            self.parse_args('list --schedule-histogram'),
+            day=datetime(2020, 1, 1),
+        )
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 24
+        assert lines[0] == '00:00       2  ##'
+        assert lines[12] == '12:00       2  ##'
+        assert lines[1] == '01:00       0'
+
+    def test_spread_schedule_histogram(self, mock_repos, capsys):
+        display_schedule_histogram(
+            self.parse_args('list --schedule-histogram --spread-schedule'),
+            day=datetime(2020, 1, 1),
+        )
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] != '00:00       2  ##'
+        assert sum(int(line.split()[1]) for line in lines) == 4
+
+
+class TestSharding(UsageTest):
+
+    def test_nodes_list_disjoint_shares(self, mock_storage, shard_config):
+        config = shard_config('nodes: [a, b, c]')
+
+        shares = [
+            {
+                repo['repo']
+                for repo, _ in list_tracked_repositories(
+                    self.parse_args(
+                        'list --shard-config {} --shard-node {}'.format(config, node),
+                    ),
+                )
+            }
+            for node in ('a', 'b', 'c')
+        ]
+
+        assert sum(len(share) for share in shares) == len(mock_storage)
+        assert set.union(*shares) == {repo['repo'] for repo, _ in mock_storage}
+
+    def test_unknown_node(self, shard_config):
+        with pytest.raises(SystemExit):
+            self.parse_args(
+                'list --shard-config {} --shard-node d'.format(
+                    shard_config('nodes: [a, b, c]'),
+                ),
+            )
+
+    def test_rebalance_report(self, mock_storage, shard_config, capsys):
+        display_tracked_repositories(
+            self.parse_args(
+                'list --shard-config {} --shard-node a --rebalance {}'.format(
+                    shard_config('nodes: [a, b]'),
+                    shard_config('nodes: [a, b, c]'),
+                ),
+            ),
+        )
+
+        report = json.loads(capsys.readouterr().out)
+        assert report['total'] == len(mock_storage)
+        assert report['moved'] == report['nodes']['c']['after']
+        assert {move['to'] for move in report['moves']} <= {'c'}
+
+    def test_rebalance_requires_shard_config(self, shard_config):
+        with pytest.raises(SystemExit):
+            self.parse_args('list --rebalance {}'.format(shard_config('nodes: [a]')))
+
+
+@pytest.fixture
+def mock_storage():
+    repos = [
+        ({'repo': 'git@github.com:yelp/repo-{}'.format(index)}, False)
+        for index in range(30)
+    ] + [
+        ({'repo': '/path/to/local'}, True),
+    ]
+
+    with mock.patch(
+        'detect_secrets_server.actions.list.FileStorageWithLocalGit.get_tracked_repositories',
+        return_value=repos,
+    ):
+        yield repos
+
+
+@pytest.fixture
+def shard_config(mock_rootdir):
+    def wrapped(content):
+        filename = os.path.join(
+            mock_rootdir,
+            'shards-{}.yaml'.format(len(os.listdir(mock_rootdir))),
+        )
+        with open(filename, 'w') as f:
+            f.write(content)
+
+        return filename
+
+    return wrapped
+
+
+@pytest.fixture
+def mock_repos():
+    with mock.patch(
+        'detect_secrets_server.actions.list.list_tracked_repositories',
+        return_value=[
+            ({'repo': 'git@github.com:yelp/a', 'crontab': '0 0 * * *'}, False),
+            ({'repo': '/path/to/local', 'crontab': '@daily'}, True),
+            ({'repo': 'git@github.com:yelp/b', 'crontab': '*/30 12 * * *'}, False),
+            ({'repo': 'git@github.com:yelp/c', 'crontab': 'invalid'}, False),
+        ],
+    ):
+        yield
@@ -0,0 +1,30 @@
+import json
+from unittest import mock
+
+from detect_secrets_server.actions.maintain import maintain_repositories
+from testing.base_usage_test import UsageTest
+
+
+class TestMaintainRepositories(UsageTest):
+
+    def test_reports_maintained_repositories(self, capsys):
+        repos = [mock.Mock(), mock.Mock()]
+        repos[0].storage.maintain.return_value = {'repo': 'a'}
+        repos[1].storage.maintain.return_value = None
+
+        with mock.patch(
+            'detect_secrets_server.actions.maintain.load_cloned_repositories',
+            return_value=repos,
+        ):
+            maintain_repositories(
+                self.parse_args('maintain --max-packs 5 --max-loose-size 1M --force'),
+            )
+
+        for repo in repos:
+            repo.storage.maintain.assert_called_with(
+                force=True,
+                max_packs=5,
+                max_loose_size=1024 ** 2,
+            )
+
+        assert json.loads(capsys.readouterr().out) == [{'repo': 'a'}]
@@ -0,0 +1,75 @@
+import json
+from unittest import mock
+
+import pytest
+
+from detect_secrets_server.actions.pool import manage_object_pools
+from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
+from testing.base_usage_test import UsageTest
+
+
+class TestManageObjectPools(UsageTest):
+
+    def test_report_only(self, mock_repos, capsys):
+        repos = mock_repos(
+            ('forks', ['aaa']),
+            (None, ['aaa']),
+        )
+
+        manage_object_pools(self.parse_args('pool'))
+
+        assert json.loads(capsys.readouterr().out) == [{'pool': 'forks'}]
+        assert not repos[1].storage.join_object_pool.called
+
+    def test_detect(self, mock_repos, capsys):
+        repos = mock_repos(
+            (None, ['aaa']),
+            (None, ['bbb']),
+            (None, ['aaa', 'ccc']),
+            (None, []),
+        )
+
+        manage_object_pools(self.parse_args('pool --detect'))
+
+        for repo in (repos[0], repos[2]):
+            repo.storage.join_object_pool.assert_called_with('root-aaa')
+            repo.save.assert_called_with(OverrideLevel.ALWAYS)
+            assert repo.object_pool == 'root-aaa'
+
+        for repo in (repos[1], repos[3]):
+            assert not repo.storage.join_object_pool.called
+            assert repo.object_pool is None
+
+        assert json.loads(capsys.readouterr().out) == [{'pool': 'root-aaa'}]
+
+
+@pytest.fixture
+def mock_repos():
+    def wrapped(*configs):
+        """
+        :type configs: tuple(str|None, list)
+        :param configs: (object_pool, root_commits) for each repo
+        """
+        repos = []
+        for object_pool, root_commits in configs:
+            repo = mock.Mock(object_pool=object_pool)
+            repo.storage.get_root_commits.return_value = root_commits
+
+            def join_object_pool(name, storage=repo.storage):
+                storage.object_pool.get_report.return_value = {'pool': name}
+            repo.storage.join_object_pool.side_effect = join_object_pool
+            if object_pool:
+                join_object_pool(object_pool)
+
+            repos.append(repo)
+
+        patcher.start().return_value = repos
+        return repos
+
+    patcher = mock.patch(
+        'detect_secrets_server.actions.pool.load_cloned_repositories',
+    )
+    try:
+        yield wrapped
+    finally:
+        patcher.stop()
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from detect_secrets.core.secrets_collection import SecretsCollection
+
+from detect_secrets_server.actions import rescan_repo
+from detect_secrets_server.core.usage.parser import ServerParserBuilder
+from detect_secrets_server.repos.base_tracked_repo import BaseTrackedRepo
+from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
+from testing.factories import metadata_factory
+
+
+class TestRescanRepo(object):
+
+    @staticmethod
+    def parse_args(argument_string=''):
+        with mock.patch(
+            'detect_secrets_server.core.usage.s3.should_enable_s3_options',
+            return_value=False,
+        ):
+            return ServerParserBuilder().parse_args(
+                'rescan yelp/detect-secrets {}'.format(argument_string).split()
+            )
+
+    def test_quits_early_if_cannot_load_meta_tracking_file(self):
+        assert rescan_repo(self.parse_args()) == 1
+
+    def test_skips_repos_without_changed_plugins(self):
+        with self.mock_repo() as (mock_rescan, mock_save, _):
+            assert rescan_repo(self.parse_args('--changed-plugins')) == 0
+
+        assert not mock_rescan.called
+        assert not mock_save.called
+
+    def test_records_scanned_plugins(self):
+        with self.mock_repo(scanned_plugins={}) as (mock_rescan, mock_save, _):
+            assert rescan_repo(
+                self.parse_args('--changed-plugins --exclude-files ^tests/'),
+            ) == 0
+
+        mock_rescan.assert_called_with(
+            mock.ANY,
+            exclude_files_regex='^tests/',
+            exclude_lines_regex=None,
+            changed_plugins=True,
+        )
+
+        repo = mock_save.call_args[0][0]
+        mock_save.assert_called_with(repo, OverrideLevel.ALWAYS)
+        assert repo.scanned_plugins == repo.plugin_config
+        assert 'scanned_plugins' not in repo.__dict__
+
+    def test_alerts_on_secrets_found(self):
+        secrets = SecretsCollection()
+        secrets.data['config.py'] = {}
+
+        with self.mock_repo(
+            secrets=secrets,
+            scanned_plugins={},
+        ) as (_, mock_save, mock_alert):
+            assert rescan_repo(self.parse_args('--changed-plugins')) == 0
+
+        assert mock_alert.called
+
+        # So that they're rescanned, until the secrets are dealt with.
+        assert not mock_save.called
+
+    @contextmanager
+    def mock_repo(self, secrets=None, **kwargs):
+        with mock.patch(
+            'detect_secrets_server.storage.file.FileStorage.get',
+            return_value=metadata_factory(
+                'git@github.com:yelp/detect-secrets',
+                **kwargs
+            ),
+        ), mock.patch.object(
+            BaseTrackedRepo,
+            'rescan',
+            autospec=True,
+            return_value=secrets or SecretsCollection(),
+        ) as mock_rescan, mock.patch.object(
+            BaseTrackedRepo,
+            'save',
+            autospec=True,
+        ) as mock_save, mock.patch(
+            'detect_secrets_server.actions.rescan._alert_on_secrets_found',
+        ) as mock_alert:
+            yield mock_rescan, mock_save, mock_alert
@@ -7,8 +7,16 @@ import pytest
 from detect_secrets.core.secrets_collection import SecretsCollection
 
 from detect_secrets_server.actions import scan_repo
+from detect_secrets_server.actions import scan_tracked_repositories
+from detect_secrets_server.core.classify import FileClassifier
+from detect_secrets_server.core.classify import MINIFIED
+from detect_secrets_server.core.classify import VENDORED
+from detect_secrets_server.core.guard import Overrun
+from detect_secrets_server.core.guard import ScanGuard
+from detect_secrets_server.core.memo import LineMemo
 from detect_secrets_server.core.usage.parser import ServerParserBuilder
 from detect_secrets_server.hooks.stdout import StdoutHook
+from detect_secrets_server.repos.base_tracked_repo import BaseTrackedRepo
 from testing.factories import secrets_collection_factory
 from testing.mocks import mock_git_calls
 from testing.mocks import SubprocessMock
@@ -95,6 +103,189 @@ class TestScanRepo(object):
         )
         assert not mock_file_operations.write.called
 
+    def test_attributes_secrets_to_commits_they_were_found_in(
+        self,
+        mock_file_operations,
+    ):
+        secrets = secrets_collection_factory([
+            {
+                'filename': 'file_with_secrets',
+                'lineno': 5,
+            },
+        ])
+        secret = list(secrets.data['file_with_secrets'].values())[0]
+
+        def scan(self, **kwargs):
+            self.secret_origins = {
+                ('file_with_secrets', secret.secret_hash, secret.type): {
+                    'author': 'khock@yelp.com',
+                    'commit': 'introducing_sha',
+                },
+            }
+            return secrets
+
+        args = self.parse_args('--per-commit')
+        args.output_hook = mock_external_hook(
+            'yelp/detect-secrets',
+            {
+                'file_with_secrets': [{
+                    'type': 'type',
+                    'hashed_secret': secret.secret_hash,
+                    'is_verified': False,
+                    'line_number': 5,
+                    'author': 'khock',
+                    'commit': 'introducing_sha',
+                }],
+            },
+        )
+
+        # No need for git blame.
+        with self.mock_scan(scan):
+            assert scan_repo(args) == 0
+
+    def test_fail_fast(self, mock_file_operations):
+        secrets = secrets_collection_factory([
+            {
+                'filename': 'file_with_secrets',
+                'lineno': 5,
+            },
+        ])
+        secret = list(secrets.data['file_with_secrets'].values())[0]
+
+        args = self.parse_args('--fail-fast')
+        args.output_hook = mock_external_hook(
+            'yelp/detect-secrets',
+            {
+                'file_with_secrets': [{
+                    'type': 'type',
+                    'hashed_secret': secret.secret_hash,
+                    'is_verified': False,
+                    'line_number': 5,
+                }],
+            },
+        )
+
+        # No need for git blame, or saving state.
+        with self.mock_scan(lambda self, **kwargs: secrets) as mock_scan:
+            assert scan_repo(args) == 1
+
+        assert mock_scan.call_args[1]['fail_fast']
+        assert not mock_file_operations.write.called
+
+    def test_line_memo(self, mock_file_operations, mock_logger, tmpdir):
+        filename = str(tmpdir.join('memo'))
+
+        def scan(self, line_memo, **kwargs):
+            line_memo.is_clean(b'a' * 16)
+            line_memo.add_clean(b'a' * 16)
+            line_memo.is_clean(b'a' * 16)
+
+            return SecretsCollection()
+
+        with self.mock_scan(scan) as mock_scan:
+            args = self.parse_args('--dry-run --line-memo-file ' + filename)
+            assert scan_repo(args) == 0
+
+        assert mock_scan.call_args[1]['line_memo'].filename == filename
+        mock_logger.info.assert_any_call(
+            'Line memo hit rate for %s: %.1f%% of %d lines',
+            'yelp/detect-secrets',
+            50.0,
+            2,
+        )
+        with open(filename, 'rb') as f:
+            assert f.read() == b'a' * 16
+
+    def test_generated_files(self, mock_file_operations, mock_logger):
+        def scan(self, generated_files, max_line_length, **kwargs):
+            self.file_classifier = FileClassifier(
+                lambda directories: {},
+                max_line_length,
+            )
+            self.file_classifier.classified = {
+                'a.min.js': MINIFIED,
+                'vendor/b.js': VENDORED,
+                'vendor/c.js': VENDORED,
+            }
+            self.file_classifier.scanned_bytes = 100
+            self.file_classifier.scan_seconds = 1
+            self.file_classifier.classified_bytes = 1000
+
+            return SecretsCollection()
+
+        with self.mock_scan(scan) as mock_scan:
+            args = self.parse_args(
+                '--dry-run --generated-files cheap --max-line-length 500',
+            )
+            assert scan_repo(args) == 0
+
+        assert mock_scan.call_args[1]['generated_files'] == 'cheap'
+        assert mock_scan.call_args[1]['max_line_length'] == 500
+        mock_logger.info.assert_any_call(
+            'Scanned %s in %s with cheap plugins only, since it is %s',
+            'a.min.js',
+            'yelp/detect-secrets',
+            MINIFIED,
+        )
+        mock_logger.info.assert_any_call(
+            'Classified %s files in %s, saving %s',
+            '1 minified, 2 vendored',
+            'yelp/detect-secrets',
+            'about 10.00s',
+        )
+
+    def test_scans_generated_files_with_all_plugins(self, mock_file_operations):
+        with self.mock_scan() as mock_scan:
+            args = self.parse_args('--dry-run')
+            assert scan_repo(args) == 0
+
+        assert mock_scan.call_args[1]['generated_files'] is None
+
+    def test_scan_guard(self, mock_file_operations, mock_logger):
+        def scan(self, line_length_cap, file_time_budget, **kwargs):
+            self.scan_guard = ScanGuard(line_length_cap, file_time_budget)
+            self.scan_guard.truncated_lines = [
+                ('bundle.js', 1),
+                ('bundle.js', 3),
+            ]
+            self.scan_guard.overruns = [
+                Overrun(
+                    filename='bundle.js',
+                    plugin='KeywordDetector',
+                    regex='(a+)+b',
+                    line_number=12,
+                ),
+            ]
+
+            return SecretsCollection()
+
+        with self.mock_scan(scan) as mock_scan:
+            args = self.parse_args(
+                '--dry-run --line-length-cap 500 --file-time-budget 2m',
+            )
+            assert scan_repo(args) == 0
+
+        assert mock_scan.call_args[1]['line_length_cap'] == 500
+        assert mock_scan.call_args[1]['file_time_budget'] == 120
+
+        mock_logger.warning.assert_any_call(
+            'Truncated lines longer than %d characters in %s in %s: %s',
+            500,
+            'bundle.js',
+            'yelp/detect-secrets',
+            '1, 3',
+        )
+        mock_logger.warning.assert_called_with(
+            'Skipped the rest of %s in %s, after it exceeded its %ss budget '
+            'on line %d: %s was running %s',
+            'bundle.js',
+            'yelp/detect-secrets',
+            120,
+            12,
+            'KeywordDetector',
+            "regex '(a+)+b'",
+        )
+
     def test_does_not_write_state_when_dry_run(self, mock_file_operations):
         with self.setup_env(
             SecretsCollection(),
@@ -168,6 +359,91 @@ class TestScanRepo(object):
 
         assert mock_file_operations.write.called
 
+    def test_enforces_clone_disk_budget(self, mock_file_operations):
+        with self.setup_env(
+            SecretsCollection(),
+            '--clone-disk-budget 10G --dry-run',
+        ) as args, mock.patch(
+            'detect_secrets_server.storage.base.BaseStorage.enforce_clone_disk_budget',
+        ) as mock_enforce:
+            assert scan_repo(args) == 0
+
+        mock_enforce.assert_called_with(10 * 1024 ** 3)
+
+    def test_records_activity(self, mock_file_operations):
+        with self.setup_env(
+            SecretsCollection(),
+            '--record-activity',
+            updates_repo=True,
+        ) as args:
+            assert scan_repo(args) == 0
+
+        written = json.loads(mock_file_operations.write.call_args[0][0])
+        assert written['sha'] == 'new_sha'
+        assert set(written['activity']) == {'scan_seconds', 'last_scanned'}
+
+    def test_releases_lease(self, mock_file_operations):
+        with self.setup_env(
+            SecretsCollection(),
+            '--lease-ttl 1h',
+            updates_repo=True,
+        ) as args, mock.patch(
+            'detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo.acquire_lease',
+        ) as mock_acquire:
+            assert scan_repo(args) == 0
+
+        mock_acquire.assert_called_with(3600)
+        assert mock_acquire.return_value.release.called
+        assert mock_file_operations.write.called
+
+    def test_skips_when_leased_elsewhere(self, mock_file_operations, mock_logger):
+        with self.mock_scan() as mock_scan, mock.patch(
+            'detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo.acquire_lease',
+            return_value=None,
+        ):
+            assert scan_repo(self.parse_args('--lease-ttl 1h')) == 0
+
+        assert not mock_scan.called
+        mock_logger.info.assert_called_with(
+            'Skipping %s, since it is being scanned elsewhere.',
+            'yelp/detect-secrets',
+        )
+
+    def test_checkpoints_per_commit(self, mock_file_operations):
+        def scan(self, checkpoint, **kwargs):
+            checkpoint('checkpoint_sha')
+            return SecretsCollection()
+
+        with self.mock_scan(
+            scan,
+            get_subprocess_mocks(SecretsCollection(), updates_repo=True),
+        ):
+            assert scan_repo(self.parse_args('--per-commit')) == 0
+
+        assert mock_file_operations.write.call_args_list == [
+            mock.call(json.dumps(mock_tracked_file(sha), indent=2, sort_keys=True))
+            for sha in ('checkpoint_sha', 'new_sha')
+        ]
+
+    def test_does_not_checkpoint_when_dry_run(self, mock_file_operations):
+        with self.mock_scan() as mock_scan:
+            assert scan_repo(self.parse_args('--per-commit --dry-run')) == 0
+
+        assert mock_scan.call_args[1]['per_commit']
+        assert mock_scan.call_args[1]['checkpoint'] is None
+        assert not mock_file_operations.write.called
+
+    def test_maintains_clone(self, mock_file_operations):
+        with self.setup_env(
+            SecretsCollection(),
+            '--maintain --dry-run',
+        ) as args, mock.patch(
+            'detect_secrets_server.storage.base.BaseStorage.maintain',
+        ) as mock_maintain:
+            assert scan_repo(args) == 0
+
+        assert mock_maintain.called
+
     @contextmanager
     def setup_env(self, scan_results, argument_string='', updates_repo=False):
         """This sets up the relevant mocks, so that we can conduct testing.
@@ -180,29 +456,113 @@ class TestScanRepo(object):
         :type updates_repo: bool
         :param updates_repo: True if scan should update its internal state
         """
-        @contextmanager
-        def wrapped_mock_git_calls(git_calls):
-            if not git_calls:
-                # Need to yield **something**
-                yield
-                return
+        args = self.parse_args(argument_string)
 
-            with mock_git_calls(*git_calls):
-                yield
+        with self.mock_scan(
+            lambda self, **kwargs: scan_results,
+            get_subprocess_mocks(scan_results, updates_repo),
+        ):
+            yield args
 
-        args = self.parse_args(argument_string)
+    @contextmanager
+    def mock_scan(self, scan=None, git_calls=()):
+        """Scanning itself is tested in base_tracked_repo_test, so these
+        tests only check what it's called with, and how its results are
+        handled.
 
-        with mock.patch(
-            'detect_secrets_server.repos.base_tracked_repo.BaseTrackedRepo.scan',
-            return_value=scan_results,
-        ), mock.patch(
+        :type scan: function|None
+        :param scan: replaces BaseTrackedRepo.scan. By default, no secrets
+            are found.
+
+        :type git_calls: list(SubprocessMock)
+        :param git_calls: made after scanning.
+        """
+        with mock.patch.object(
+            BaseTrackedRepo,
+            'scan',
+            autospec=True,
+            side_effect=scan or (lambda self, **kwargs: SecretsCollection()),
+        ) as mock_scan, mock.patch(
             # We mock this, so that we can successfully load_from_file
             'detect_secrets_server.storage.file.FileStorage.get',
             return_value=mock_tracked_file('old_sha'),
-        ), wrapped_mock_git_calls(
-            get_subprocess_mocks(scan_results, updates_repo),
+        ), mock_git_calls(*git_calls):
+            yield mock_scan
+
+
+class TestScanTrackedRepositories(object):
+
+    @staticmethod
+    def parse_args(argument_string=''):
+        with mock.patch(
+            'detect_secrets_server.core.usage.s3.should_enable_s3_options',
+            return_value=False,
         ):
-            yield args
+            return ServerParserBuilder().parse_args(
+                ['scan', '--all'] + argument_string.split()
+            )
+
+    def test_scans_matching_repositories(self):
+        args = self.parse_args()
+
+        # Crontabs are compared regardless of whitespace.
+        args.schedule = '0  0 * * *'
+
+        with self.mock_scan() as scanned:
+            assert scan_tracked_repositories(args) == 0
+
+        assert scanned == ['git@github.com:yelp/a', 'git@github.com:yelp/c']
+
+    def test_local(self):
+        with self.mock_scan() as scanned:
+            assert scan_tracked_repositories(self.parse_args('--local')) == 0
+
+        assert scanned == ['/path/to/local']
+
+    def test_continues_after_failure(self):
+        with self.mock_scan(fails='git@github.com:yelp/a') as scanned:
+            assert scan_tracked_repositories(self.parse_args()) == 1
+
+        assert scanned == [
+            'git@github.com:yelp/a',
+            'git@github.com:yelp/b',
+            'git@github.com:yelp/c',
+        ]
+
+    def test_shares_line_memo(self):
+        with self.mock_scan() as scanned:
+            assert scan_tracked_repositories(self.parse_args()) == 0
+
+        assert len(scanned) == 3
+        assert isinstance(self.line_memos[0], LineMemo)
+        assert len(set(self.line_memos)) == 1
+
+    @contextmanager
+    def mock_scan(self, fails=None):
+        scanned = []
+        self.line_memos = []
+
+        def scan(args):
+            scanned.append(args.repo)
+            self.line_memos.append(args.line_memo)
+            if args.repo == fails:
+                raise SystemExit(1)
+
+            return 0
+
+        with mock.patch(
+            'detect_secrets_server.actions.scan.list_tracked_repositories',
+            return_value=[
+                ({'repo': 'git@github.com:yelp/a', 'crontab': '0 0 * * *'}, False),
+                ({'repo': 'git@github.com:yelp/b', 'crontab': '0 * * * *'}, False),
+                ({'repo': '/path/to/local', 'crontab': '0 0 * * *'}, True),
+                ({'repo': 'git@github.com:yelp/c', 'crontab': '0 0 * * *'}, False),
+            ],
+        ), mock.patch(
+            'detect_secrets_server.actions.scan.scan_repo',
+            side_effect=scan,
+        ):
+            yield scanned
 
 
 def get_subprocess_mocks(secrets, updates_repo):
@@ -0,0 +1,118 @@
+import os
+from unittest import mock
+
+from detect_secrets_server.actions.serve import serve
+from testing.base_usage_test import UsageTest
+
+
+class TestServe(UsageTest):
+
+    def test_scans_with_common_options(self):
+        args = self.parse_args('serve --jobs 2 --exclude-files \\.lock$')
+
+        with mock.patch(
+            'detect_secrets_server.actions.serve.Scheduler',
+        ) as mock_scheduler, mock.patch(
+            'detect_secrets_server.actions.serve.signal',
+        ), mock.patch(
+            'detect_secrets_server.actions.serve.scan_repo',
+        ) as mock_scan:
+            assert serve(args) == 0
+
+            assert mock_scheduler.return_value.serve.called
+            assert mock_scheduler.call_args[1]['jobs'] == 2
+
+            run_scan = mock_scheduler.call_args[0][1]
+            run_scan({'repo': '/path/to/repo'}, True)
+
+        scan_args = mock_scan.call_args[0][0]
+        assert scan_args.repo == '/path/to/repo'
+        assert scan_args.local
+        assert scan_args.exclude_files == '\\.lock$'
+        assert not scan_args.dry_run
+        assert scan_args.clone_disk_budget is None
+        assert scan_args.file_time_budget is None
+        assert not scan_args.record_activity
+        assert mock_scheduler.call_args[1]['policy'] is None
+
+        # Original args are left untouched.
+        assert not hasattr(args, 'repo')
+
+    def test_adaptive(self):
+        args = self.parse_args('serve --adaptive --min-interval 1h --cpu-budget 0.5')
+
+        with mock.patch(
+            'detect_secrets_server.actions.serve.Scheduler',
+        ) as mock_scheduler, mock.patch(
+            'detect_secrets_server.actions.serve.signal',
+        ), mock.patch(
+            'detect_secrets_server.actions.serve.scan_repo',
+        ) as mock_scan:
+            serve(args)
+
+            run_scan = mock_scheduler.call_args[0][1]
+            run_scan({'repo': 'git@github.com:yelp/detect-secrets'}, False)
+
+        policy = mock_scheduler.call_args[1]['policy']
+        assert policy.min_interval == 3600
+        assert policy.max_interval == 7 * 24 * 3600
+        assert policy.cpu_budget == 0.5
+
+        assert mock_scan.call_args[0][0].record_activity
+
+    def test_shares_line_memo(self, tmpdir):
+        filename = str(tmpdir.join('memo'))
+        args = self.parse_args('serve --line-memo-file {}'.format(filename))
+
+        with mock.patch(
+            'detect_secrets_server.actions.serve.Scheduler',
+        ) as mock_scheduler, mock.patch(
+            'detect_secrets_server.actions.serve.signal',
+        ), mock.patch(
+            'detect_secrets_server.actions.serve.scan_repo',
+        ) as mock_scan:
+            serve(args)
+
+            run_scan = mock_scheduler.call_args[0][1]
+            run_scan({'repo': '/path/to/foo'}, True)
+
+            # Saved after each scan, rather than only on exit.
+            assert os.path.isfile(filename)
+
+            run_scan({'repo': '/path/to/bar'}, True)
+
+        line_memo = mock_scan.call_args_list[0][0][0].line_memo
+        assert line_memo.filename == filename
+        assert mock_scan.call_args_list[1][0][0].line_memo is line_memo
+
+    def test_no_line_memo(self):
+        args = self.parse_args('serve --no-line-memo')
+
+        with mock.patch(
+            'detect_secrets_server.actions.serve.Scheduler',
+        ) as mock_scheduler, mock.patch(
+            'detect_secrets_server.actions.serve.signal',
+        ), mock.patch(
+            'detect_secrets_server.actions.serve.scan_repo',
+        ) as mock_scan:
+            serve(args)
+
+            run_scan = mock_scheduler.call_args[0][1]
+            run_scan({'repo': '/path/to/repo'}, True)
+
+        assert mock_scan.call_args[0][0].line_memo is None
+
+    def test_stops_on_signal(self):
+        args = self.parse_args('serve')
+
+        with mock.patch(
+            'detect_secrets_server.actions.serve.Scheduler',
+        ) as mock_scheduler, mock.patch(
+            'detect_secrets_server.actions.serve.signal',
+        ) as mock_signal:
+            serve(args)
+
+        handler = mock_signal.signal.call_args[0][1]
+        handler(15, None)
+
+        assert mock_scheduler.return_value.stop.called
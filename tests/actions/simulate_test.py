@@ -0,0 +1,46 @@
+import json
+from unittest import mock
+
+from detect_secrets_server.actions.simulate import simulate_schedules
+from testing.base_usage_test import UsageTest
+
+
+class TestSimulateSchedules(UsageTest):
+
+    def test_replays_commit_history(self, capsys):
+        repo = mock.Mock(
+            repo='git@github.com:yelp/detect-secrets',
+            crontab='0 * * * *',
+            activity={'scan_seconds': 2},
+        )
+        repo.storage.get_commit_timestamps.return_value = []
+
+        invalid = mock.Mock(crontab='never')
+
+        with mock.patch(
+            'detect_secrets_server.actions.simulate.list_tracked_repositories',
+            return_value=[
+                ({'repo': 'git@github.com:yelp/detect-secrets'}, False),
+                ({'repo': 'git@github.com:yelp/invalid'}, False),
+            ],
+        ), mock.patch(
+            'detect_secrets_server.actions.simulate.tracked_repo_factory',
+        ) as mock_factory, mock.patch(
+            'detect_secrets_server.actions.simulate.time.time',
+            return_value=86400 * 365,
+        ):
+            mock_factory.return_value.load_from_file.side_effect = [repo, invalid]
+            simulate_schedules(self.parse_args('simulate --days 7'))
+
+        repo.storage.get_commit_timestamps.assert_called_with(
+            since=86400 * (365 - 7),
+        )
+
+        report = json.loads(capsys.readouterr().out)
+        assert report['days'] == 7
+        assert report['repos'] == 1
+        assert report['crontab']['scans'] == 7 * 24 - 1
+        assert report['crontab']['cpu_seconds'] == (7 * 24 - 1) * 2
+
+        # Without any commits, scans are backed off to the maximum interval.
+        assert report['adaptive']['scans'] == 2
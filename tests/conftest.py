@@ -5,6 +5,8 @@ from unittest import mock
 
 import pytest
 
+from testing.local_s3 import mock_s3
+
 
 @pytest.fixture
 def mock_rootdir():
@@ -40,3 +42,10 @@ def mocked_boto():
         return_value=True,
     ):
         yield mock_client.client()
+
+
+@pytest.fixture
+def local_s3():
+    """Unlike mocked_boto, this is a functioning in-memory S3 stand-in."""
+    with mock_s3() as client:
+        yield client
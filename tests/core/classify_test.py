@@ -0,0 +1,145 @@
+import textwrap
+
+import pytest
+
+from detect_secrets_server.core.classify import _compile_pattern
+from detect_secrets_server.core.classify import FileClassifier
+from detect_secrets_server.core.classify import GENERATED
+from detect_secrets_server.core.classify import MINIFIED
+from detect_secrets_server.core.classify import VENDORED
+
+
+def get_diff(filename, lines):
+    return textwrap.dedent("""
+        diff --git a/{filename} b/{filename}
+        --- a/{filename}
+        +++ b/{filename}
+        @@ -0,0 +1,{length} @@
+    """)[1:].format(
+        filename=filename,
+        length=len(lines),
+    ) + ''.join('+{}\n'.format(line) for line in lines)
+
+
+class TestFileClassifier(object):
+
+    @staticmethod
+    def classify(filename, lines=('print("hello")',), attributes=None):
+        classifier = FileClassifier(
+            lambda directories: attributes or {},
+            max_line_length=20,
+        )
+        classifier.split_diff(get_diff(filename, lines))
+
+        return classifier.classified.get(filename)
+
+    @pytest.mark.parametrize(
+        'filename,expected',
+        [
+            ('setup.py', None),
+            ('vendor/github.com/pkg/errors/errors.go', VENDORED),
+            ('web/node_modules/left-pad/index.js', VENDORED),
+            ('src/third_party/lib.c', VENDORED),
+            ('vendored.py', None),
+            ('package-lock.json', GENERATED),
+            ('api/service_pb2.py', GENERATED),
+            ('static/app.min.js', MINIFIED),
+            ('static/app-min.css', MINIFIED),
+            ('static/app.js.map', MINIFIED),
+        ],
+    )
+    def test_paths(self, filename, expected):
+        assert self.classify(filename) == expected
+
+    def test_long_lines(self):
+        assert self.classify('a.js', ['a' * 20]) is None
+        assert self.classify('a.js', ['a' * 20, 'a' * 21]) == MINIFIED
+
+    @pytest.mark.parametrize(
+        'filename,attributes,expected',
+        [
+            ('a/client.js', {'': '*.js linguist-generated\n'}, GENERATED),
+            ('a/client.js', {'': '*.js linguist-generated=true\n'}, GENERATED),
+            ('a/client.js', {'a': 'client.js linguist-vendored\n'}, VENDORED),
+            ('a/client.js', {'': '/client.js linguist-vendored\n'}, None),
+            ('a/b/c.js', {'': 'a/* linguist-generated\n'}, None),
+            ('a/b/c.js', {'': 'a/** linguist-generated\n'}, GENERATED),
+            ('a/b/c.js', {'': '**/b/*.js linguist-generated\n'}, GENERATED),
+            ('a/b/c.js', {'': 'a/ linguist-generated\n'}, None),
+            (
+                'a/client.js',
+                {'': '# *.js linguist-generated\n*.js binary\n'},
+                None,
+            ),
+
+            # Explicitly unset attributes override heuristics.
+            ('vendor/a.go', {'': 'vendor/** -linguist-vendored\n'}, None),
+            ('vendor/a.go', {'': 'vendor/** linguist-vendored=false\n'}, None),
+            ('a.min.js', {'': '*.js -linguist-generated\n'}, None),
+
+            # Later lines, and deeper files, take precedence.
+            (
+                'a/client.js',
+                {'': '*.js linguist-generated\nclient.js !linguist-generated\n'},
+                None,
+            ),
+            (
+                'a/client.js',
+                {
+                    '': '*.js linguist-generated\n',
+                    'a': '*.js -linguist-generated\n',
+                },
+                None,
+            ),
+        ],
+    )
+    def test_attributes(self, filename, attributes, expected):
+        assert self.classify(filename, attributes=attributes) == expected
+
+    def test_split_diff(self):
+        requested = []
+
+        def get_attributes_files(directories):
+            requested.append(directories)
+            return {}
+
+        classifier = FileClassifier(get_attributes_files)
+        diff = get_diff('a/b.py', ['x']) + get_diff('vendor/c.py', ['y'])
+
+        assert classifier.split_diff(diff) == (
+            get_diff('a/b.py', ['x']),
+            get_diff('vendor/c.py', ['y']),
+        )
+        assert classifier.classified == {'vendor/c.py': VENDORED}
+        assert classifier.classified_bytes == len(get_diff('vendor/c.py', ['y']))
+
+        # Attributes are only looked up once for each directory.
+        classifier.split_diff(get_diff('a/d.py', ['x']))
+        assert requested == [['', 'a', 'vendor']]
+
+    def test_seconds_saved(self):
+        classifier = FileClassifier(lambda directories: {})
+        assert classifier.seconds_saved is None
+
+        classifier.scanned_bytes = 100
+        classifier.scan_seconds = 2
+        classifier.classified_bytes = 1000
+        classifier.classified_seconds = 1
+        assert classifier.seconds_saved == 19
+
+
+@pytest.mark.parametrize(
+    'pattern,directory,filename,expected',
+    [
+        ('*.js', '', 'a/b.js', True),
+        ('*.js', 'a', 'b/c.js', False),
+        ('b/*.js', 'a', 'a/b/c.js', True),
+        ('b/*.js', 'a', 'a/b/c/d.js', False),
+        ('c?.js', '', 'c1.js', True),
+        ('c[0-9].js', '', 'ca.js', False),
+        ('c[!0-9].js', '', 'ca.js', True),
+        ('a.b', '', 'axb', False),
+    ],
+)
+def test_compile_pattern(pattern, directory, filename, expected):
+    assert bool(_compile_pattern(pattern, directory).match(filename)) == expected
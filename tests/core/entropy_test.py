@@ -0,0 +1,174 @@
+import textwrap
+from unittest import mock
+
+import pytest
+from detect_secrets.core.secrets_collection import SecretsCollection
+from detect_secrets.plugins.common import initialize as initialize_plugins
+from detect_secrets.plugins.high_entropy_strings import Base64HighEntropyString
+from detect_secrets.plugins.high_entropy_strings import HexHighEntropyString
+
+from detect_secrets_server.core import entropy
+from detect_secrets_server.core.entropy import apply_entropy_filter
+from detect_secrets_server.core.entropy import EntropyFilteredPlugin
+from detect_secrets_server.core.entropy import EntropyScorer
+from detect_secrets_server.core.entropy import score_diff
+from detect_secrets_server.core.prefilter import apply_prefilter
+from testing.factories import metadata_factory
+
+
+USE_NUMPY = (
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            entropy.numpy is None,
+            reason='numpy is not installed',
+        ),
+    ),
+)
+
+CANDIDATES = (
+    'a',
+    'aaaa',
+    '0123456789',
+    'deadbeef',
+    '8b1118b376c313ed420e5133ba91307817ed52c2',
+    'c3VwZXIgc2VjcmV0IHZhbHVl/+_-=',
+)
+
+
+def get_diff(filename, lines):
+    return textwrap.dedent("""
+        diff --git a/{filename} b/{filename}
+        --- a/{filename}
+        +++ b/{filename}
+        @@ -0,0 +1,{length} @@
+    """)[1:].format(
+        filename=filename,
+        length=len(lines),
+    ) + ''.join('+{}\n'.format(line) for line in lines)
+
+
+class TestEntropyScorer(object):
+
+    @pytest.mark.parametrize('use_numpy', USE_NUMPY)
+    def test_scores_match_plugin(self, use_numpy):
+        plugin = Base64HighEntropyString(base64_limit=4.5)
+        scorer = EntropyScorer([plugin.regex], use_numpy=use_numpy)
+        scorer.add_diff(
+            get_diff(
+                'a.py',
+                ['value = "{}"'.format(candidate) for candidate in CANDIDATES],
+            ),
+        )
+
+        assert sorted(scorer._scores) == sorted(CANDIDATES)
+        for candidate in CANDIDATES:
+            assert scorer.get_score(candidate) == pytest.approx(
+                plugin.calculate_shannon_entropy(candidate),
+            )
+
+    def test_only_remembers_added_lines_of_current_diff(self):
+        plugin = HexHighEntropyString(hex_limit=3)
+        scorer = EntropyScorer([plugin.regex])
+
+        scorer.add_diff(get_diff('a.py', ['"abcd"']))
+        assert set(scorer._scores) == {'abcd'}
+
+        scorer.add_diff(
+            textwrap.dedent("""
+                diff --git a/"beef" b/"beef"
+                --- a/"beef"
+                +++ b/"beef"
+                @@ -1 +1 @@
+                -"dead"
+                +"1234"
+            """)[1:],
+        )
+        assert set(scorer._scores) == {'1234'}
+
+        # Lines that weren't scored in advance are still scored.
+        assert scorer.get_score('abcd') == 2
+
+    def test_has_candidate(self):
+        plugin = HexHighEntropyString(hex_limit=3)
+        scorer = EntropyScorer([plugin.regex])
+
+        assert not scorer.has_candidate(plugin.regex, 'print("hello")', 3)
+        assert not scorer.has_candidate(plugin.regex, '"aaaa" "abcd"', 3)
+        assert scorer.has_candidate(plugin.regex, '"aaaa" "abcdef01"', 3)
+
+        # Candidates at the limit are left for the plugin to decide.
+        assert scorer.has_candidate(plugin.regex, '"abcdef01"', 3)
+
+
+def test_plugin_only_calculates_entropy_over_limit():
+    plugin = HexHighEntropyString(hex_limit=3)
+    with mock.patch.object(
+        plugin,
+        'calculate_shannon_entropy',
+        wraps=plugin.calculate_shannon_entropy,
+    ) as calculate_shannon_entropy:
+        wrapped = apply_entropy_filter((plugin,))[0]
+        secrets = wrapped.analyze_line('"abcd" "a1b2c3d4e5f6"', 1, 'a.py')
+
+    assert [secret.secret_value for secret in secrets] == ['a1b2c3d4e5f6']
+    calculate_shannon_entropy.assert_called_once_with('a1b2c3d4e5f6')
+
+
+def test_apply_entropy_filter():
+    plugins = apply_entropy_filter(
+        apply_prefilter(
+            initialize_plugins.from_parser_builder(
+                metadata_factory('git@github.com:yelp/detect-secrets')['plugins'],
+            ),
+        ),
+    )
+
+    assert sorted(
+        plugin.plugin.__class__.__name__
+        for plugin in plugins
+        if isinstance(plugin, EntropyFilteredPlugin)
+    ) == [
+        'Base64HighEntropyString',
+        'HexHighEntropyString',
+    ]
+    assert len({
+        plugin.scorer
+        for plugin in plugins
+        if isinstance(plugin, EntropyFilteredPlugin)
+    }) == 1
+
+
+@pytest.mark.parametrize('use_numpy', USE_NUMPY)
+def test_does_not_change_results(use_numpy):
+    plugins = metadata_factory('git@github.com:yelp/detect-secrets')['plugins']
+    diff = get_diff(
+        'config.yaml',
+        [
+            'print("hello world")',
+            'hex = "8b1118b376c313ed420e5133ba91307817ed52c2"',
+            # Over the limit, but for the hex plugin's penalty for digits.
+            'digits = "0123456789"',
+            # Exactly at the hex limit.
+            'at_limit = "abcdef01"',
+            'base64 = \'9Wx3kQ7pLzR2mN8vT4yB6cF1hJ5gD0sA\'',
+            'uuid = "3a0b8a1e-6f7c-4d5e-9a8b-7c6d5e4f3a2b"',
+            'two = "abcdef0123456789" "a1b2c3d4e5f6a7b8"',
+        ],
+    ) + get_diff(
+        'main.js',
+        ['var a="{}",b="{}";'.format('ab' * 8, 'Zm9vYmFyYmF6cXV4cXV1eA==')],
+    )
+
+    results = []
+    for wrap in (tuple, lambda plugins: apply_entropy_filter(plugins, use_numpy)):
+        secrets = SecretsCollection(
+            plugins=wrap(initialize_plugins.from_parser_builder(plugins)),
+        )
+        score_diff(secrets.plugins, diff)
+        secrets.scan_diff(diff)
+        results.append(secrets.json())
+
+    assert len(results[0]['config.yaml']) >= 3
+    assert results[0] == results[1]
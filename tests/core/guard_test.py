@@ -0,0 +1,187 @@
+import re
+import textwrap
+import threading
+import time
+
+from detect_secrets.core.secrets_collection import SecretsCollection
+from detect_secrets.plugins.aws import AWSKeyDetector
+from detect_secrets.plugins.base import RegexBasedDetector
+
+from detect_secrets_server.core.guard import apply_scan_guard
+from detect_secrets_server.core.guard import enforce_time_budget
+from detect_secrets_server.core.guard import Overrun
+from detect_secrets_server.core.guard import ScanGuard
+from detect_secrets_server.core.memo import apply_line_memo
+from detect_secrets_server.core.memo import LineMemo
+from detect_secrets_server.core.memo import record_lines
+
+
+# Takes seconds to fail to match, without being interrupted.
+PATHOLOGICAL_REGEX = r'(a+)+b'
+PATHOLOGICAL_LINE = 'a' * 24
+
+
+class BacktrackingDetector(RegexBasedDetector):
+    secret_type = 'Backtracking'
+    denylist = (
+        re.compile(r'token=(\w+)'),
+        re.compile(PATHOLOGICAL_REGEX),
+    )
+
+
+class SlowDetector(RegexBasedDetector):
+    secret_type = 'Slow'
+    denylist = ()
+
+    def analyze_line(self, string, line_num, filename):
+        time.sleep(0.1)
+        return {}
+
+
+def get_diff(filename, lines):
+    return textwrap.dedent("""
+        diff --git a/{filename} b/{filename}
+        --- a/{filename}
+        +++ b/{filename}
+        @@ -0,0 +1,{length} @@
+    """)[1:].format(
+        filename=filename,
+        length=len(lines),
+    ) + ''.join('+{}\n'.format(line) for line in lines)
+
+
+def scan(guard, plugins, diff, memo=None):
+    plugins = apply_scan_guard(apply_line_memo(plugins, memo, 'hash'), guard)
+    secrets = SecretsCollection(plugins=plugins)
+    with record_lines(plugins), enforce_time_budget(plugins):
+        secrets.scan_diff(guard.truncate_lines(diff))
+
+    return secrets
+
+
+class TestTruncateLines(object):
+
+    def test_records_truncated_lines(self):
+        guard = ScanGuard(line_length_cap=5)
+        diff = get_diff('a.py', ['12345', '123456789']) + get_diff(
+            'b.py',
+            ['123456789'],
+        )
+
+        assert guard.truncate_lines(diff) == (
+            get_diff('a.py', ['12345', '12345']) + get_diff('b.py', ['12345'])
+        )
+        assert guard.truncated_lines == [('a.py', 2), ('b.py', 1)]
+
+    def test_counts_lines_within_hunks(self):
+        guard = ScanGuard(line_length_cap=5)
+        diff = textwrap.dedent("""
+            diff --git a/a.py b/a.py
+            --- a/a.py
+            +++ b/a.py
+            @@ -10,3 +10,3 @@
+             1
+            -123456789
+            +123456789
+             2
+        """)[1:]
+
+        guard.truncate_lines(diff)
+        assert guard.truncated_lines == [('a.py', 11)]
+
+    def test_disabled_by_default(self):
+        guard = ScanGuard()
+        diff = get_diff('a.py', ['1' * 100000])
+
+        assert guard.truncate_lines(diff) == diff
+        assert not guard.truncated_lines
+
+
+class TestTimeBudget(object):
+
+    def test_interrupts_regex(self):
+        guard = ScanGuard(file_time_budget=0.2)
+        diff = get_diff(
+            'a.py',
+            ['token=123', PATHOLOGICAL_LINE, 'token=456'],
+        ) + get_diff('b.py', ['token=789'])
+
+        start = time.time()
+        secrets = scan(
+            guard,
+            (BacktrackingDetector(), AWSKeyDetector()),
+            diff,
+        )
+
+        assert time.time() - start < 1
+        assert guard.overruns == [
+            Overrun(
+                filename='a.py',
+                plugin='BacktrackingDetector',
+                regex=PATHOLOGICAL_REGEX,
+                line_number=2,
+            ),
+        ]
+
+        # The rest of the file is skipped, but not other files.
+        assert [
+            secret.lineno
+            for secret in secrets.data['a.py']
+        ] == [1]
+        assert secrets.data['b.py']
+
+    def test_finds_exclude_lines_regex(self):
+        guard = ScanGuard(file_time_budget=0.2)
+        scan(
+            guard,
+            (AWSKeyDetector(exclude_lines_regex=PATHOLOGICAL_REGEX),),
+            get_diff('a.py', [PATHOLOGICAL_LINE]),
+        )
+
+        assert [
+            (overrun.plugin, overrun.regex)
+            for overrun in guard.overruns
+        ] == [('AWSKeyDetector', PATHOLOGICAL_REGEX)]
+
+    def test_checks_budget_in_other_threads(self):
+        guard = ScanGuard(file_time_budget=0.15)
+        diff = get_diff('a.py', ['a', 'b', 'c', 'd'])
+
+        thread = threading.Thread(
+            target=scan,
+            args=(guard, (SlowDetector(),), diff),
+        )
+        thread.start()
+        thread.join()
+
+        assert guard.overruns == [
+            Overrun(
+                filename='a.py',
+                plugin='SlowDetector',
+                regex=None,
+                line_number=2,
+            ),
+        ]
+
+    def test_does_not_remember_skipped_lines(self):
+        memo = LineMemo()
+        guard = ScanGuard(file_time_budget=0.2)
+        scan(
+            guard,
+            (AWSKeyDetector(), BacktrackingDetector()),
+            get_diff('a.py', ['print("hello")', PATHOLOGICAL_LINE]),
+            memo,
+        )
+
+        assert guard.overruns
+        assert not memo._clean
+
+    def test_budget_is_per_file(self):
+        guard = ScanGuard(file_time_budget=0.15)
+        scan(
+            guard,
+            (SlowDetector(),),
+            get_diff('a.py', ['a']) + get_diff('b.py', ['b']),
+        )
+
+        assert not guard.overruns
@@ -0,0 +1,163 @@
+import textwrap
+import threading
+from unittest import mock
+
+import pytest
+from detect_secrets.core.secrets_collection import SecretsCollection
+from detect_secrets.plugins.common import initialize as initialize_plugins
+from detect_secrets.plugins.keyword import KeywordDetector
+
+from detect_secrets_server.core.memo import apply_line_memo
+from detect_secrets_server.core.memo import get_plugins_hash
+from detect_secrets_server.core.memo import LineMemo
+from detect_secrets_server.core.memo import record_lines
+from testing.factories import metadata_factory
+
+
+PLUGINS = metadata_factory('git@github.com:yelp/detect-secrets')['plugins']
+
+
+def get_diff(filename, lines):
+    return textwrap.dedent("""
+        diff --git a/{filename} b/{filename}
+        --- a/{filename}
+        +++ b/{filename}
+        @@ -0,0 +1,{length} @@
+    """)[1:].format(
+        filename=filename,
+        length=len(lines),
+    ) + ''.join('+{}\n'.format(line) for line in lines)
+
+
+class TestLineMemo(object):
+
+    def test_forgets_least_recently_used(self):
+        memo = LineMemo(max_size=2)
+        memo.add_clean(b'a')
+        memo.add_clean(b'b')
+        assert memo.is_clean(b'a')
+
+        memo.add_clean(b'c')
+
+        assert not memo.is_clean(b'b')
+        assert memo.is_clean(b'a')
+        assert memo.is_clean(b'c')
+        assert (memo.hits, memo.misses) == (3, 1)
+        assert memo.hit_rate == 0.75
+
+    def test_hit_rate_without_lookups(self):
+        assert LineMemo().hit_rate is None
+
+    def test_counts_lookups_per_thread(self):
+        memo = LineMemo()
+        memo.add_clean(b'a')
+        assert memo.is_clean(b'a')
+
+        thread = threading.Thread(target=memo.is_clean, args=(b'b',))
+        thread.start()
+        thread.join()
+
+        assert (memo.hits, memo.misses) == (1, 0)
+
+    def test_save_and_load(self, tmpdir):
+        filename = str(tmpdir.join('memo'))
+        memo = LineMemo(filename=filename)
+        memo.load()
+        for key in (b'a' * 16, b'b' * 16, b'c' * 16):
+            memo.add_clean(key)
+
+        memo.save()
+
+        # The most recently used are kept.
+        memo = LineMemo(max_size=2, filename=filename)
+        memo.load()
+
+        assert list(memo._clean) == [b'b' * 16, b'c' * 16]
+
+    def test_does_not_save_without_filename(self):
+        memo = LineMemo()
+        memo.add_clean(b'a' * 16)
+
+        with mock.patch('detect_secrets_server.core.memo.open') as mock_open:
+            memo.save()
+
+        assert not mock_open.called
+
+
+def test_plugins_hash():
+    assert get_plugins_hash(PLUGINS) == get_plugins_hash(dict(PLUGINS))
+    assert get_plugins_hash(PLUGINS) != get_plugins_hash(PLUGINS, 'ignored')
+    assert get_plugins_hash(PLUGINS) != get_plugins_hash({
+        'HexHighEntropyString': {'hex_limit': 3},
+    })
+
+
+class TestMemoizedPlugins(object):
+
+    def scan(self, memo, diff):
+        plugins = apply_line_memo(
+            initialize_plugins.from_parser_builder(PLUGINS),
+            memo,
+            get_plugins_hash(PLUGINS),
+        )
+        secrets = SecretsCollection(plugins=plugins)
+        with record_lines(plugins):
+            secrets.scan_diff(diff)
+
+        return secrets
+
+    def test_skips_clean_lines(self):
+        memo = LineMemo()
+        diff = get_diff(
+            'a.py',
+            ['print("hello")', 'password = "hunter2hunter2"'],
+        )
+        first = self.scan(memo, diff).json()
+
+        assert len(memo._clean) == 1
+        assert (memo.hits, memo.misses) == (0, 2)
+
+        with mock.patch.object(
+            KeywordDetector,
+            'analyze_line',
+            autospec=True,
+            side_effect=KeywordDetector.analyze_line,
+        ) as analyze_line:
+            self.scan(memo, diff.replace('a.py', 'b.py'))
+
+        # Plugins only saw the line with secrets.
+        assert {
+            call[0][1] for call in analyze_line.call_args_list
+        } == {'password = "hunter2hunter2"\n'}
+        assert (memo.hits, memo.misses) == (1, 3)
+
+        # ...and still find them.
+        assert self.scan(memo, diff).json() == first
+
+    def test_lines_depend_on_file_type(self):
+        memo = LineMemo()
+        line = 'password = hunter2hunter2'
+        assert not self.scan(memo, get_diff('a.py', [line])).data
+
+        assert self.scan(memo, get_diff('a.yaml', [line])).data
+
+    def test_only_remembers_lines_after_scanning_diff(self):
+        memo = LineMemo()
+        plugins = apply_line_memo(
+            initialize_plugins.from_parser_builder(PLUGINS),
+            memo,
+            get_plugins_hash(PLUGINS),
+        )
+        secrets = SecretsCollection(plugins=plugins)
+
+        with pytest.raises(ValueError), record_lines(plugins):
+            secrets.scan_diff(get_diff('a.py', ['print("hello")']))
+            raise ValueError
+
+        assert not memo._clean
+
+
+def test_apply_line_memo_without_memo():
+    plugins = initialize_plugins.from_parser_builder(PLUGINS)
+
+    assert apply_line_memo(plugins, None, get_plugins_hash(PLUGINS)) == plugins
@@ -0,0 +1,95 @@
+from unittest import mock
+
+import pytest
+
+from detect_secrets_server.core.policy import AdaptivePolicy
+from detect_secrets_server.core.policy import get_cpu_demand
+from detect_secrets_server.core.policy import get_moving_average
+from detect_secrets_server.core.policy import IntervalSchedule
+
+
+HOUR = 3600
+
+
+class TestAdaptivePolicy(object):
+
+    @pytest.mark.parametrize(
+        'activity, expected',
+        [
+            # Not enough recorded.
+            (None, None),
+            ({'scan_seconds': 1}, None),
+
+            # Dormant
+            ({'commit_rate': 0}, 24 * HOUR),
+
+            # Busier than the minimum interval allows.
+            ({'commit_rate': 100}, HOUR // 4),
+
+            # One commit every ~3 hours, rounded up to a power of two.
+            ({'commit_rate': 0.3}, 4 * HOUR),
+
+            # Capped at the maximum interval.
+            ({'commit_rate': 0.01}, 24 * HOUR),
+        ],
+    )
+    def test_get_interval(self, activity, expected):
+        policy = AdaptivePolicy(min_interval=HOUR // 4, max_interval=24 * HOUR)
+
+        assert policy.get_interval(activity) == expected
+
+    def test_backs_off_within_cpu_budget(self):
+        policy = AdaptivePolicy(
+            min_interval=HOUR // 4,
+            max_interval=24 * HOUR,
+            cpu_budget=0.5,
+        )
+        activities = [
+            {'commit_rate': 4, 'scan_seconds': 900},
+            {'commit_rate': 1, 'scan_seconds': 900},
+            None,
+        ]
+
+        # Unconstrained, this needs 1.25 cores.
+        assert get_cpu_demand(
+            activities,
+            [policy.get_interval(activity) for activity in activities],
+        ) == 1.25
+
+        intervals = policy.get_intervals(activities)
+        assert intervals == [HOUR, 4 * HOUR, None]
+        assert get_cpu_demand(activities, intervals) <= 0.5
+
+    def test_warns_if_budget_is_unattainable(self):
+        policy = AdaptivePolicy(
+            min_interval=HOUR,
+            max_interval=HOUR,
+            cpu_budget=0.5,
+        )
+
+        with mock.patch(
+            'detect_secrets_server.core.policy.log',
+        ) as mock_logger:
+            assert policy.get_intervals([
+                {'commit_rate': 1, 'scan_seconds': HOUR},
+            ]) == [HOUR]
+
+        assert mock_logger.warning.called
+
+
+def test_interval_schedule():
+    schedule = IntervalSchedule(90)
+
+    assert schedule.expression == 'every 90s'
+
+
+@pytest.mark.parametrize(
+    'average, sample, expected',
+    [
+        (None, 2, 2),
+        (1, 2, 1.3),
+        (2, 0, 1.4),
+    ],
+)
+def test_get_moving_average(average, sample, expected):
+    assert get_moving_average(average, sample) == expected
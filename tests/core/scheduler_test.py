@@ -0,0 +1,233 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from detect_secrets_server.core.policy import AdaptivePolicy
+from detect_secrets_server.core.scheduler import Scheduler
+from detect_secrets_server.util.cron import spread_crontab
+
+
+# 2020-01-01 00:00:00 (local time)
+START = datetime(2020, 1, 1).timestamp()
+
+
+class TestScheduler(object):
+
+    def test_dispatches_due_scans(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/hourly', '0 * * * *'),
+            ('git@github.com:yelp/daily', '0 0 * * *'),
+        )
+
+        assert scheduler.run_pending() == 60
+        assert scheduler.scanned == []
+
+        scheduler.time = START + 3600
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert sorted(scheduler.scanned) == [
+            'git@github.com:yelp/hourly',
+        ]
+
+    def test_skips_missed_runs(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/hourly', '0 * * * *'),
+        )
+        scheduler.run_pending()
+
+        scheduler.time = START + 3600 * 5 + 1
+        scheduler.run_pending()
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert scheduler.scanned == ['git@github.com:yelp/hourly']
+
+    def test_picks_up_changes_in_storage(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/removed', '* * * * *'),
+            ('git@github.com:yelp/changed', '0 0 * * *'),
+        )
+        scheduler.run_pending()
+
+        scheduler.tracked = [
+            ({'repo': 'git@github.com:yelp/changed', 'crontab': '* * * * *'}, False),
+            ({'repo': 'git@github.com:yelp/added', 'crontab': '* * * * *'}, False),
+            ({'repo': 'git@github.com:yelp/invalid', 'crontab': 'never'}, False),
+        ]
+        # Changes are picked up before dispatching, so `removed` is never scanned.
+        scheduler.time = START + 60
+        scheduler.run_pending()
+
+        scheduler.time = START + 120
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert sorted(scheduler.scanned) == [
+            'git@github.com:yelp/added',
+            'git@github.com:yelp/changed',
+        ]
+
+    def test_removed_then_added_back(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/hourly', '0 * * * *'),
+        )
+        scheduler.run_pending()
+        tracked = scheduler.tracked
+
+        scheduler.tracked = []
+        scheduler.time = START + 60
+        scheduler.run_pending()
+
+        scheduler.tracked = tracked
+        scheduler.time = START + 120
+        scheduler.run_pending()
+
+        # The entry from before it was removed is outdated.
+        assert sorted(
+            generation
+            for _, _, generation in scheduler.queue
+        ) == [0, 1]
+
+        scheduler.time = START + 3600
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert scheduler.scanned == ['git@github.com:yelp/hourly']
+        assert [
+            (scheduled_time, generation)
+            for scheduled_time, _, generation in scheduler.queue
+        ] == [(START + 7200, 1)]
+
+    def test_spread(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/detect-secrets', '0 * * * *'),
+            spread=True,
+        )
+
+        # The spread offset for this repository.
+        minute = int(
+            spread_crontab('0 * * * *', 'git@github.com:yelp/detect-secrets').split()[0],
+        )
+
+        scheduler.run_pending()
+        assert scheduler.queue[0][0] == START + (minute or 60) * 60
+
+    def test_adaptive_policy(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/busy', '0 0 * * *'),
+            ('git@github.com:yelp/unknown', '0 0 * * *'),
+            policy=AdaptivePolicy(min_interval=900, max_interval=86400),
+        )
+        scheduler.tracked[0][0]['activity'] = {
+            'commit_rate': 4,
+            'scan_seconds': 1,
+            'last_scanned': START - 600,
+        }
+        scheduler.run_pending()
+
+        # Busy repositories are scanned relative to their last scan, whereas
+        # repositories without recorded activity fall back to their crontab.
+        assert sorted(entry[0] for entry in scheduler.queue) == [
+            START + 300,
+            START + 86400,
+        ]
+
+        scheduler.time = START + 300
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert scheduler.scanned == ['git@github.com:yelp/busy']
+
+    def test_survives_storage_errors(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/minutely', '* * * * *'),
+        )
+        scheduler.run_pending()
+
+        def list_repositories():
+            raise IOError
+        scheduler.list_repositories = list_repositories
+
+        scheduler.time = START + 60
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert scheduler.scanned == ['git@github.com:yelp/minutely']
+
+    def test_limits_concurrency_and_drains_on_shutdown(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/a', '* * * * *'),
+            ('git@github.com:yelp/b', '* * * * *'),
+            jobs=1,
+        )
+        scheduler.blocker.clear()
+        scheduler.run_pending()
+
+        scheduler.time = START + 60
+        scheduler.run_pending()
+        assert len(scheduler.running) == 1
+
+        # Scan is still in-flight, so nothing new is dispatched.
+        scheduler.time = START + 120
+        scheduler.run_pending()
+        assert len(scheduler.running) == 1
+
+        def release():
+            scheduler.blocker.set()
+        timer = threading.Timer(0.1, release)
+        timer.start()
+        scheduler.stop()
+        scheduler.serve()
+
+        assert len(scheduler.scanned) == 1
+        assert not scheduler.running
+
+    def test_scan_failures_are_contained(self, mock_scheduler):
+        scheduler = mock_scheduler(
+            ('git@github.com:yelp/fails', '* * * * *'),
+        )
+
+        def run_scan(metadata, is_local):
+            raise SystemExit(1)
+        scheduler.run_scan = run_scan
+
+        scheduler.run_pending()
+        scheduler.time = START + 60
+        scheduler.run_pending()
+        scheduler.shutdown()
+
+        assert not scheduler.running
+
+
+@pytest.fixture
+def mock_scheduler():
+    def wrapped(*repos, **kwargs):
+        """
+        :type repos: tuple(str, str)
+        :param repos: (repo, crontab)
+        """
+        scheduler = Scheduler(
+            lambda: scheduler.tracked,
+            None,
+            clock=lambda: scheduler.time,
+            **kwargs
+        )
+        scheduler.time = START
+        scheduler.tracked = [
+            ({'repo': repo, 'crontab': crontab}, False)
+            for repo, crontab in repos
+        ]
+        scheduler.scanned = []
+        scheduler.blocker = threading.Event()
+        scheduler.blocker.set()
+
+        def run_scan(metadata, is_local):
+            scheduler.blocker.wait()
+            scheduler.scanned.append(metadata['repo'])
+        scheduler.run_scan = run_scan
+
+        return scheduler
+
+    return wrapped
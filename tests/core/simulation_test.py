@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from detect_secrets_server.core.policy import AdaptivePolicy
+from detect_secrets_server.core.simulation import simulate
+from detect_secrets_server.core.simulation import SimulatedRepo
+from detect_secrets_server.util.cron import CronSchedule
+
+
+# 2020-01-01 00:00:00 (local time)
+START = datetime(2020, 1, 1).timestamp()
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class TestSimulate(object):
+
+    def test_adapts_to_activity(self):
+        report = simulate(
+            [
+                # Commits every hour, but scanned daily.
+                SimulatedRepo(
+                    'git@github.com:yelp/busy',
+                    CronSchedule('0 0 * * *'),
+                    [START + HOUR * hour + 1 for hour in range(7 * 24)],
+                ),
+
+                # No commits at all, but scanned hourly.
+                SimulatedRepo(
+                    'git@github.com:yelp/dormant',
+                    CronSchedule('0 * * * *'),
+                    [],
+                    activity={'scan_seconds': 10},
+                ),
+            ],
+            START,
+            START + 7 * DAY,
+            AdaptivePolicy(min_interval=HOUR, max_interval=DAY),
+        )
+
+        assert report['repos'] == 2
+        assert report['commits'] == 7 * 24
+
+        crontab = report['crontab']
+        assert crontab['scans'] == 7 * 24 - 1 + 6
+        assert crontab['idle_scans'] == 7 * 24 - 1
+        assert crontab['cpu_seconds'] == (7 * 24 - 1) * 10 + 6
+
+        # Dormant repositories are backed off, while busy ones are scanned
+        # more often, so new commits are found sooner.
+        adaptive = report['adaptive']
+        assert adaptive['cpu_seconds'] < crontab['cpu_seconds']
+        assert adaptive['idle_scans'] < crontab['idle_scans']
+        assert adaptive['mean_latency_seconds'] < crontab['mean_latency_seconds']
+
+    def test_cpu_budget(self):
+        repos = [
+            SimulatedRepo(
+                'git@github.com:yelp/{}'.format(index),
+                CronSchedule('0 0 * * *'),
+                [START + HOUR * hour + 1 for hour in range(7 * 24)],
+                activity={'scan_seconds': 360},
+            )
+            for index in range(4)
+        ]
+
+        unconstrained = simulate(
+            repos,
+            START,
+            START + 7 * DAY,
+            AdaptivePolicy(min_interval=HOUR, max_interval=DAY),
+        )['adaptive']
+        constrained = simulate(
+            repos,
+            START,
+            START + 7 * DAY,
+            AdaptivePolicy(min_interval=HOUR, max_interval=DAY, cpu_budget=0.2),
+        )['adaptive']
+
+        assert unconstrained['average_cpu_cores'] > 0.2
+        assert constrained['average_cpu_cores'] <= 0.2
+
+    def test_no_repositories(self):
+        report = simulate(
+            [],
+            START,
+            START + DAY,
+            AdaptivePolicy(min_interval=HOUR, max_interval=DAY),
+        )
+
+        assert report['crontab']['scans'] == 0
+        assert report['crontab']['mean_latency_seconds'] is None
@@ -51,6 +51,37 @@ class TestAddOptions(UsageTest):
         assert args.exclude_regex == 'regex'
         assert args.root_dir == '/tmp'
 
+    def test_ref_settings(self):
+        args = self.parse_args(
+            'add examples -L '
+            '--ref refs/heads/* '
+            '--ref refs/pull/*/head'
+        )
+
+        assert args.refs == ['refs/heads/*', 'refs/pull/*/head']
+
+    def test_invalid_ref_settings(self):
+        with pytest.raises(SystemExit):
+            self.parse_args('add examples -L --ref heads/*')
+
+    def test_concurrency_settings(self):
+        args = self.parse_args(
+            'add examples/repos.yaml --config '
+            '--jobs 8 '
+            '--clone-timeout 600'
+        )
+
+        assert args.jobs == 8
+        assert args.clone_timeout == 600
+
+    @pytest.mark.parametrize('flag', ('--jobs', '--clone-timeout'))
+    @pytest.mark.parametrize('value', ('0', 'many'))
+    def test_invalid_concurrency_settings(self, flag, value):
+        with pytest.raises(SystemExit):
+            self.parse_args(
+                'add examples/repos.yaml --config {} {}'.format(flag, value),
+            )
+
     def test_local_config_does_not_make_sense(self):
         with pytest.raises(SystemExit):
             self.parse_args(
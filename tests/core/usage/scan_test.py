@@ -25,3 +25,56 @@ class TestScanOptions(UsageTest):
                 ' -L examples'
                 ' --output-hook examples/standalone_hook.py'
             )
+
+    def test_per_commit_conflicts_with_scan_head(self):
+        with pytest.raises(SystemExit):
+            self.parse_args('scan examples -L --per-commit --scan-head')
+
+    def test_fail_fast_conflicts_with_always_update_state(self):
+        with pytest.raises(SystemExit):
+            self.parse_args('scan examples -L --fail-fast --always-update-state')
+
+    def test_no_line_memo_conflicts_with_line_memo_file(self):
+        with pytest.raises(SystemExit):
+            self.parse_args('scan examples -L --no-line-memo --line-memo-file memo')
+
+    def test_all(self):
+        args = self.parse_args('scan --all --local')
+
+        assert args.all
+        assert args.repo is None
+
+    @pytest.mark.parametrize(
+        'argument_string',
+        [
+            # Either a repository, or --all is required.
+            'scan',
+            'scan examples -L --all',
+            'scan examples -L --schedule 0',
+        ],
+    )
+    def test_invalid_repo_selection(self, argument_string):
+        with pytest.raises(SystemExit):
+            self.parse_args(argument_string)
+
+    @pytest.mark.parametrize(
+        'size, expected',
+        [
+            ('1024', 1024),
+            ('500M', 500 * 1024 ** 2),
+            ('1.5g', int(1.5 * 1024 ** 3)),
+        ],
+    )
+    def test_clone_disk_budget(self, size, expected):
+        args = self.parse_args(
+            'scan examples -L --clone-disk-budget {}'.format(size),
+        )
+
+        assert args.clone_disk_budget == expected
+
+    @pytest.mark.parametrize('size', ('-5', 'lots', 'G'))
+    def test_invalid_clone_disk_budget(self, size):
+        with pytest.raises(SystemExit):
+            self.parse_args(
+                'scan examples -L --clone-disk-budget {}'.format(size),
+            )
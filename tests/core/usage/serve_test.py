@@ -0,0 +1,57 @@
+import pytest
+
+from testing.base_usage_test import UsageTest
+
+
+class TestServeOptions(UsageTest):
+
+    @pytest.mark.parametrize(
+        'value, expected',
+        [
+            ('900', 900),
+            ('900s', 900),
+            ('15m', 15 * 60),
+            ('1.5h', 90 * 60),
+            ('7d', 7 * 24 * 3600),
+            ('2w', 14 * 24 * 3600),
+        ],
+    )
+    def test_durations(self, value, expected):
+        args = self.parse_args('serve --max-interval {}'.format(value))
+
+        assert args.max_interval == expected
+
+    @pytest.mark.parametrize(
+        'argument_string',
+        [
+            '--min-interval 0',
+            '--min-interval soon',
+            '--cpu-budget -1',
+            '--min-interval 2d --max-interval 1d',
+        ],
+    )
+    def test_invalid_policy(self, argument_string):
+        with pytest.raises(SystemExit):
+            self.parse_args('serve {}'.format(argument_string))
+
+    def test_line_length_cap(self):
+        args = self.parse_args('serve --line-length-cap 1000')
+
+        assert args.line_length_cap == 1000
+
+    def test_rejects_file_time_budget(self):
+        # Worker threads can't interrupt regexes.
+        with pytest.raises(SystemExit):
+            self.parse_args('serve --file-time-budget 30s')
+
+    def test_no_line_memo_conflicts_with_line_memo_file(self):
+        with pytest.raises(SystemExit):
+            self.parse_args('serve --no-line-memo --line-memo-file memo')
+
+    def test_defaults(self):
+        args = self.parse_args('serve')
+
+        assert not args.adaptive
+        assert args.policy.min_interval == 15 * 60
+        assert args.policy.max_interval == 7 * 24 * 3600
+        assert args.policy.cpu_budget is None
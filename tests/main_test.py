@@ -4,6 +4,7 @@ import pytest
 
 from detect_secrets_server.__main__ import main
 from detect_secrets_server.storage.base import BaseStorage
+from detect_secrets_server.storage.base import get_shard_path
 from testing.mocks import mock_git_calls
 from testing.mocks import SubprocessMock
 from testing.util import cache_buster
@@ -38,6 +39,42 @@ class TestMain(object):
                 'scan yelp/detect-secrets',
                 'scan_repo',
             ),
+            (
+                'scan --all',
+                'scan_tracked_repositories',
+            ),
+            (
+                'migrate',
+                'migrate_storage_layout',
+            ),
+            (
+                'pool --detect',
+                'manage_object_pools',
+            ),
+            (
+                'maintain',
+                'maintain_repositories',
+            ),
+            (
+                'serve --jobs 8',
+                'serve',
+            ),
+            (
+                'simulate --days 7',
+                'simulate_schedules',
+            ),
+            (
+                'audit yelp/detect-secrets --jobs 2',
+                'audit_repo',
+            ),
+            (
+                'rescan yelp/detect-secrets --changed-plugins',
+                'rescan_repo',
+            ),
+            (
+                'rescan --all --changed-plugins',
+                'rescan_tracked_repositories',
+            ),
         ]
     )
     def test_actions(self, argument_string, action_executed):
@@ -54,8 +91,13 @@ class TestMain(object):
             'detect_secrets_server.core.usage.common.storage.should_enable_s3_options',
             return_value=True,
         ):
-            mock_actions.initialize.return_value = ''
+            mock_actions.initialize.return_value = 0
             mock_actions.scan_repo.return_value = 0
+            mock_actions.scan_tracked_repositories.return_value = 0
+            mock_actions.serve.return_value = 0
+            mock_actions.audit_repo.return_value = 0
+            mock_actions.rescan_repo.return_value = 0
+            mock_actions.rescan_tracked_repositories.return_value = 0
 
             assert main(argument_string.split()) == 0
             assert getattr(mock_actions, action_executed).called
@@ -71,7 +113,7 @@ class TestMain(object):
     def test_repositories_added_can_be_scanned(self, mock_rootdir, repo_to_scan):
         directory = '{}/repos/{}'.format(
             mock_rootdir,
-            BaseStorage.hash_filename('Yelp/detect-secrets'),
+            get_shard_path(BaseStorage.hash_filename('Yelp/detect-secrets')),
         )
         mocked_sha = 'aabbcc'
 
@@ -4,8 +4,10 @@ from unittest import mock
 
 import pytest
 
+from detect_secrets_server.core.memo import LineMemo
 from detect_secrets_server.repos.base_tracked_repo import BaseTrackedRepo
 from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
+from detect_secrets_server.storage.base import get_shard_path
 from detect_secrets_server.storage.file import FileStorage
 from testing.factories import metadata_factory
 from testing.mocks import mock_git_calls
@@ -31,9 +33,11 @@ class TestLoadFromFile(object):
         repo = mock_logic(mock_open)
 
         mock_open.assert_called_with(
-            '{}/tracked/{}.json'.format(
+            '{}/tracked/{}'.format(
                 mock_rootdir,
-                FileStorage.hash_filename('will_be_mocked'),
+                get_shard_path(
+                    '{}.json'.format(FileStorage.hash_filename('will_be_mocked')),
+                ),
             )
         )
 
@@ -196,6 +200,486 @@ class TestScan(object):
 
         assert secrets.data == {}
 
+    def test_scan_fail_fast(self, mock_logic, mock_rootdir):
+        calls = self.git_calls(mock_rootdir)
+        calls[2] = SubprocessMock(
+            expected_input='git diff sha256-hash HEAD --name-only --diff-filter ACM',
+            mocked_output=(
+                'README.md\n'
+                'examples/aws_credentials.json\n'
+                'setup.py'
+            ),
+        )
+
+        # The baseline is checked as soon as secrets are found.
+        calls.insert(2, calls[-1])
+
+        repo = mock_logic()
+        with mock_git_calls(*calls):
+            secrets = repo.scan(fail_fast=True)
+
+        # Likely files are scanned first, and nothing else after secrets
+        # are found.
+        assert list(secrets.data) == ['examples/aws_credentials.json']
+
+    def test_scan_with_line_memo(self, mock_logic, mock_rootdir):
+        calls = self.git_calls(mock_rootdir)
+        calls[3] = SubprocessMock(
+            expected_input=calls[3].expected_input,
+            mocked_output=calls[3].mocked_output.replace(
+                '@@ -1,4 +1,4 @@',
+                '@@ -1,4 +1,5 @@',
+            ).replace(
+                '+    "accessKeyId"',
+                '+    "region": "us-east-1",\n+    "accessKeyId"',
+            ),
+        )
+
+        line_memo = LineMemo()
+        for _ in range(2):
+            repo = mock_logic()
+            with mock_git_calls(*calls):
+                secrets = repo.scan(line_memo=line_memo)
+
+            assert len(secrets.data['examples/aws_credentials.json']) == 3
+
+        # Only the clean line is skipped, the second time.
+        assert (line_memo.hits, line_memo.misses) == (1, 5)
+
+    @pytest.mark.parametrize(
+        'generated_files,expected',
+        (
+            (
+                None,
+                {
+                    'AWS Access Key',
+                    'Hex High Entropy String',
+                    'IBM COS HMAC Credentials',
+                },
+            ),
+            ('cheap', {'AWS Access Key', 'IBM COS HMAC Credentials'}),
+            ('skip', set()),
+        ),
+    )
+    def test_scan_generated_files(
+        self,
+        mock_logic,
+        mock_rootdir,
+        generated_files,
+        expected,
+    ):
+        calls = self.git_calls(mock_rootdir)
+        if generated_files:
+            calls[4:4] = [
+                SubprocessMock(
+                    expected_input=(
+                        'git ls-tree HEAD -- .gitattributes examples/.gitattributes'
+                    ),
+                    mocked_output='100644 blob attributes_sha\t.gitattributes\n',
+                ),
+                SubprocessMock(
+                    expected_input='git cat-file blob attributes_sha',
+                    mocked_output='examples/*.json linguist-generated\n',
+                ),
+            ]
+
+        repo = mock_logic()
+        with mock_git_calls(*calls):
+            secrets = repo.scan(generated_files=generated_files)
+
+        assert {
+            secret.type
+            for secret in secrets.data.get('examples/aws_credentials.json', {})
+        } == expected
+        if generated_files:
+            assert repo.file_classifier.classified == {
+                'examples/aws_credentials.json': 'generated',
+            }
+
+            # The whole diff is classified, so none of it is scanned with
+            # all plugins.
+            assert repo.file_classifier.classified_bytes == len(calls[3].mocked_output)
+            assert not repo.file_classifier.scanned_bytes
+
+    def test_scan_with_guard(self, mock_logic, mock_rootdir):
+        repo = mock_logic()
+        with mock_git_calls(*self.git_calls(mock_rootdir)):
+            secrets = repo.scan(line_length_cap=40, file_time_budget=30)
+
+        # Both lines are truncated, but only the access key fits within
+        # the cap.
+        assert [
+            secret.type
+            for secret in secrets.data['examples/aws_credentials.json']
+        ] == ['AWS Access Key']
+        assert repo.scan_guard.truncated_lines == [
+            ('examples/aws_credentials.json', 2),
+            ('examples/aws_credentials.json', 3),
+        ]
+        assert not repo.scan_guard.overruns
+
+    def test_scan_recovers_rewritten_history(self, mock_logic, mock_rootdir):
+        calls = self.git_calls(mock_rootdir)
+        calls[1] = SubprocessMock(
+            expected_input=(
+                'git -c core.logAllRefUpdates=always '
+                'fetch --quiet origin master:master --force'
+            ),
+        )
+        calls[2:4] = [
+            SubprocessMock(
+                expected_input='git diff sha256-hash HEAD --name-only --diff-filter ACM',
+                mocked_output=b'fatal: bad object sha256-hash',
+                should_throw_exception=True,
+            ),
+
+            # Only commits since the surviving ancestor are scanned.
+            SubprocessMock(
+                expected_input='git diff ancestor HEAD --name-only --diff-filter ACM',
+                mocked_output='examples/aws_credentials.json',
+            ),
+            SubprocessMock(
+                expected_input='git diff ancestor HEAD -- examples/aws_credentials.json',
+                mocked_output=calls[3].mocked_output,
+            ),
+        ]
+
+        repo = mock_logic()
+        with mock_git_calls(*calls), mock.patch.object(
+            repo.storage,
+            'find_surviving_ancestor',
+            return_value='ancestor',
+        ) as mock_find:
+            secrets = repo.scan(recover_rewrites=True)
+
+        mock_find.assert_called_with('sha256-hash')
+        assert len(secrets.data) == 1
+        assert repo.last_commit_hash == 'sha256-hash'
+
+    def test_scan_skips_to_head_if_no_ancestor_survived(self, mock_logic, mock_rootdir):
+        calls = self.git_calls(mock_rootdir)
+        calls[1] = SubprocessMock(
+            expected_input=(
+                'git -c core.logAllRefUpdates=always '
+                'fetch --quiet origin master:master --force'
+            ),
+        )
+        calls[2:] = [
+            SubprocessMock(
+                expected_input='git diff sha256-hash HEAD --name-only --diff-filter ACM',
+                mocked_output=b'fatal: bad object sha256-hash',
+                should_throw_exception=True,
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse HEAD',
+                mocked_output='new_sha',
+            ),
+        ]
+
+        repo = mock_logic()
+        with mock_git_calls(*calls), mock.patch.object(
+            repo.storage,
+            'find_surviving_ancestor',
+            return_value=None,
+        ):
+            secrets = repo.scan(recover_rewrites=True)
+
+        assert secrets.data == {}
+        assert repo.last_commit_hash == 'new_sha'
+
+    def test_scan_per_commit(self, mock_logic, mock_rootdir):
+        with open('test_data/sample.diff') as f:
+            diff_content = f.read()
+
+        calls = self.git_calls(mock_rootdir)
+        calls[2:4] = [
+            SubprocessMock(
+                expected_input=(
+                    'git log --reverse --first-parent --format=%H %P%x09%ae '
+                    'sha256-hash..HEAD'
+                ),
+                mocked_output=(
+                    'sha1 sha256-hash\tfoo@example.com\n'
+                    'sha2 sha1\tkhock@yelp.com\n'
+                    'sha3 sha2 side\tbar@example.com'
+                ),
+            ),
+
+            # The first commit is clean.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha256-hash sha1',
+                mocked_output=(
+                    ':100644 100644 aaa bbb M\tREADME.md\n'
+                    ':000000 100644 000 ccc A\timage.png'
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -p sha256-hash sha1 -- README.md',
+                mocked_output=(
+                    'diff --git a/README.md b/README.md\n'
+                    '--- a/README.md\n'
+                    '+++ b/README.md\n'
+                    '@@ -1 +1,2 @@\n'
+                    ' # Hello\n'
+                    '+World\n'
+                ),
+            ),
+
+            # The second adds secrets.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha1 sha2',
+                mocked_output=':100644 100644 ddd eee M\texamples/aws_credentials.json',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -p sha1 sha2 -- examples/aws_credentials.json'
+                ),
+                mocked_output=diff_content,
+            ),
+
+            # The third merges a branch which introduced the same file, so
+            # doesn't need to be scanned again.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha2 sha3',
+                mocked_output=':100644 100644 bbb eee M\texamples/aws_credentials.json',
+            ),
+        ]
+
+        checkpoint = mock.Mock()
+        repo = mock_logic()
+        with mock_git_calls(*calls):
+            secrets = repo.scan(per_commit=True, checkpoint=checkpoint)
+
+        assert len(secrets.data['examples/aws_credentials.json']) == 3
+        for secret in secrets.data['examples/aws_credentials.json']:
+            assert repo.secret_origins[(
+                'examples/aws_credentials.json',
+                secret.secret_hash,
+                secret.type,
+            )] == {
+                'author': 'khock@yelp.com',
+                'commit': 'sha2',
+            }
+
+        # Only progress up to the first commit with secrets is saved.
+        checkpoint.assert_called_once_with('sha1')
+
+    def test_scan_per_commit_blobs_moved_from_excluded_files(
+        self,
+        mock_logic,
+        mock_rootdir,
+    ):
+        with open('test_data/sample.diff') as f:
+            diff_content = f.read()
+
+        calls = self.git_calls(mock_rootdir)
+        calls[2:4] = [
+            SubprocessMock(
+                expected_input=(
+                    'git log --reverse --first-parent --format=%H %P%x09%ae '
+                    'sha256-hash..HEAD'
+                ),
+                mocked_output=(
+                    'sha1 sha256-hash\tfoo@example.com\n'
+                    'sha2 sha1\tfoo@example.com\n'
+                    'sha3 sha2\tfoo@example.com\n'
+                    'sha4 sha3\tfoo@example.com'
+                ),
+            ),
+
+            # Excluded, so it isn't scanned.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha256-hash sha1',
+                mocked_output=':000000 100644 000 eee A\texcluded/aws_credentials.json',
+            ),
+
+            # Moved out of the excluded directory.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha1 sha2',
+                mocked_output=':000000 100644 000 eee A\texamples/aws_credentials.json',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -p sha1 sha2 -- examples/aws_credentials.json'
+                ),
+                mocked_output=diff_content,
+            ),
+
+            # Copied to a different type of file.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha2 sha3',
+                mocked_output=':000000 100644 000 eee A\texamples/aws_credentials.py',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -p sha2 sha3 -- examples/aws_credentials.py'
+                ),
+                mocked_output=diff_content.replace('.json', '.py'),
+            ),
+
+            # Copied to the same type of file, so it's already been scanned.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha3 sha4',
+                mocked_output=':000000 100644 000 eee A\texamples/copy.json',
+            ),
+        ]
+
+        repo = mock_logic()
+        with mock_git_calls(*calls):
+            secrets = repo.scan(per_commit=True, exclude_files_regex='^excluded/')
+
+        assert sorted(secrets.data) == [
+            'examples/aws_credentials.json',
+            'examples/aws_credentials.py',
+        ]
+
+    def test_scan_per_commit_merged_refs(self, mock_logic, mock_rootdir):
+        calls = self.git_calls(mock_rootdir)
+        calls[2:4] = [
+            SubprocessMock(
+                expected_input=(
+                    'git log --reverse --first-parent --format=%H %P%x09%ae '
+                    'sha256-hash..HEAD --not pr1'
+                ),
+                mocked_output='sha1 sha256-hash pr1\tfoo@example.com',
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha256-hash sha1',
+                mocked_output=(
+                    ':100644 100644 aaa bbb M\tREADME.md\n'
+                    ':100644 100644 ddd eee M\texamples/aws_credentials.json'
+                ),
+            ),
+
+            # The pull request was scanned at the commit that's merged, so
+            # only the merge's own changes (e.g. conflict resolutions) are new.
+            SubprocessMock(
+                expected_input='git rev-list --parents -n 1 sha1',
+                mocked_output='sha1 sha256-hash pr1',
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM pr1 sha1',
+                mocked_output=':100644 100644 aaa bbb M\tREADME.md',
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -p sha256-hash sha1 -- README.md',
+                mocked_output=(
+                    'diff --git a/README.md b/README.md\n'
+                    '--- a/README.md\n'
+                    '+++ b/README.md\n'
+                    '@@ -1 +1,2 @@\n'
+                    ' # Hello\n'
+                    '+World\n'
+                ),
+            ),
+        ]
+
+        repo = mock_logic(ref_shas={'refs/pull/1/head': 'pr1'})
+        with mock_git_calls(*calls):
+            secrets = repo.scan(per_commit=True)
+
+        assert not secrets.data
+
+    def test_scan_refs(self, mock_logic, mock_rootdir):
+        with open('test_data/sample.diff') as f:
+            diff_content = f.read()
+
+        calls = self.git_calls(mock_rootdir)
+        calls[1] = SubprocessMock(
+            expected_input=(
+                'git fetch --quiet origin master:master --force '
+                '+refs/pull/*/head:refs/pull/*/head'
+            ),
+        )
+        calls[2:4] = [
+            # Commits already scanned on pull requests are skipped.
+            SubprocessMock(
+                expected_input=(
+                    'git log --reverse --first-parent --format=%H %P%x09%ae '
+                    'sha256-hash..HEAD --not pr1 pr3'
+                ),
+                mocked_output='sha1 sha256-hash\tfoo@example.com',
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha256-hash sha1',
+                mocked_output=':100644 100644 aaa bbb M\tREADME.md',
+            ),
+            SubprocessMock(
+                expected_input='git diff-tree -p sha256-hash sha1 -- README.md',
+                mocked_output=(
+                    'diff --git a/README.md b/README.md\n'
+                    '--- a/README.md\n'
+                    '+++ b/README.md\n'
+                    '@@ -1 +1,2 @@\n'
+                    ' # Hello\n'
+                    '+World\n'
+                ),
+            ),
+
+            # pull/1 hasn't changed since it was last scanned.
+            SubprocessMock(
+                expected_input=(
+                    'git for-each-ref --format=%(refname) %(objectname) '
+                    'refs/pull/*/head'
+                ),
+                mocked_output=(
+                    'refs/pull/1/head pr1\n'
+                    'refs/pull/2/head pr2'
+                ),
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git log --reverse --no-merges --format=%H %P%x09%ae '
+                    'pr2 --not HEAD pr1 pr3'
+                ),
+                mocked_output='pr2 sha256-hash\tkhock@yelp.com',
+            ),
+
+            # README.md was already scanned on the main branch.
+            SubprocessMock(
+                expected_input='git diff-tree -r --diff-filter AM sha256-hash pr2',
+                mocked_output=(
+                    ':100644 100644 aaa bbb M\tREADME.md\n'
+                    ':100644 100644 ddd eee M\texamples/aws_credentials.json'
+                ),
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -p sha256-hash pr2 -- examples/aws_credentials.json'
+                ),
+                mocked_output=diff_content,
+            ),
+        ]
+        calls.append(
+            SubprocessMock(
+                expected_input='git rev-parse HEAD',
+                mocked_output='sha1',
+            ),
+        )
+
+        repo = mock_logic(
+            refs=['refs/pull/*/head'],
+            ref_shas={
+                'refs/pull/1/head': 'pr1',
+                'refs/pull/3/head': 'pr3',
+            },
+        )
+        with mock_git_calls(*calls):
+            secrets = repo.scan(per_commit=True)
+            repo.update()
+
+        assert len(secrets.data['examples/aws_credentials.json']) == 3
+        assert set(
+            origin['commit']
+            for origin in repo.secret_origins.values()
+        ) == {'pr2'}
+
+        # Closed pull requests are no longer tracked.
+        assert repo.__dict__['ref_shas'] == {
+            'refs/pull/1/head': 'pr1',
+            'refs/pull/2/head': 'pr2',
+        }
+
     def git_calls(self, mock_rootdir):
         """We need to do a bunch of mocking, because there's a lot of git
         operations. This function handles all that.
@@ -231,6 +715,104 @@ class TestScan(object):
         ]
 
 
+class TestRescan(object):
+
+    def test_changed_plugins(self, mock_logic):
+        with open('test_data/sample.diff') as f:
+            diff_content = f.read()
+
+        plugins = metadata_factory('git@github.com:yelp/detect-secrets')['plugins']
+        scanned_plugins = dict(plugins)
+        del scanned_plugins['AWSKeyDetector']
+
+        repo = mock_logic(scanned_plugins=scanned_plugins)
+        assert repo.get_changed_plugins() == {'AWSKeyDetector': {}}
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input='git fetch --quiet origin master:master --force',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -r --diff-filter AM '
+                    '4b825dc642cb6eb9a060e54bf8d69288fbee4904 sha256-hash'
+                ),
+                mocked_output=(
+                    ':000000 100644 000 aaa A\texamples/aws_credentials.json\n'
+                    ':000000 100644 000 bbb A\timage.png'
+                ),
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git diff-tree -p 4b825dc642cb6eb9a060e54bf8d69288fbee4904 '
+                    'sha256-hash -- examples/aws_credentials.json'
+                ),
+                mocked_output=diff_content,
+            ),
+            SubprocessMock(
+                expected_input='git show HEAD:foobar',
+                mocked_output=b'',
+            ),
+        ):
+            secrets = repo.rescan(changed_plugins=True)
+
+        # Only the new plugin was run.
+        assert secrets.data['examples/aws_credentials.json']
+        assert set(
+            secret.type
+            for secret in secrets.data['examples/aws_credentials.json']
+        ) == {'AWS Access Key'}
+
+    def test_no_changed_plugins(self, mock_logic):
+        repo = mock_logic()
+        assert repo.get_changed_plugins() == {}
+
+        with mock_git_calls():
+            secrets = repo.rescan(changed_plugins=True)
+
+        assert not secrets.data
+
+    def test_scanned_plugins_only_saved_if_different(self, mock_logic):
+        repo = mock_logic()
+
+        repo.scanned_plugins = {}
+        assert repo.__dict__['scanned_plugins'] == {}
+
+        repo.scanned_plugins = repo.plugin_config
+        assert 'scanned_plugins' not in repo.__dict__
+
+
+class TestAudit(object):
+
+    def test_skips_baseline_file(self, mock_logic):
+        repo = mock_logic()
+        with mock.patch.object(
+            repo.storage,
+            'fetch_new_changes',
+        ) as mock_fetch, mock.patch.object(
+            repo.storage,
+            'audit',
+            return_value=iter([
+                {'filename': 'foobar'},
+                {'filename': 'config.py'},
+            ]),
+        ) as mock_audit:
+            secrets = list(repo.audit(jobs=2))
+
+        assert mock_fetch.called
+        mock_audit.assert_called_with(
+            repo.plugin_config,
+            exclude_files_regex=None,
+            exclude_lines_regex=None,
+            jobs=2,
+        )
+        assert secrets == [{'filename': 'config.py'}]
+
+
 class TestUpdate(object):
 
     def test_success(self, mock_logic):
@@ -247,6 +829,67 @@ class TestUpdate(object):
         assert repo.last_commit_hash == 'new_hash'
 
 
+class TestRecordActivity(object):
+
+    def test_first_scan(self, mock_logic):
+        repo = mock_logic()
+        repo.record_activity('sha256-hash', 2.5, now=3600)
+
+        assert repo.activity == {
+            'scan_seconds': 2.5,
+            'last_scanned': 3600,
+        }
+        assert repo.__dict__['activity'] == repo.activity
+
+    def test_updates_moving_averages(self, mock_logic):
+        repo = mock_logic(
+            activity={
+                'commit_rate': 1.0,
+                'scan_seconds': 2.0,
+                'last_scanned': 0,
+            },
+        )
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-list --count sha256-hash..HEAD',
+                mocked_output='8',
+            ),
+        ):
+            repo.record_activity('sha256-hash', 4.0, now=7200)
+
+        assert repo.activity == {
+            # 0.3 * (8 commits / 2 hours) + 0.7 * 1.0
+            'commit_rate': 1.9,
+            'scan_seconds': 2.6,
+            'last_scanned': 7200,
+        }
+
+    def test_unknown_commits(self, mock_logic):
+        repo = mock_logic(
+            activity={
+                'commit_rate': 1.0,
+                'scan_seconds': 2.0,
+                'last_scanned': 0,
+            },
+        )
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-list --count sha256-hash..HEAD',
+                should_throw_exception=True,
+                mocked_output='fatal: Invalid revision range',
+            ),
+        ):
+            repo.record_activity('sha256-hash', 2.0, now=7200)
+
+        assert repo.activity['commit_rate'] == 1.0
+        assert repo.activity['last_scanned'] == 7200
+
+    def test_not_saved_if_unset(self, mock_logic):
+        assert 'activity' not in mock_logic().__dict__
+
+
 class TestSave(object):
 
     @pytest.mark.parametrize(
@@ -315,9 +958,11 @@ class TestSave(object):
 
 def assert_writes_accurately(mock_open, mock_rootdir):
     mock_open.assert_called_with(
-        '{}/tracked/{}.json'.format(
+        '{}/tracked/{}'.format(
             mock_rootdir,
-            FileStorage.hash_filename('yelp/detect-secrets'),
+            get_shard_path(
+                '{}.json'.format(FileStorage.hash_filename('yelp/detect-secrets')),
+            ),
         ),
         'w',
     )
@@ -6,6 +6,7 @@ import pytest
 from detect_secrets_server.repos.base_tracked_repo import OverrideLevel
 from detect_secrets_server.repos.s3_tracked_repo import S3LocalTrackedRepo
 from detect_secrets_server.repos.s3_tracked_repo import S3TrackedRepo
+from detect_secrets_server.storage.base import get_shard_path
 from testing.factories import metadata_factory
 
 
@@ -23,7 +24,7 @@ class TestS3TrackedRepo(object):
                 Key='prefix/{}'.format(filename),
                 Filename='{}/tracked/{}'.format(
                     mock_rootdir,
-                    filename,
+                    get_shard_path(filename),
                 ),
             )
 
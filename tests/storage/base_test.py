@@ -1,3 +1,4 @@
+import os
 import subprocess
 from contextlib import contextmanager
 from unittest import mock
@@ -6,7 +7,10 @@ import pytest
 
 from detect_secrets_server.storage.base import BaseStorage
 from detect_secrets_server.storage.base import get_filepath_safe
+from detect_secrets_server.storage.base import get_shard_path
+from detect_secrets_server.storage.base import get_sharded_filepath_safe
 from detect_secrets_server.storage.base import LocalGitRepository
+from detect_secrets_server.storage.base import migrate_to_sharded_layout
 from testing.mocks import mock_git_calls
 from testing.mocks import SubprocessMock
 
@@ -95,6 +99,310 @@ class TestBaseStorage(object):
         ):
             repo.clone()
 
+    def test_clone_from_seed_bundle(self, base_storage, mock_rootdir):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        seed = mock.Mock()
+        seed.find_bundle.return_value = '/seed/yelp/detect-secrets.bundle'
+
+        location = '{}/repos/{}'.format(
+            mock_rootdir,
+            get_shard_path(repo.hash_filename('yelp/detect-secrets')),
+        )
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input=(
+                    'git clone /seed/yelp/detect-secrets.bundle {} --bare'.format(location)
+                ),
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git remote set-url origin git@github.com:yelp/detect-secrets'
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input='git fetch --quiet origin master:master --force',
+            ),
+        ):
+            repo.clone(seed=seed)
+
+        seed.find_bundle.assert_called_with(
+            'yelp/detect-secrets',
+            repo.hash_filename('yelp/detect-secrets'),
+        )
+        assert not seed.find_mirror.called
+
+    def test_clone_falls_back_to_remote_if_bundle_is_invalid(
+        self,
+        base_storage,
+        mock_rootdir,
+    ):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        seed = mock.Mock()
+        seed.find_bundle.return_value = '/seed/bad.bundle'
+        seed.find_mirror.return_value = None
+
+        location = '{}/repos/{}'.format(
+            mock_rootdir,
+            get_shard_path(repo.hash_filename('yelp/detect-secrets')),
+        )
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git clone /seed/bad.bundle {} --bare'.format(location),
+                mocked_output=b'error: not a bundle',
+                should_throw_exception=True,
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git clone git@github.com:yelp/detect-secrets {} --bare'.format(location)
+                ),
+            ),
+        ):
+            repo.clone(seed=seed)
+
+    def test_clone_from_seed_mirror(self, base_storage, mock_rootdir):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        seed = mock.Mock()
+        seed.find_bundle.return_value = None
+        seed.find_mirror.return_value = '/seed/yelp/detect-secrets.git'
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input=(
+                    'git clone git@github.com:yelp/detect-secrets {}/repos/{} --bare '
+                    '--reference-if-able /seed/yelp/detect-secrets.git --dissociate'.format(
+                        mock_rootdir,
+                        get_shard_path(repo.hash_filename('yelp/detect-secrets')),
+                    )
+                ),
+            ),
+        ):
+            repo.clone(seed=seed)
+
+    def test_clone_ignores_seed_if_already_cloned(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        os.makedirs(repo._repo_location)
+
+        seed = mock.Mock()
+        with mock.patch(
+            'detect_secrets_server.storage.base.git.clone_repo_to_location',
+        ) as mock_clone:
+            repo.clone(seed=seed)
+
+        assert not seed.find_bundle.called
+        mock_clone.assert_called_with(
+            'git@github.com:yelp/detect-secrets',
+            repo._repo_location,
+            reference=None,
+            dissociate=True,
+            timeout=None,
+        )
+
+    def test_clone_removes_partial_clone_on_timeout(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        def partial_clone(*args, **kwargs):
+            os.makedirs(repo._repo_location)
+            raise subprocess.TimeoutExpired('git clone', kwargs['timeout'])
+
+        with mock.patch(
+            'detect_secrets_server.storage.base.git.clone_repo_to_location',
+            side_effect=partial_clone,
+        ), pytest.raises(
+            subprocess.TimeoutExpired,
+        ):
+            repo.clone(timeout=5)
+
+        assert not os.path.exists(repo._repo_location)
+
+    def test_fetch_new_changes_reclones_evicted_repo(self, base_storage, mock_rootdir):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output=b'fatal: not a git repository',
+                should_throw_exception=True,
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git clone git@github.com:yelp/detect-secrets {}/repos/{} --bare'.format(
+                        mock_rootdir,
+                        get_shard_path(repo.hash_filename('yelp/detect-secrets')),
+                    )
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input='git fetch --quiet origin master:master --force',
+            ),
+        ):
+            repo.fetch_new_changes()
+
+    def test_fetch_new_changes_does_not_reclone_existing_repo(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output=b'fatal: something else',
+                should_throw_exception=True,
+            ),
+        ), mock.patch(
+            'detect_secrets_server.storage.base.os.path.isdir',
+            return_value=True,
+        ), pytest.raises(
+            subprocess.CalledProcessError,
+        ):
+            repo.fetch_new_changes()
+
+    def test_fetch_new_changes_logs_ref_updates(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git -c core.logAllRefUpdates=always '
+                    'fetch --quiet origin master:master --force'
+                ),
+            ),
+        ):
+            repo.fetch_new_changes(log_ref_updates=True)
+
+    def test_fetch_new_changes_updates_refs(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git fetch --quiet origin master:master --force '
+                    '+refs/heads/*:refs/heads/* '
+                    '+refs/pull/*/head:refs/pull/*/head'
+                ),
+            ),
+        ):
+            repo.fetch_new_changes(
+                ref_patterns=['refs/heads/*', 'refs/pull/*/head'],
+            )
+
+    @pytest.mark.parametrize(
+        'sha,merge_bases,expected',
+        (
+            # The last scanned commit still exists.
+            ('new_sha', ('new_sha',), 'new_sha'),
+
+            # It was rewritten, so we fall back to what preceded it.
+            ('new_sha', (None, 'old_sha'), 'old_sha'),
+
+            # Nothing survived the rewrite.
+            ('new_sha', (None, None), None),
+
+            # Without knowing what preceded it, we can't tell which commits
+            # are new.
+            ('unknown_sha', (None,), None),
+        ),
+    )
+    def test_find_surviving_ancestor(self, base_storage, sha, merge_bases, expected):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        reflog = os.path.join(repo._repo_location, 'logs/refs/heads/master')
+        os.makedirs(os.path.dirname(reflog))
+        with open(reflog, 'w') as f:
+            f.write(
+                '{zero} old_sha A <a@example.com> 1 +0000\tclone\n'
+                'old_sha new_sha A <a@example.com> 2 +0000\tfetch: fast-forward\n'
+                'new_sha rewritten_sha A <a@example.com> 3 +0000\tfetch: forced-update\n'.format(
+                    zero='0' * 40,
+                )
+            )
+
+        candidates = (sha, 'old_sha')
+        calls = [
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+        ]
+        for candidate, merge_base in zip(candidates, merge_bases):
+            calls.append(
+                SubprocessMock(
+                    expected_input='git merge-base {} HEAD'.format(candidate),
+                    mocked_output=merge_base or b'fatal: Not a valid commit name',
+                    should_throw_exception=not merge_base,
+                ),
+            )
+
+        with mock_git_calls(*calls):
+            assert repo.find_surviving_ancestor(sha) == expected
+
+    def test_enforce_clone_disk_budget_keeps_current_repo(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock.patch(
+            'detect_secrets_server.storage.base.RepositoryCache.evict',
+        ) as mock_evict:
+            repo.enforce_clone_disk_budget(100)
+
+        mock_evict.assert_called_with(100, keep=(repo._repo_location,))
+
+    def test_get_attributes_files(self, base_storage):
+        with assert_directories_created():
+            repo = base_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input=(
+                    'git ls-tree HEAD -- .gitattributes a/.gitattributes '
+                    'a/b/.gitattributes'
+                ),
+                mocked_output=(
+                    '100644 blob root_sha\t.gitattributes\n'
+                    '100644 blob nested_sha\ta/b/.gitattributes\n'
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git cat-file blob root_sha',
+                mocked_output='*.js linguist-generated\n',
+            ),
+            SubprocessMock(
+                expected_input='git cat-file blob nested_sha',
+                mocked_output='*.js -linguist-generated\n',
+            ),
+        ):
+            assert repo.get_attributes_files(['', 'a', 'a/b']) == {
+                '': '*.js linguist-generated\n',
+                'a/b': '*.js -linguist-generated\n',
+            }
+
     @staticmethod
     def construct_subprocess_mock_git_clone(repo, mocked_output, mock_rootdir):
         return SubprocessMock(
@@ -102,7 +410,7 @@ class TestBaseStorage(object):
                 'git clone git@github.com:yelp/detect-secrets {} --bare'.format(
                     '{}/repos/{}'.format(
                         mock_rootdir,
-                        repo.hash_filename('yelp/detect-secrets'),
+                        get_shard_path(repo.hash_filename('yelp/detect-secrets')),
                     ),
                 )
             ),
@@ -164,6 +472,39 @@ class TestGetFilepathSafe(object):
             get_filepath_safe('/path/to', '../../etc/pwd')
 
 
+class TestShardedLayout(object):
+
+    def test_get_shard_path(self):
+        assert get_shard_path('abcdef') == 'ab/cd/abcdef'
+
+    def test_prefers_legacy_location_if_exists(self, mock_rootdir):
+        os.mkdir(os.path.join(mock_rootdir, 'abcdef'))
+
+        assert get_sharded_filepath_safe(mock_rootdir, 'abcdef') == \
+            os.path.join(mock_rootdir, 'abcdef')
+        assert get_sharded_filepath_safe(mock_rootdir, 'fedcba') == \
+            os.path.join(mock_rootdir, 'fe/dc/fedcba')
+
+    def test_migrate(self, mock_rootdir):
+        for name in ('abcdef', 'excluded', 'ab'):
+            os.mkdir(os.path.join(mock_rootdir, name))
+
+        # Name conflicts are left alone.
+        os.makedirs(os.path.join(mock_rootdir, 'fe/dc/fedcba'))
+        os.mkdir(os.path.join(mock_rootdir, 'fedcba'))
+
+        assert migrate_to_sharded_layout(
+            mock_rootdir,
+            excluded=('excluded',),
+        ) == [
+            os.path.join(mock_rootdir, 'ab/cd/abcdef'),
+        ]
+        assert sorted(os.listdir(mock_rootdir)) == ['ab', 'excluded', 'fe', 'fedcba']
+
+        # Idempotent
+        assert migrate_to_sharded_layout(mock_rootdir, excluded=('excluded',)) == []
+
+
 @contextmanager
 def assert_directories_created(directories_created=None):
     """
@@ -179,7 +520,7 @@ def assert_directories_created(directories_created=None):
 
         if directories_created:
             makedirs.assert_has_calls(map(
-                lambda x: mock.call(x),
+                lambda x: mock.call(x, exist_ok=True),
                 directories_created,
             ))
         else:
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from detect_secrets_server.storage.cache import LAST_ACCESS_FILENAME
+from detect_secrets_server.storage.cache import RepositoryCache
+
+
+class TestRepositoryCache(object):
+
+    def test_get_clones_supports_both_layouts(self, mock_clone):
+        legacy = mock_clone('abcdef', size=10, last_access=3)
+        sharded = mock_clone('fe/dc/fedcba', size=20, last_access=1)
+        never_accessed = mock_clone('12/34/123456', size=30)
+
+        assert [
+            location
+            for location, _, _ in self.cache(mock_clone.directory).get_clones()
+        ] == [sharded, legacy, never_accessed]
+
+    def test_evicts_least_recently_used(self, mock_clone):
+        oldest = mock_clone('aa/aa/aaaa', size=100, last_access=1)
+        current = mock_clone('bb/bb/bbbb', size=100, last_access=2)
+        older = mock_clone('cc/cc/cccc', size=100, last_access=3)
+        newest = mock_clone('dd/dd/dddd', size=100, last_access=4)
+
+        evicted = self.cache(mock_clone.directory).evict(250, keep=(current,))
+
+        assert evicted == [oldest, older]
+        assert os.path.isdir(current)
+        assert os.path.isdir(newest)
+
+    def test_does_nothing_if_within_budget(self, mock_clone):
+        mock_clone('aa/aa/aaaa', size=100, last_access=1)
+
+        assert self.cache(mock_clone.directory).evict(1000) == []
+
+    def test_record_access(self, mock_clone):
+        location = mock_clone('aa/aa/aaaa', size=100, last_access=1)
+
+        RepositoryCache.record_access(location)
+
+        assert os.path.getmtime(os.path.join(location, LAST_ACCESS_FILENAME)) > 1
+
+    def test_record_access_ignores_missing_clones(self, mock_rootdir):
+        RepositoryCache.record_access(os.path.join(mock_rootdir, 'does_not_exist'))
+
+    @staticmethod
+    def cache(directory):
+        return RepositoryCache(directory)
+
+
+@pytest.fixture
+def mock_clone(mock_rootdir):
+    def wrapped(name, size, last_access=None):
+        """Creates something that looks like a bare git repository."""
+        location = os.path.join(mock_rootdir, name)
+        os.makedirs(os.path.join(location, 'objects'))
+        with open(os.path.join(location, 'HEAD'), 'w') as f:
+            f.write('ref: refs/heads/master')
+        with open(os.path.join(location, 'objects', 'pack'), 'w') as f:
+            f.write('a' * (size - len('ref: refs/heads/master')))
+
+        if last_access is not None:
+            with open(os.path.join(location, LAST_ACCESS_FILENAME), 'w'):
+                pass
+            os.utime(os.path.join(location, LAST_ACCESS_FILENAME), (last_access, last_access))
+
+        return location
+
+    wrapped.directory = mock_rootdir
+    return wrapped
@@ -1,4 +1,8 @@
 import json
+import os
+import subprocess
+import sys
+import textwrap
 
 import pytest
 
@@ -70,7 +74,111 @@ class TestFileStorageWithLocalGit(object):
             local_file_storage.get('mock_filename')
 
             m.assert_called_with(
-                '{}/tracked/local/mock_filename.json'.format(
+                '{}/tracked/local/mo/ck/mock_filename.json'.format(
                     mock_rootdir,
                 ),
             )
+
+
+class TestShardedLayout(object):
+
+    def test_get_tracked_repositories_supports_both_layouts(
+        self,
+        local_file_storage,
+        mock_rootdir,
+    ):
+        local_file_storage.setup('git@github.com:yelp/detect-secrets')
+        for directory, name in (
+            ('tracked', 'aaaa'),
+            ('tracked/local', 'cccc'),
+        ):
+            with open(os.path.join(mock_rootdir, directory, name + '.json'), 'w') as f:
+                f.write(json.dumps({'repo': name}))
+
+        local_file_storage.put('dddd', {'repo': 'dddd'})
+        FileStorage(mock_rootdir).put('bbbb', {'repo': 'bbbb'})
+
+        assert os.path.isfile(os.path.join(mock_rootdir, 'tracked/bb/bb/bbbb.json'))
+        assert os.path.isfile(os.path.join(mock_rootdir, 'tracked/local/dd/dd/dddd.json'))
+        assert sorted(
+            (repo['repo'], is_local)
+            for repo, is_local in local_file_storage.get_tracked_repositories()
+        ) == [
+            ('aaaa', False),
+            ('bbbb', False),
+            ('cccc', True),
+            ('dddd', True),
+        ]
+
+    def test_migrate(self, local_file_storage, mock_rootdir):
+        local_file_storage.setup('git@github.com:yelp/detect-secrets')
+        os.mkdir(os.path.join(mock_rootdir, 'repos'))
+        for path in ('repos/aaaa', 'tracked/bbbb.json', 'tracked/local/cccc.json'):
+            with open(os.path.join(mock_rootdir, path), 'w'):
+                pass
+
+        assert local_file_storage.migrate() == [
+            os.path.join(mock_rootdir, path)
+            for path in (
+                'repos/aa/aa/aaaa',
+                'tracked/bb/bb/bbbb.json',
+                'tracked/local/cc/cc/cccc.json',
+            )
+        ]
+        assert local_file_storage.get_tracked_file_location('cccc') == \
+            os.path.join(mock_rootdir, 'tracked/local/cc/cc/cccc.json')
+
+
+class TestLease(object):
+
+    def test_exclusive(self, file_storage):
+        file_storage.setup('git@github.com:yelp/detect-secrets')
+
+        lease = file_storage.acquire_lease('key', 60)
+        assert lease
+        assert not file_storage.acquire_lease('key', 60)
+
+        lease.release()
+        with file_storage.acquire_lease('key', 60) as lease:
+            assert lease
+
+    def test_independent_per_key(self, file_storage):
+        file_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with file_storage.acquire_lease('first', 60):
+            assert file_storage.acquire_lease('second', 60)
+
+    def test_across_processes(self, file_storage, mock_rootdir):
+        file_storage.setup('git@github.com:yelp/detect-secrets')
+
+        # Holds the lease, until its stdin is closed.
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                '-c',
+                textwrap.dedent("""
+                    import sys
+                    from detect_secrets_server.storage.file import FileStorage
+
+                    storage = FileStorage({!r}).setup(
+                        'git@github.com:yelp/detect-secrets',
+                    )
+                    lease = storage.acquire_lease('key', 60)
+                    print(lease.owner, flush=True)
+                    sys.stdin.read()
+                """).format(mock_rootdir),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            owner = process.stdout.readline().decode().strip()
+            assert owner.endswith(':{}'.format(process.pid))
+
+            assert not file_storage.acquire_lease('key', 60)
+        finally:
+            process.stdin.close()
+            process.wait()
+
+        # Released by the kernel, once its owner exits.
+        assert file_storage.acquire_lease('key', 60)
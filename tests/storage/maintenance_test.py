@@ -0,0 +1,99 @@
+import os
+import textwrap
+
+import pytest
+
+from detect_secrets_server.storage.maintenance import MAINTENANCE_FILENAME
+from detect_secrets_server.storage.maintenance import RepositoryMaintenance
+from testing.mocks import mock_git_calls
+from testing.mocks import SubprocessMock
+
+
+class TestRepositoryMaintenance(object):
+
+    @pytest.mark.parametrize(
+        'packs,loose_size,expected',
+        [
+            (10, 0, False),
+            (11, 0, True),
+            (1, 1024, False),
+            (1, 1025, True),
+        ],
+    )
+    def test_is_needed(self, mock_rootdir, packs, loose_size, expected):
+        maintenance = RepositoryMaintenance(
+            mock_rootdir,
+            max_packs=10,
+            max_loose_size=1024 ** 2,
+        )
+
+        assert maintenance.is_needed({
+            'packs': packs,
+            'size': loose_size,
+        }) is expected
+
+    def test_skips_if_not_needed(self, mock_rootdir):
+        with mock_git_calls(
+            count_objects(packs=1),
+        ):
+            assert RepositoryMaintenance(mock_rootdir).run() is None
+
+        assert not os.path.exists(os.path.join(mock_rootdir, MAINTENANCE_FILENAME))
+
+    @pytest.mark.parametrize(
+        'packs,force',
+        [
+            (50, False),
+            (1, True),
+        ],
+    )
+    def test_run(self, mock_rootdir, packs, force):
+        maintenance = RepositoryMaintenance(mock_rootdir)
+        with mock_git_calls(
+            count_objects(packs=packs, count=200),
+            SubprocessMock(
+                expected_input='git log --max-count=50 --raw --format=%H HEAD',
+            ),
+            SubprocessMock(
+                expected_input='git repack -d -q --geometric=2 --write-midx',
+            ),
+            SubprocessMock(
+                expected_input='git prune --expire=2.weeks.ago',
+            ),
+            SubprocessMock(
+                expected_input='git commit-graph write --reachable --split',
+            ),
+            count_objects(packs=2),
+            SubprocessMock(
+                expected_input='git log --max-count=50 --raw --format=%H HEAD',
+            ),
+        ):
+            report = maintenance.run(force=force)
+
+        assert report['packs_before'] == packs
+        assert report['packs_after'] == 2
+        assert report['loose_objects_before'] == 200
+        assert report['loose_objects_after'] == 0
+        assert report['diff_seconds_before'] >= 0
+        assert report['diff_seconds_after'] >= 0
+
+        assert maintenance.get_last_report() == report
+
+    def test_get_last_report_without_maintenance(self, mock_rootdir):
+        assert RepositoryMaintenance(mock_rootdir).get_last_report() is None
+
+
+def count_objects(packs, count=0):
+    return SubprocessMock(
+        expected_input='git count-objects -v',
+        mocked_output=textwrap.dedent("""
+            count: {count}
+            size: {count}
+            in-pack: 1000
+            packs: {packs}
+            size-pack: 1000
+            prune-packable: 0
+            garbage: 0
+            size-garbage: 0
+        """.format(count=count, packs=packs))[1:],
+    )
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from detect_secrets_server.storage.base import get_shard_path
+from detect_secrets_server.storage.file import FileStorage
+from detect_secrets_server.storage.pool import get_pool_name_for_root_commits
+from detect_secrets_server.storage.pool import ObjectPool
+from testing.mocks import mock_git_calls
+from testing.mocks import SubprocessMock
+
+
+class TestObjectPool(object):
+
+    def test_clone_borrows_from_pool(self, storage, pool_location, mock_rootdir):
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git init --bare --quiet',
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git fetch --quiet git@github.com:yelp/detect-secrets '
+                    '+refs/heads/*:refs/remotes/{}/*'.format(
+                        hashlib.sha1(b'yelp/detect-secrets').hexdigest(),
+                    )
+                ),
+            ),
+            SubprocessMock(
+                expected_input=(
+                    'git clone git@github.com:yelp/detect-secrets {}/repos/{} '
+                    '--bare --reference {}'.format(
+                        mock_rootdir,
+                        get_shard_path(storage.hash_filename('yelp/detect-secrets')),
+                        pool_location,
+                    )
+                ),
+            ),
+        ):
+            storage.clone()
+
+        assert os.path.isdir(pool_location)
+
+    def test_fetch_new_changes_fetches_into_pool_first(self, storage, pool_location):
+        os.makedirs(pool_location)
+        open(os.path.join(pool_location, 'HEAD'), 'w').close()
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input=(
+                    'git fetch --quiet git@github.com:yelp/detect-secrets '
+                    '+refs/heads/*:refs/remotes/{}/*'.format(
+                        hashlib.sha1(b'yelp/detect-secrets').hexdigest(),
+                    )
+                ),
+            ),
+            SubprocessMock(
+                expected_input='git rev-parse --abbrev-ref HEAD',
+                mocked_output='master',
+            ),
+            SubprocessMock(
+                expected_input='git fetch --quiet origin master:master --force',
+            ),
+        ):
+            storage.fetch_new_changes()
+
+    def test_setup_from_multiple_threads(self, mock_rootdir):
+        initialized = []
+
+        def initialize_bare_repo(location):
+            initialized.append(location)
+
+            # Gives the other thread a chance to initialize it too.
+            time.sleep(0.1)
+            open(os.path.join(location, 'HEAD'), 'w').close()
+
+        def setup():
+            pool = ObjectPool(mock_rootdir, 'pool').setup()
+
+            # Otherwise, it would be fetched into before it's initialized.
+            return os.path.isfile(os.path.join(pool.location, 'HEAD'))
+
+        with mock.patch(
+            'detect_secrets_server.storage.pool.git.initialize_bare_repo',
+            side_effect=initialize_bare_repo,
+        ), ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(setup) for _ in range(2)]
+            assert all(future.result() for future in futures)
+
+        assert initialized == [ObjectPool(mock_rootdir, 'pool').location]
+
+    def test_attach(self, mock_rootdir):
+        pool = ObjectPool(mock_rootdir, 'pool')
+        os.makedirs(pool.location)
+        clone = os.path.join(mock_rootdir, 'clone')
+        os.makedirs(os.path.join(clone, 'objects'))
+
+        with mock_git_calls(
+            SubprocessMock(expected_input='git repack -a -d -q'),
+            SubprocessMock(expected_input='git repack -a -d -l -q'),
+            SubprocessMock(expected_input='git prune-packed -q'),
+        ):
+            pool.attach(clone)
+
+        # Attaching twice is a no-op.
+        with mock_git_calls():
+            pool.attach(clone)
+
+        with open(os.path.join(clone, 'objects/info/alternates')) as f:
+            assert f.read() == os.path.join(pool.location, 'objects') + '\n'
+
+    def test_get_report(self, mock_rootdir):
+        members = [
+            mock.Mock(
+                get_reachable_objects_size=mock.Mock(return_value=1000),
+                get_local_objects_size=mock.Mock(return_value=local_size),
+            )
+            for local_size in (0, 100)
+        ]
+
+        with mock_git_calls(
+            SubprocessMock(
+                expected_input='git count-objects -v',
+                mocked_output='count: 0\nsize: 0\nin-pack: 9\npacks: 1\nsize-pack: 1\n',
+            ),
+        ):
+            assert ObjectPool(mock_rootdir, 'pool').get_report(members) == {
+                'pool': 'pool',
+                'repos': 2,
+                'pool_size': 1024,
+                'disk_saved': 2000 - 100 - 1024,
+            }
+
+
+@pytest.mark.parametrize(
+    'root_commits, expected',
+    [
+        ([], None),
+        (['bbb', 'aaa'], 'root-aaa'),
+    ],
+)
+def test_get_pool_name_for_root_commits(root_commits, expected):
+    assert get_pool_name_for_root_commits(root_commits) == expected
+
+
+@pytest.fixture
+def storage(mock_rootdir):
+    with mock.patch(
+        'detect_secrets_server.storage.base.os.makedirs',
+    ):
+        return FileStorage(mock_rootdir).setup(
+            'git@github.com:yelp/detect-secrets',
+            object_pool='forks',
+        )
+
+
+@pytest.fixture
+def pool_location(mock_rootdir):
+    return ObjectPool(mock_rootdir, 'forks').location
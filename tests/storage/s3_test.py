@@ -4,6 +4,7 @@ from unittest import mock
 import pytest
 
 from detect_secrets_server.storage.s3 import S3Storage
+from testing.benchmarks import storage as storage_benchmark
 from testing.mocks import mock_open
 
 
@@ -67,3 +68,147 @@ def mock_logic(mocked_boto, mock_rootdir):
             'prefix': 'prefix',
         },
     )
+
+
+class TestWithLocalS3(object):
+
+    def test_upload_and_get(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+        local_s3_storage.put('filename', {'key': 'value'})
+        local_s3_storage.upload('filename', {'key': 'value'})
+
+        assert local_s3_storage.is_file_uploaded('filename')
+        assert local_s3_storage.get('filename') == {'key': 'value'}
+        assert local_s3.stats.requests == {
+            'PutObject': 1,
+            'ListObjectsV2': 1,
+            'GetObject': 1,
+        }
+
+    def test_get_missing(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+
+        with pytest.raises(FileNotFoundError):
+            local_s3_storage.get('filename')
+
+    def test_get_tracked_repositories_paginates(self, local_s3, local_s3_storage):
+        for index in range(local_s3.MAX_KEYS + 5):
+            local_s3.put_object(
+                Bucket='pail',
+                Key='prefix/{}.json'.format(index),
+                Body='{{"repo": "{}"}}'.format(index),
+            )
+        local_s3.stats.reset()
+
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+        repos = list(local_s3_storage.get_tracked_repositories())
+
+        assert len(repos) == local_s3.MAX_KEYS + 5
+        assert local_s3.stats.requests['ListObjects'] == 2
+
+
+class TestLease(object):
+
+    def test_exclusive(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+
+        lease = local_s3_storage.acquire_lease('key', 60)
+        assert lease
+        assert not local_s3_storage.acquire_lease('key', 60)
+
+        lease.release()
+        assert not local_s3.buckets['pail']
+
+        with local_s3_storage.acquire_lease('key', 60) as lease:
+            assert lease
+
+    def test_takes_over_expired_lease(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+
+        expired = local_s3_storage.acquire_lease('key', 60)
+        with mock.patch(
+            'detect_secrets_server.storage.s3.time.time',
+            return_value=expired.expires + 1,
+        ):
+            lease = local_s3_storage.acquire_lease('key', 60)
+
+        assert lease.etag != expired.etag
+
+        # The previous owner can no longer release it.
+        local_s3.stats.reset()
+        expired.release()
+        assert local_s3.buckets['pail']
+        assert local_s3.stats.requests == {'DeleteObject': 1}
+
+        lease.release()
+        assert not local_s3.buckets['pail']
+
+    def test_release_after_deletion(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+
+        lease = local_s3_storage.acquire_lease('key', 60)
+        local_s3.buckets['pail'].clear()
+
+        lease.release()
+        assert not lease.etag
+
+    def test_lost_race(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+        local_s3_storage.acquire_lease('key', -1)
+
+        put_object = local_s3.put_object
+
+        def race(**kwargs):
+            if kwargs.get('IfMatch'):
+                # Someone else takes over the expired lease first.
+                put_object(Bucket=kwargs['Bucket'], Key=kwargs['Key'], Body='{}')
+
+            return put_object(**kwargs)
+
+        with mock.patch.object(local_s3, 'put_object', side_effect=race):
+            assert not local_s3_storage.acquire_lease('key', 60)
+
+    def test_not_listed_as_tracked_repository(self, local_s3, local_s3_storage):
+        local_s3_storage.setup('git@github.com:yelp/detect-secrets')
+        local_s3.put_object(
+            Bucket='pail',
+            Key='prefix/filename.json',
+            Body='{"repo": "git@github.com:yelp/detect-secrets"}',
+        )
+
+        with local_s3_storage.acquire_lease('key', 60):
+            assert list(local_s3_storage.get_tracked_repositories()) == [
+                ({'repo': 'git@github.com:yelp/detect-secrets'}, None),
+            ]
+
+
+class TestStorageBenchmark(object):
+    """Guards against regressions in the number of S3 requests per action."""
+
+    def test_request_counts(self, mock_rootdir):
+        results = storage_benchmark.run(10, root_dir=mock_rootdir)
+
+        assert {
+            action: metrics['total_requests']
+            for action, metrics in results.items()
+        } == {
+            # Each repository's previous metadata is looked up, to carry
+            # over the plugins it was scanned with.
+            'add': 30,
+            'list': 1,
+            'install': 1,
+            'scan': 30,
+        }
+
+
+@pytest.fixture
+def local_s3_storage(local_s3, mock_rootdir):
+    yield S3Storage(
+        mock_rootdir,
+        {
+            'access_key': 'will_be_mocked',
+            'secret_access_key': 'will_be_mocked',
+            'bucket': 'pail',
+            'prefix': 'prefix',
+        },
+    )
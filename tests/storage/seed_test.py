@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from detect_secrets_server.storage.seed import CloneSeed
+
+
+class TestCloneSeed(object):
+
+    @pytest.mark.parametrize(
+        'filename',
+        [
+            'abcdef.bundle',
+            'yelp/detect-secrets.bundle',
+        ],
+    )
+    def test_find_bundle(self, seed_dir, filename):
+        path = seed_dir.create_file(filename)
+
+        assert self.seed(seed_dir).find_bundle('yelp/detect-secrets', 'abcdef') == path
+
+    def test_prefers_hashed_bundle(self, seed_dir):
+        path = seed_dir.create_file('abcdef.bundle')
+        seed_dir.create_file('yelp/detect-secrets.bundle')
+
+        assert self.seed(seed_dir).find_bundle('yelp/detect-secrets', 'abcdef') == path
+
+    @pytest.mark.parametrize(
+        'directory',
+        [
+            'ab/cd/abcdef',
+            'abcdef',
+            'yelp/detect-secrets.git',
+            'yelp/detect-secrets',
+        ],
+    )
+    def test_find_mirror(self, seed_dir, directory):
+        path = seed_dir.create_repo(directory)
+
+        assert self.seed(seed_dir).find_mirror('yelp/detect-secrets', 'abcdef') == path
+
+    def test_ignores_directories_that_are_not_repositories(self, seed_dir):
+        os.makedirs(os.path.join(seed_dir.root, 'yelp/detect-secrets'))
+
+        assert self.seed(seed_dir).find_mirror('yelp/detect-secrets', 'abcdef') is None
+
+    def test_nothing_found(self, seed_dir):
+        seed = self.seed(seed_dir)
+
+        assert seed.find_bundle('../../etc/passwd', 'abcdef') is None
+        assert seed.find_mirror('yelp/detect-secrets', 'abcdef') is None
+
+    @staticmethod
+    def seed(seed_dir):
+        return CloneSeed(seed_dir.root)
+
+
+@pytest.fixture
+def seed_dir(mock_rootdir):
+    class SeedDirectory(object):
+        root = os.path.realpath(mock_rootdir)
+
+        def create_file(self, filename):
+            path = os.path.join(self.root, filename)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+
+            with open(path, 'w'):
+                pass
+
+            return path
+
+        def create_repo(self, directory):
+            path = os.path.join(self.root, directory)
+            os.makedirs(os.path.join(path, 'objects'))
+            self.create_file(os.path.join(directory, 'HEAD'))
+
+            return path
+
+    return SeedDirectory()
@@ -0,0 +1,121 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from detect_secrets_server.util.cron import CronSchedule
+from detect_secrets_server.util.cron import get_runs_per_hour
+from detect_secrets_server.util.cron import is_valid_crontab
+from detect_secrets_server.util.cron import spread_crontab
+
+
+class TestCronSchedule(object):
+
+    @pytest.mark.parametrize(
+        'expression, after, expected',
+        [
+            ('* * * * *', datetime(2020, 1, 1, 0, 0, 30), datetime(2020, 1, 1, 0, 1)),
+            ('0 0 * * *', datetime(2020, 1, 1, 0, 0), datetime(2020, 1, 2, 0, 0)),
+            ('@daily', datetime(2020, 1, 1, 12, 0), datetime(2020, 1, 2, 0, 0)),
+            ('@hourly', datetime(2020, 1, 1, 12, 30), datetime(2020, 1, 1, 13, 0)),
+            ('*/15 * * * *', datetime(2020, 1, 1, 12, 31), datetime(2020, 1, 1, 12, 45)),
+            ('5/15 * * * *', datetime(2020, 1, 1, 12, 51), datetime(2020, 1, 1, 13, 5)),
+            ('30 9-17 * * *', datetime(2020, 1, 1, 17, 30), datetime(2020, 1, 2, 9, 30)),
+            ('0 0,12 * * *', datetime(2020, 1, 1, 1, 0), datetime(2020, 1, 1, 12, 0)),
+            ('0 0 31 * *', datetime(2020, 4, 1), datetime(2020, 5, 31)),
+            ('0 0 29 feb *', datetime(2021, 1, 1), datetime(2024, 2, 29)),
+            ('59 23 31 12 *', datetime(2020, 12, 31, 23, 59), datetime(2021, 12, 31, 23, 59)),
+
+            # 2020-01-01 is a Wednesday.
+            ('0 0 * * mon', datetime(2020, 1, 1), datetime(2020, 1, 6)),
+            ('0 0 * * 0', datetime(2020, 1, 1), datetime(2020, 1, 5)),
+            ('0 0 * * 7', datetime(2020, 1, 1), datetime(2020, 1, 5)),
+            ('0 0 * * 1-5', datetime(2020, 1, 3), datetime(2020, 1, 6)),
+
+            # If both are restricted, either day of month or weekday match.
+            ('0 0 15 * fri', datetime(2020, 1, 1), datetime(2020, 1, 3)),
+            ('0 0 2 * fri', datetime(2020, 1, 1), datetime(2020, 1, 2)),
+        ],
+    )
+    def test_get_next_run(self, expression, after, expected):
+        assert CronSchedule(expression).get_next_run(after) == expected
+
+    @pytest.mark.parametrize(
+        'expression',
+        [
+            '',
+            '* * * *',
+            '60 * * * *',
+            '* 24 * * *',
+            '* * 0 * *',
+            '* * * 13 *',
+            '* * * * 8',
+            '*/0 * * * *',
+            '5-1 * * * *',
+            'a * * * *',
+            '0 0 30 feb *',
+        ],
+    )
+    def test_invalid(self, expression):
+        assert not is_valid_crontab(expression)
+
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+
+
+class TestSpreadCrontab(object):
+
+    @pytest.mark.parametrize(
+        'expression, pattern',
+        [
+            ('0 0 * * *', r'^\d+ \d+ \* \* \*$'),
+            ('@daily', r'^\d+ \d+ \* \* \*$'),
+            ('@hourly', r'^\d+ \* \* \* \*$'),
+            ('*/15 * * * *', r'^\d+-59/15 \* \* \* \*$'),
+            ('0 */6 * * 1', r'^\d+ \d-23/6 \* \* 1$'),
+        ],
+    )
+    def test_spreads_round_values(self, expression, pattern):
+        spread = spread_crontab(expression, 'git@github.com:yelp/detect-secrets')
+
+        assert re.match(pattern, spread)
+        assert is_valid_crontab(spread)
+
+    @pytest.mark.parametrize(
+        'expression',
+        [
+            '30 9 * * *',
+            '* * * * *',
+            '*/1 * * * *',
+            'invalid',
+        ],
+    )
+    def test_leaves_explicit_values_alone(self, expression):
+        assert spread_crontab(expression, 'git@github.com:yelp/detect-secrets') == expression
+
+    def test_is_deterministic(self):
+        assert spread_crontab('0 0 * * *', 'a') == spread_crontab('0 0 * * *', 'a')
+
+    def test_spreads_load(self):
+        schedules = [
+            CronSchedule(spread_crontab('0 0 * * *', 'repo-{}'.format(index)))
+            for index in range(240)
+        ]
+
+        runs_per_hour = get_runs_per_hour(schedules, datetime(2020, 1, 1))
+
+        assert sum(runs_per_hour) == 240
+        assert max(runs_per_hour) < 30
+
+
+def test_get_runs_per_hour():
+    assert get_runs_per_hour(
+        [
+            CronSchedule('0 0 * * *'),
+            CronSchedule('*/30 12 * * *'),
+            CronSchedule('0 0 * * 0'),
+        ],
+
+        # This is a Wednesday.
+        datetime(2020, 1, 1),
+    ) == [1] + [0] * 11 + [2] + [0] * 11
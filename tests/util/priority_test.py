@@ -0,0 +1,38 @@
+import pytest
+
+from detect_secrets_server.util.priority import get_priority
+from detect_secrets_server.util.priority import prioritize
+
+
+@pytest.mark.parametrize(
+    'filename,expected',
+    (
+        ('.env', 0),
+        ('deploy/.env.production', 0),
+        ('prod.env', 0),
+        ('keys/server.pem', 1),
+        ('src/credentials.py', 1),
+        ('config/app.yaml', 2),
+        ('settings.py', 2),
+        ('src/main.py', 3),
+        ('environment.py', 3),
+    ),
+)
+def test_get_priority(filename, expected):
+    assert get_priority(filename) == expected
+
+
+def test_prioritize_preserves_order_otherwise():
+    assert prioritize([
+        'src/main.py',
+        'config/app.yaml',
+        'README.md',
+        '.env',
+        'config/db.yaml',
+    ]) == [
+        '.env',
+        'config/app.yaml',
+        'config/db.yaml',
+        'src/main.py',
+        'README.md',
+    ]
@@ -0,0 +1,100 @@
+import pytest
+
+from detect_secrets_server.storage.base import BaseStorage
+from detect_secrets_server.util.ring import get_rebalance_report
+from detect_secrets_server.util.ring import HashRing
+
+
+KEYS = {
+    'yelp/repo-{}'.format(index): BaseStorage.hash_filename('yelp/repo-{}'.format(index))
+    for index in range(2000)
+}
+
+
+class TestHashRing(object):
+
+    def test_deterministic(self):
+        first = HashRing({'a': 1, 'b': 1})
+        second = HashRing({'b': 1, 'a': 1})
+
+        assert all(
+            first.get_node(key) == second.get_node(key)
+            for key in KEYS.values()
+        )
+
+    def test_even_split(self):
+        report = get_rebalance_report(
+            KEYS,
+            HashRing({'a': 1, 'b': 1, 'c': 1, 'd': 1}),
+            HashRing({'a': 1, 'b': 1, 'c': 1, 'd': 1}),
+        )
+
+        assert report['moved'] == 0
+        for counts in report['nodes'].values():
+            assert 400 < counts['before'] < 600
+
+    def test_weights(self):
+        report = get_rebalance_report(
+            KEYS,
+            HashRing({'a': 1, 'b': 3}),
+            HashRing({'a': 1, 'b': 3}),
+        )
+
+        assert 1300 < report['nodes']['b']['before'] < 1700
+
+    def test_adding_node_moves_its_share(self):
+        report = get_rebalance_report(
+            KEYS,
+            HashRing({'a': 1, 'b': 1, 'c': 1, 'd': 1}),
+            HashRing({'a': 1, 'b': 1, 'c': 1, 'd': 1, 'e': 1}),
+        )
+
+        # Only repositories assigned to the new node move, rather than
+        # reshuffling all of them.
+        assert 0.1 < report['moved_fraction'] < 0.3
+        assert {move['to'] for move in report['moves']} == {'e'}
+        assert report['nodes']['e'] == {
+            'before': 0,
+            'after': report['moved'],
+        }
+
+    def test_removing_node_moves_its_share(self):
+        report = get_rebalance_report(
+            KEYS,
+            HashRing({'a': 1, 'b': 1, 'c': 1}),
+            HashRing({'a': 1, 'b': 1}),
+        )
+
+        assert {move['from'] for move in report['moves']} == {'c'}
+        assert report['moved'] == report['nodes']['c']['before']
+
+    @pytest.mark.parametrize(
+        'config, expected',
+        [
+            (
+                {'nodes': ['a', 'b']},
+                {'a': 1, 'b': 1},
+            ),
+            (
+                {'nodes': {'a': 1, 'b': 2}, 'vnodes': 16},
+                {'a': 1, 'b': 2},
+            ),
+        ],
+    )
+    def test_from_config(self, config, expected):
+        assert HashRing.from_config(config).nodes == expected
+
+    @pytest.mark.parametrize(
+        'config',
+        [
+            None,
+            {},
+            {'nodes': []},
+            {'nodes': 'a'},
+            {'nodes': {'a': 0}},
+            {'nodes': ['a'], 'vnodes': 0},
+        ],
+    )
+    def test_invalid_config(self, config):
+        with pytest.raises(ValueError):
+            HashRing.from_config(config)